@@ -17,7 +17,11 @@ from als.card_instance import CardInstance
 from als.theater import PlayerTheaterStack, Theater
 from als.abilities import AbilityContext, TacticalAbility
 from als.game_state import BattleState, Deck, GameState, PlayerState
-from als.card_registry import create_all_card_definitions
+from als.card_registry import (
+    CARD_DEFINITIONS,
+    create_all_card_definitions,
+    get_card_definition,
+)
 
 __all__ = [
     # Enums
@@ -46,5 +50,7 @@ __all__ = [
     "GameState",
     "PlayerState",
     # Registry
+    "CARD_DEFINITIONS",
     "create_all_card_definitions",
+    "get_card_definition",
 ]
@@ -11,7 +11,7 @@ from dataclasses import dataclass
 from typing import Any, Optional
 
 from als.abilities import AbilityContext, TacticalAbility
-from als.enums import AbilityTiming, CardOrientation, CardZone
+from als.enums import AbilityTiming, CardOrientation, CardZone, PlayerFlag
 
 
 # ---------------------------------------------------------------------------
@@ -185,7 +185,7 @@ class AirDropAbility(TacticalAbility):
         return [None]  # No choice needed — just sets the flag
 
     def execute(self, ctx: AbilityContext, choice: Any) -> None:
-        ctx.battle_state.set_player_flag(ctx.source_player_id, "air_drop_active", True)
+        ctx.battle_state.set_player_flag(ctx.source_player_id, PlayerFlag.AIR_DROP_ACTIVE, True)
 
 
 class ManeuverAbility(TacticalAbility):
@@ -263,7 +263,7 @@ class ReinforceAbility(TacticalAbility):
         if choice.target_theater_index is None:
             return  # Player declines
         bs = ctx.battle_state
-        card = bs.deck.draw()
+        card = bs.draw_from_deck()
         if card is None:
             return
         target_theater = bs.get_theater_at_position(choice.target_theater_index)
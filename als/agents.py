@@ -0,0 +1,208 @@
+"""Move-selection agents and a small spec language for building them.
+
+Agents are built from spec strings such as "random", "greedy" or
+"alphabeta:time=0.05,depth=4", so tools that run games in worker
+processes only have to ship a string across the process boundary.
+
+Agents currently see the whole BattleState, including the opponent's hand
+and facedown cards; comparisons between agents are fair because both
+sides get the same view.
+"""
+
+from __future__ import annotations
+
+import random
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+
+from als.alphabeta import AlphaBetaSearcher
+from als.cfr import ACTIONS, abstract_moves, greedy_choice, infoset_index, load_policy
+from als.engine import Move, current_player, is_terminal, legal_moves
+from als.enums import TurnAction
+from als.evaluation import best_one_ply
+from als.game_state import BattleState
+from als.mcts import MCTSSearcher
+from als.rollouts import PriorityRollout, make_rollout
+
+
+class Agent(ABC):
+    """Chooses a move for the player to act in a battle."""
+
+    name = "agent"
+
+    @abstractmethod
+    def select_move(self, battle_state: BattleState) -> Move:
+        """Return one of legal_moves(battle_state)."""
+
+    def reset(self) -> None:
+        """Forget any per-battle state (called at the start of each battle)."""
+
+    def observe(self, move: Move, battle_state: BattleState) -> None:
+        """Called after every move of the battle (either player's) with the new state."""
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}()"
+
+
+class RandomAgent(Agent):
+    """Uniformly random legal move; never withdraws unless forced."""
+
+    name = "random"
+
+    def __init__(self, seed: Optional[int] = None) -> None:
+        self.rng = random.Random(seed)
+
+    def select_move(self, battle_state: BattleState) -> Move:
+        moves = legal_moves(battle_state)
+        if len(moves) > 1 and not moves[-1].is_ability_choice:
+            moves = moves[:-1]  # drop WITHDRAW
+        return self.rng.choice(moves)
+
+
+class GreedyAgent(Agent):
+    """Best move by one-ply evaluation."""
+
+    name = "greedy"
+
+    def select_move(self, battle_state: BattleState) -> Move:
+        best, _ = best_one_ply(battle_state, legal_moves(battle_state))
+        assert best is not None
+        return best
+
+
+class AlphaBetaAgent(Agent):
+    """Iterative-deepening alpha-beta with a per-move time and depth limit."""
+
+    name = "alphabeta"
+
+    def __init__(self, time: float = 0.1, depth: int = 64, prune: str = "") -> None:
+        self.time_limit = time
+        self.searcher = AlphaBetaSearcher(max_depth=depth, pruning=prune or None)
+
+    def select_move(self, battle_state: BattleState) -> Move:
+        result = self.searcher.search(battle_state, time_limit=self.time_limit)
+        assert result.best_move is not None
+        return result.best_move
+
+    def reset(self) -> None:
+        self.searcher.clear()
+
+    def __repr__(self) -> str:
+        return f"AlphaBetaAgent(time={self.time_limit}, depth={self.searcher.max_depth})"
+
+
+class MCTSAgent(Agent):
+    """UCT search that re-roots its tree on every move and can ponder.
+
+    With `ponder` set, the search keeps running in a background thread
+    between this agent's turns; in a single process that thread competes
+    with the opponent's own thinking for the interpreter.
+    """
+
+    name = "mcts"
+
+    def __init__(
+        self, time: float = 0.1, exploration: float = 1.4, ponder: int = 0,
+        rollout: str = "random", seed: Optional[int] = None, nodes: int = 1 << 20,
+        prune: str = "",
+    ) -> None:
+        self.time_limit = time
+        self.ponder = bool(ponder)
+        self.searcher = MCTSSearcher(
+            exploration=exploration, rollout=make_rollout(rollout), seed=seed, max_nodes=nodes,
+            pruning=prune or None,
+        )
+
+    def select_move(self, battle_state: BattleState) -> Move:
+        result = self.searcher.search(battle_state, time_limit=self.time_limit)
+        assert result.best_move is not None
+        return result.best_move
+
+    def observe(self, move: Move, battle_state: BattleState) -> None:
+        self.searcher.advance(move, battle_state)
+        if self.ponder and not is_terminal(battle_state):
+            self.searcher.start_pondering()
+
+    def reset(self) -> None:
+        self.searcher.clear()
+
+    def __repr__(self) -> str:
+        return f"MCTSAgent(time={self.time_limit}, ponder={int(self.ponder)})"
+
+
+class CFRAgent(Agent):
+    """Turn actions from a trained CFR strategy (see als.cfr).
+
+    The strategy picks withdraw, deploy or improvise; `PriorityRollout`
+    picks the card and theater within that action. Ability choices are made
+    by one-ply evaluation. In information sets training never reached, the
+    agent plays the rollout policy's best non-withdraw move.
+    """
+
+    name = "cfr"
+
+    def __init__(self, path: str, seed: Optional[int] = None, sample: int = 1) -> None:
+        self.path = path
+        self.policy = load_policy(path)
+        self.sample = bool(sample)
+        self.rng = random.Random(seed)
+        self.rollout = PriorityRollout(epsilon=0.0)
+
+    def select_move(self, battle_state: BattleState) -> Move:
+        moves = legal_moves(battle_state)
+        if moves[0].is_ability_choice:
+            return greedy_choice(battle_state, moves, self.policy.beginner_mode)
+        concrete = abstract_moves(battle_state, moves, self.rng, self.rollout)
+        index = infoset_index(battle_state, current_player(battle_state), self.policy.beginner_mode)
+        probabilities = self.policy.action_probabilities(index, [m is not None for m in concrete])
+        if probabilities is None:
+            turns = [m for m in moves if m.action != TurnAction.WITHDRAW]
+            return self.rollout.best(battle_state, turns or moves, self.rng)
+        if self.sample:
+            action = self.rng.choices(range(ACTIONS), probabilities)[0]
+        else:
+            action = max(range(ACTIONS), key=probabilities.__getitem__)
+        move = concrete[action]
+        assert move is not None
+        return move
+
+    def __repr__(self) -> str:
+        return f"CFRAgent(path={self.path!r}, sample={int(self.sample)})"
+
+
+AGENTS: dict[str, Callable[..., Agent]] = {
+    "random": RandomAgent,
+    "greedy": GreedyAgent,
+    "alphabeta": AlphaBetaAgent,
+    "mcts": MCTSAgent,
+    "cfr": CFRAgent,
+}
+
+
+def _parse_value(text: str) -> object:
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    return text
+
+
+def parse_spec(spec: str) -> tuple[str, dict[str, object]]:
+    """Split "name:key=value,key=value" into the name and keyword arguments."""
+    name, _, params = spec.partition(":")
+    kwargs = {}
+    for item in filter(None, params.split(",")):
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Bad parameter {item!r} in {spec!r}")
+        kwargs[key.strip()] = _parse_value(value.strip())
+    return name, kwargs
+
+
+def make_agent(spec: str) -> Agent:
+    """Build an agent from "name" or "name:key=value,key=value"."""
+    name, kwargs = parse_spec(spec)
+    if name not in AGENTS:
+        raise ValueError(f"Unknown agent {name!r}; choose from {sorted(AGENTS)}")
+    return AGENTS[name](**kwargs)
@@ -0,0 +1,448 @@
+"""Deterministic depth-limited search over BattleState.
+
+`AlphaBetaSearcher` runs iterative-deepening minimax with alpha-beta
+pruning from one player's point of view. Hands and facedown cards are
+treated as known (perfect-information analysis); the deck order is not:
+with `chance_nodes` enabled, a Reinforce draw becomes an expectimax node
+averaging over every card still in the deck.
+
+Moves are ordered by the transposition-table move, then two killer moves
+per ply, then the history heuristic. Each iteration after the first starts
+with an aspiration window around the previous value and re-searches with
+an open bound on failure. The search checks its deadline every few hundred
+nodes and returns the result of the last completed iteration.
+
+An optional `utility` maps the signed battle VPs of leaves (terminal VPs or
+the heuristic estimate) to the quantity actually maximized, e.g. match
+equity from als.match_equity. Values in the transposition table are in
+utility units, so call `clear()` whenever the utility changes.
+
+With `shared_table`, the transposition table is an
+als.shared_tt.SharedTranspositionTable that other processes probe and
+update too. `parallel_search` runs several such searchers on one position
+in a process pool (lazy SMP) and returns the deepest result; workers
+break move-ordering ties differently (`ordering_seed`) so that they do
+not all walk the same tree.
+
+With `endgame`, a als.retrograde.RetrogradeDB, positions stored there
+return their exact value without being searched. It is only probed with
+chance nodes on, no utility and a matching beginner mode, the settings
+its values were solved under.
+
+With `pruning` ("strict" or "aggressive", see als.pruning), dominated and
+equivalent moves are dropped before ordering, at the root and inside the
+tree.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from als import instrumentation
+from als.abilities_impl import ReinforceChoice
+from als.engine import Move, apply_move, current_player, is_terminal, legal_moves
+from als.evaluation import heuristic_value, terminal_value
+from als.game_state import BattleState
+from als.hashing import position_hash
+from als.pruning import check_mode, prune_moves
+from als.serialization import battle_from_dict, battle_to_dict
+from als.shared_tt import SharedTranspositionTable, SharedTTView
+
+if TYPE_CHECKING:
+    from als.retrograde import RetrogradeDB
+
+_EXACT, _LOWER, _UPPER = range(3)
+# Stored depth for subtrees searched to the end of the battle.
+_SOLVED = 1 << 30
+_DEADLINE_CHECK_INTERVAL = 256
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the deadline passes."""
+
+
+@dataclass
+class SearchResult:
+    best_move: Optional[Move]
+    value: float  # signed VPs (or utility) for the searching player
+    depth: int  # deepest fully completed iteration
+    nodes: int
+    elapsed: float
+    principal_variation: list[Move] = field(default_factory=list)
+    complete: bool = False  # True if the tree was searched to the end of the battle
+    # Consecutive final iterations that agreed on best_move.
+    stable_iterations: int = 0
+
+
+class AlphaBetaSearcher:
+    """Iterative-deepening alpha-beta / expectimax searcher."""
+
+    def __init__(
+        self,
+        max_depth: int = 64,
+        aspiration_window: float = 1.0,
+        chance_nodes: bool = True,
+        beginner_mode: bool = False,
+        evaluate: Optional[Callable[[BattleState, int], float]] = None,
+        utility: Optional[Callable[[float], float]] = None,
+        shared_table: Optional[SharedTranspositionTable] = None,
+        ordering_seed: Optional[int] = None,
+        endgame: Optional[RetrogradeDB] = None,
+        pruning: Optional[str] = None,
+    ) -> None:
+        self.max_depth = max_depth
+        self.aspiration_window = aspiration_window
+        self.chance_nodes = chance_nodes
+        self.beginner_mode = beginner_mode
+        self.evaluate = evaluate or partial(heuristic_value, beginner_mode=beginner_mode)
+        self.utility = utility
+        self.endgame = endgame
+        self.pruning = check_mode(pruning)
+        self._endgame: Optional[RetrogradeDB] = None  # endgame, if usable this search
+        # hash -> (depth, value, bound type, best move code)
+        self._tt: Any = {} if shared_table is None else SharedTTView(shared_table, _SOLVED)
+        # Odd multiplier scrambling move codes to break history ties.
+        self._tie_break = 0 if ordering_seed is None else (ordering_seed * 2 + 1) * 0x9E3779B1
+        self._history: dict[int, int] = {}
+        self._killers: list[list[Optional[int]]] = []
+        self._nodes = 0
+        self._deadline: Optional[float] = None
+        self._hit_horizon = False
+        self._root_player = 0
+        self._tt_player: Optional[int] = None
+
+    def clear(self) -> None:
+        """Forget the transposition table and move-ordering statistics.
+
+        Entries of a shared table are kept: they are keyed by root player.
+        """
+        self._tt.clear()
+        self._history.clear()
+
+    # --- Public API ---
+
+    @property
+    def root_player(self) -> int:
+        """The player whose point of view search values and table entries take."""
+        return self._root_player
+
+    def set_root_player(self, player_id: int) -> None:
+        """Search (and read the table) from player_id's point of view."""
+        self._root_player = player_id
+        if self._tt_player != player_id:
+            # Stored values are from the previous root player's point of view.
+            self.clear()
+            self._tt_player = player_id
+            if isinstance(self._tt, SharedTTView):
+                self._tt.player_id = player_id
+
+    def principal_variation(
+        self, battle_state: BattleState, depth: int, player_id: Optional[int] = None
+    ) -> list[Move]:
+        """Up to `depth` moves of the best line the table holds from battle_state."""
+        self.set_root_player(current_player(battle_state) if player_id is None else player_id)
+        return self._principal_variation(battle_state, depth)
+
+    def search(
+        self,
+        battle_state: BattleState,
+        time_limit: Optional[float] = None,
+        deadline: Optional[float] = None,
+        player_id: Optional[int] = None,
+    ) -> SearchResult:
+        """Search the position for the player to move (or `player_id`).
+
+        `deadline` is a time.monotonic() timestamp; `time_limit` is seconds
+        from now. With neither, the search runs to `max_depth`.
+        """
+        start = time.monotonic()
+        if time_limit is not None:
+            limit = start + time_limit
+            deadline = limit if deadline is None else min(deadline, limit)
+        self._deadline = deadline
+        self._nodes = 0
+        self._killers = [[None, None] for _ in range(self.max_depth + 2)]
+        self.set_root_player(current_player(battle_state) if player_id is None else player_id)
+        usable = (
+            self.endgame is not None
+            and self.chance_nodes
+            and self.utility is None
+            and self.endgame.beginner_mode == self.beginner_mode
+        )
+        self._endgame = self.endgame if usable else None
+
+        moves = self._moves(battle_state)
+        if not moves:
+            return SearchResult(
+                None, self._leaf_value(battle_state), 0, 0, 0.0, complete=True
+            )
+        result = SearchResult(moves[0], 0.0, 0, 0, 0.0, [moves[0]])
+        if len(moves) == 1:
+            result.value = self._child_value(battle_state, moves[0], 0, -math.inf, math.inf)
+            result.elapsed = time.monotonic() - start
+            return result
+
+        previous: Optional[float] = None
+        for depth in range(1, self.max_depth + 1):
+            try:
+                with instrumentation.phase("search.alphabeta.iteration"):
+                    value = self._iterate(battle_state, depth, previous)
+            except SearchTimeout:
+                break
+            entry = self._tt.get(self._key(battle_state))
+            code = entry[3] if entry is not None else None  # a shared slot may be replaced
+            best = next((m for m in moves if m.code == code), moves[0])
+            stable = result.stable_iterations + 1 if best == result.best_move else 1
+            result = SearchResult(
+                best,
+                value,
+                depth,
+                self._nodes,
+                time.monotonic() - start,
+                self._principal_variation(battle_state, depth),
+                complete=not self._hit_horizon,
+                stable_iterations=stable,
+            )
+            previous = value
+            if result.complete:
+                break
+        result.nodes = self._nodes
+        result.elapsed = time.monotonic() - start
+        instrumentation.count("search.alphabeta.nodes", self._nodes)
+        return result
+
+    # --- Search ---
+
+    def _iterate(self, bs: BattleState, depth: int, previous: Optional[float]) -> float:
+        self._hit_horizon = False
+        if previous is None:
+            return self._search(bs, depth, -math.inf, math.inf, 0)
+        alpha = previous - self.aspiration_window
+        beta = previous + self.aspiration_window
+        while True:
+            value = self._search(bs, depth, alpha, beta, 0)
+            if value <= alpha:
+                alpha = -math.inf
+            elif value >= beta:
+                beta = math.inf
+            else:
+                return value
+
+    def _moves(self, bs: BattleState) -> list[Move]:
+        moves = legal_moves(bs)
+        return moves if self.pruning is None else prune_moves(bs, moves, self.pruning)
+
+    def _key(self, bs: BattleState) -> int:
+        h = position_hash(bs)
+        if not self.chance_nodes:
+            # Draws are deterministic, so the deck order is part of the position.
+            h = hash((h, tuple(bs.deck.card_ids)))
+        return h
+
+    def _leaf_value(self, bs: BattleState) -> float:
+        if is_terminal(bs):
+            value = terminal_value(bs, self._root_player, self.beginner_mode)
+        else:
+            value = self.evaluate(bs, self._root_player)
+        return value if self.utility is None else self.utility(value)
+
+    def _search(self, bs: BattleState, depth: int, alpha: float, beta: float, ply: int) -> float:
+        self._nodes += 1
+        if (
+            self._deadline is not None
+            and self._nodes % _DEADLINE_CHECK_INTERVAL == 0
+            and time.monotonic() > self._deadline
+        ):
+            raise SearchTimeout
+        if is_terminal(bs):
+            return self._leaf_value(bs)
+        if self._endgame is not None:
+            exact = self._endgame.value(bs, self._root_player)
+            if exact is not None:
+                return exact
+        if depth <= 0:
+            self._hit_horizon = True
+            return self._leaf_value(bs)
+
+        key = self._key(bs)
+        tt_move: Optional[int] = None
+        entry = self._tt.get(key)
+        if entry is not None:
+            entry_depth, entry_value, bound, tt_move = entry
+            if entry_depth >= depth:
+                if entry_depth != _SOLVED:
+                    self._hit_horizon = True
+                if bound == _EXACT:
+                    return entry_value
+                if bound == _LOWER:
+                    alpha = max(alpha, entry_value)
+                else:
+                    beta = min(beta, entry_value)
+                if alpha >= beta:
+                    return entry_value
+
+        maximizing = current_player(bs) == self._root_player
+        outer_hit_horizon = self._hit_horizon
+        self._hit_horizon = False
+        original_alpha, original_beta = alpha, beta
+        best_value = -math.inf if maximizing else math.inf
+        best_code: Optional[int] = None
+        for move in self._ordered(self._moves(bs), tt_move, ply):
+            value = self._child_value(bs, move, depth - 1, alpha, beta, ply + 1)
+            if maximizing:
+                if value > best_value:
+                    best_value, best_code = value, move.code
+                alpha = max(alpha, value)
+            else:
+                if value < best_value:
+                    best_value, best_code = value, move.code
+                beta = min(beta, value)
+            if alpha >= beta:
+                self._record_cutoff(move.code, depth, ply)
+                break
+
+        if best_value <= original_alpha:
+            bound = _UPPER
+        elif best_value >= original_beta:
+            bound = _LOWER
+        else:
+            bound = _EXACT
+        stored_depth = depth if self._hit_horizon else _SOLVED
+        self._hit_horizon = self._hit_horizon or outer_hit_horizon
+        self._tt[key] = (stored_depth, best_value, bound, best_code)
+        return best_value
+
+    def _child_value(
+        self, bs: BattleState, move: Move, depth: int, alpha: float, beta: float, ply: int = 1
+    ) -> float:
+        choice = move.choice
+        if (
+            self.chance_nodes
+            and isinstance(choice, ReinforceChoice)
+            and choice.target_theater_index is not None
+            and bs.deck.size > 1
+        ):
+            # Expectimax over the unknown top card; children need exact values.
+            total = 0.0
+            deck = bs.deck.cards
+            for card in deck:
+                child = bs.fork()
+                child.put_on_top_of_deck(card)
+                apply_move(child, move)
+                total += self._search(child, depth, -math.inf, math.inf, ply)
+            return total / len(deck)
+        child = bs.fork()
+        apply_move(child, move)
+        return self._search(child, depth, alpha, beta, ply)
+
+    # --- Move ordering ---
+
+    def _ordered(self, moves: list[Move], tt_move: Optional[int], ply: int) -> list[Move]:
+        killers = self._killers[ply] if ply < len(self._killers) else [None, None]
+        history = self._history
+        tie_break = self._tie_break
+
+        def priority(move: Move) -> tuple[int, int, int]:
+            if move.code == tt_move:
+                return (0, 0, 0)
+            if move.code in killers:
+                return (1, 0, 0)
+            return (2, -history.get(move.code, 0), (move.code * tie_break) & 0xFFFF)
+
+        return sorted(moves, key=priority)
+
+    def _record_cutoff(self, code: int, depth: int, ply: int) -> None:
+        self._history[code] = self._history.get(code, 0) + depth * depth
+        if ply < len(self._killers):
+            killers = self._killers[ply]
+            if killers[0] != code:
+                killers[1] = killers[0]
+                killers[0] = code
+
+    def _principal_variation(self, bs: BattleState, depth: int) -> list[Move]:
+        pv: list[Move] = []
+        state = bs
+        for _ in range(depth):
+            entry = self._tt.get(self._key(state))
+            if entry is None or entry[3] is None or is_terminal(state):
+                break
+            move = next((m for m in legal_moves(state) if m.code == entry[3]), None)
+            if move is None:
+                break
+            pv.append(move)
+            if isinstance(move.choice, ReinforceChoice) and self.chance_nodes:
+                break  # the continuation depends on the draw
+            state = state.fork()
+            apply_move(state, move)
+        return pv
+
+
+# --- Parallel search ---
+
+def _parallel_worker(
+    battle: dict[str, Any],
+    table: SharedTranspositionTable,
+    seed: int,
+    time_limit: float,
+    player_id: Optional[int],
+    max_depth: int,
+) -> tuple[Optional[int], float, int, int, bool]:
+    searcher = AlphaBetaSearcher(max_depth=max_depth, shared_table=table, ordering_seed=seed)
+    try:
+        result = searcher.search(battle_from_dict(battle), time_limit, player_id=player_id)
+    finally:
+        table.close()
+    code = result.best_move.code if result.best_move is not None else None
+    return code, result.value, result.depth, result.nodes, result.complete
+
+
+def parallel_search(
+    battle_state: BattleState,
+    time_limit: float,
+    workers: int = 4,
+    player_id: Optional[int] = None,
+    max_depth: int = 64,
+    table_slots: int = 1 << 20,
+    executor: Optional[ProcessPoolExecutor] = None,
+) -> SearchResult:
+    """Search one position with `workers` processes sharing a transposition table.
+
+    Returns the result of the worker that completed the deepest iteration
+    (nodes are summed over workers). The principal variation is read back
+    from the shared table.
+    """
+    start = time.monotonic()
+    data = battle_to_dict(battle_state)
+    with SharedTranspositionTable.create(table_slots) as table:
+        own_executor = executor is None
+        pool = executor or ProcessPoolExecutor(max_workers=workers)
+        try:
+            futures = [
+                pool.submit(_parallel_worker, data, table, seed, time_limit, player_id, max_depth)
+                for seed in range(workers)
+            ]
+            results = [f.result() for f in futures]
+        finally:
+            if own_executor:
+                pool.shutdown()
+        code, value, depth, _, complete = max(results, key=lambda r: (r[4], r[2]))
+        moves = legal_moves(battle_state)
+        best = next((m for m in moves if m.code == code), moves[0] if moves else None)
+        searcher = AlphaBetaSearcher(max_depth=max_depth, shared_table=table)
+        pv = []
+        if best is not None:
+            pv = searcher.principal_variation(battle_state, depth, player_id)
+    return SearchResult(
+        best,
+        value,
+        depth,
+        sum(r[3] for r in results),
+        time.monotonic() - start,
+        pv,
+        complete=complete,
+    )
@@ -0,0 +1,184 @@
+"""Persistent cache of search results, shared by every tool on a machine.
+
+Self-play, tournaments and the move service keep meeting the same
+positions. An `AnalysisCache` is a SQLite file that maps a position plus
+the search parameters to the result of a search (best move, value, depth
+and the rest of the dict `service.search_position` returns), so a
+recurring position is answered without searching.
+
+Positions are keyed by `hashing.position_id` (the Zobrist position
+hash with the theater order mixed in) and by the searching player's seat,
+since values are from that player's point of view. A stored result answers
+a request whose time budget is no larger than the one it was searched
+with. For the same key, a deeper result replaces a shallower one.
+
+The database runs in WAL mode, so any number of processes can read while
+one writes. Each process opens its own connection (a cache pickles by
+path). Writes are buffered and committed in batches of `batch_size`, and
+the oldest entries are evicted once the file holds more than `max_entries`.
+
+    with AnalysisCache("analysis.sqlite") as cache:
+        result = cache.get(battle, player_id, "alphabeta", time_limit)
+        if result is None:
+            result = search_position(...)
+            cache.put(battle, player_id, "alphabeta", time_limit, result)
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from als.engine import current_player
+from als.game_state import BattleState
+from als.hashing import position_id
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key INTEGER NOT NULL,
+    params TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    time_limit REAL NOT NULL,
+    written REAL NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (key, params)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_written ON results (written);
+"""
+# A new result replaces a stored one unless the stored one is deeper.
+_UPSERT = """
+INSERT INTO results (key, params, depth, time_limit, written, result)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (key, params) DO UPDATE SET
+    depth = excluded.depth, time_limit = excluded.time_limit,
+    written = excluded.written, result = excluded.result
+WHERE excluded.depth >= results.depth
+"""
+_EVICT = """
+DELETE FROM results WHERE (key, params) IN (
+    SELECT key, params FROM results ORDER BY written LIMIT ?
+)
+"""
+_SIGN = 1 << 63
+
+
+def _signed(key: int) -> int:
+    """SQLite integers are signed 64-bit."""
+    return key - (1 << 64) if key >= _SIGN else key
+
+
+class AnalysisCache:
+    """SQLite-backed map from (position, search parameters) to a search result."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_entries: int = 1_000_000,
+        batch_size: int = 256,
+        timeout: float = 30.0,
+    ) -> None:
+        self.path = str(path)
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        # (key, params, depth, time_limit, written, result) per pending row.
+        self._pending: dict[tuple[int, str], tuple[int, str, int, float, float, str]] = {}
+        # Not shared between threads at once, but it may be used from a thread
+        # other than the one that opened it (the service's cache thread).
+        self._db = sqlite3.connect(self.path, timeout=timeout, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        with self._db:
+            self._db.executescript(_SCHEMA)
+
+    def __reduce__(self) -> tuple:
+        return (AnalysisCache, (self.path, self.max_entries, self.batch_size, self.timeout))
+
+    def close(self) -> None:
+        self.flush()
+        self._db.close()
+
+    def __enter__(self) -> AnalysisCache:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        (count,) = self._db.execute("SELECT count(*) FROM results").fetchone()
+        return count + len(self._pending)
+
+    # --- Keys ---
+
+    @staticmethod
+    def key(battle_state: BattleState, player_id: Optional[int], params: str) -> tuple[int, str]:
+        """(position key, parameters) for a search by player_id (default: to move)."""
+        pid = current_player(battle_state) if player_id is None else player_id
+        seat = battle_state.players[pid].position.name
+        return _signed(position_id(battle_state)), f"{params};{seat}"
+
+    # --- Reads and writes ---
+
+    def get_key(self, key: tuple[int, str], time_limit: float = 0.0) -> Optional[dict[str, Any]]:
+        """The stored result for `key` if it was searched for at least time_limit seconds."""
+        stored: Optional[tuple[float, str]]
+        pending = self._pending.get(key)
+        if pending is not None:
+            stored = pending[3], pending[5]
+        else:
+            stored = self._db.execute(
+                "SELECT time_limit, result FROM results WHERE key = ? AND params = ?", key
+            ).fetchone()
+        if stored is None or stored[0] < time_limit:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(stored[1])
+
+    def put_key(self, key: tuple[int, str], time_limit: float, result: dict[str, Any]) -> None:
+        """Queue a result for writing; the batch commits once it is full."""
+        depth = int(result.get("depth", 0))
+        previous = self._pending.get(key)
+        if previous is None or depth >= previous[2]:
+            self._pending[key] = (
+                key[0], key[1], depth, time_limit, time.time(), json.dumps(result),
+            )
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def get(
+        self,
+        battle_state: BattleState,
+        player_id: Optional[int],
+        params: str,
+        time_limit: float = 0.0,
+    ) -> Optional[dict[str, Any]]:
+        return self.get_key(self.key(battle_state, player_id, params), time_limit)
+
+    def put(
+        self,
+        battle_state: BattleState,
+        player_id: Optional[int],
+        params: str,
+        time_limit: float,
+        result: dict[str, Any],
+    ) -> None:
+        self.put_key(self.key(battle_state, player_id, params), time_limit, result)
+
+    def flush(self) -> None:
+        """Commit buffered results in one transaction, then evict if over size."""
+        if not self._pending:
+            return
+        rows = list(self._pending.values())
+        self._pending.clear()
+        with self._db:
+            self._db.executemany(_UPSERT, rows)
+            (count,) = self._db.execute("SELECT count(*) FROM results").fetchone()
+            if count > self.max_entries:
+                # Evict down to 90% so eviction does not run on every batch.
+                self._db.execute(_EVICT, (count - self.max_entries * 9 // 10,))
@@ -0,0 +1,296 @@
+"""Batch analysis of saved positions on a process pool.
+
+Input is a file of JSON lines (or `-` for stdin). Each line is either a
+serialized GameState with a battle in progress, a bare BattleState (see
+als.serialization), or a wrapper naming the position:
+
+    {"id": "replay-17/42", "state": {...}, "player_id": 1}
+
+Every position is searched with the alpha-beta searcher for `--time`
+seconds, and one line per position is written as soon as its search ends:
+
+    {"line": 3, "id": "replay-17/42", "move": {...}, "action": "DEPLOY",
+     "confidence": 0.8, "value": 3.0, "depth": 9, "nodes": 51234,
+     "principal_variation": [...], "elapsed_ms": 1003.2}
+
+or `{"line": 3, "id": ..., "error": "..."}`. Output lines come in the order
+searches finish; match them to inputs by `line` (1-based) or `id`.
+
+The output file is appended to and flushed line by line. Rerunning the
+same command after an interruption skips every position that already has
+a result (by `id`, else by line number) and retries the ones that failed.
+Throughput is reported on stderr. With `--cache`, positions already in an
+als.analysis_cache database are answered from it (flagged `"cached": true`)
+and new results are added to it.
+
+    python -m als.analyze positions.jsonl -o analysis.jsonl --time 1 --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional, TextIO, Union
+
+from als.analysis_cache import AnalysisCache
+from als.serialization import state_from_dict
+from als.service import SEARCH_PARAMS, search_position
+
+# A position is identified by its "id", or by its line number when it has none.
+Key = Union[str, int]
+
+
+def _key(record: dict[str, Any]) -> Key:
+    return str(record["id"]) if record.get("id") is not None else record["line"]
+
+
+def _parse(text: str) -> tuple[Optional[Any], dict[str, Any], Optional[int]]:
+    """(id, state, player_id) of an input line."""
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    if "state" in data:
+        return data.get("id"), data["state"], data.get("player_id")
+    return None, data, None
+
+
+def analyze_line(line_number: int, text: str, time_limit: float) -> dict[str, Any]:
+    """Worker entry point: parse one input line and search it."""
+    result: dict[str, Any] = {"line": line_number}
+    start = time.monotonic()
+    try:
+        position_id, state, player_id = _parse(text)
+        if position_id is not None:
+            result["id"] = position_id
+        result.update(search_position(state, player_id, time_limit))
+    except Exception as exc:  # reported per position; the batch goes on
+        result["error"] = f"{type(exc).__name__}: {exc}"
+    result["elapsed_ms"] = round((time.monotonic() - start) * 1000, 1)
+    return result
+
+
+def completed_keys(path: Union[str, Path]) -> set[Key]:
+    """Keys of the positions that already have a result in an output file.
+
+    Lines with an error, and a line cut short by an interruption, do not count.
+    """
+    done: set[Key] = set()
+    try:
+        f = open(path, encoding="utf-8")
+    except FileNotFoundError:
+        return done
+    with f:
+        for text in f:
+            try:
+                record = json.loads(text)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and "line" in record and "error" not in record:
+                done.add(_key(record))
+    return done
+
+
+def _input_id(text: str) -> Optional[str]:
+    """The "id" of a wrapped input line, without a full parse when there is none."""
+    if '"id"' not in text:
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    if isinstance(data, dict) and "state" in data and data.get("id") is not None:
+        return str(data["id"])
+    return None
+
+
+def _cached_result(
+    cache: AnalysisCache, line_number: int, text: str, time_limit: float
+) -> tuple[Optional[tuple[int, str]], Optional[dict[str, Any]]]:
+    """(cache key, cached result line) for an input line; (None, None) if unparsable."""
+    try:
+        position_id, state, player_id = _parse(text)
+        _, battle = state_from_dict(state)
+        key = cache.key(battle, player_id, SEARCH_PARAMS)
+    except Exception:
+        return None, None  # the worker reports the error
+    cached = cache.get_key(key, time_limit)
+    if cached is None:
+        return key, None
+    result: dict[str, Any] = {"line": line_number}
+    if position_id is not None:
+        result["id"] = position_id
+    result.update(cached)
+    result["cached"] = True
+    return key, result
+
+
+def pending_lines(lines: Iterable[str], done: set[Key]) -> Iterator[tuple[int, str]]:
+    """(line number, text) of the non-blank input lines not in `done`."""
+    for number, text in enumerate(lines, start=1):
+        text = text.strip()
+        if not text:
+            continue
+        if done:
+            position_id = _input_id(text)
+            if (position_id if position_id is not None else number) in done:
+                continue
+        yield number, text
+
+
+class Throughput:
+    """Positions finished per second, reported every `every` seconds."""
+
+    def __init__(self, out: TextIO, every: float = 10.0, skipped: int = 0) -> None:
+        self.out = out
+        self.every = every
+        self.skipped = skipped
+        self.finished = 0
+        self.errors = 0
+        self.cached = 0
+        self.nodes = 0
+        self.started = self.last_report = time.monotonic()
+
+    def add(self, result: dict[str, Any]) -> None:
+        self.finished += 1
+        if "error" in result:
+            self.errors += 1
+        if result.get("cached"):
+            self.cached += 1
+        else:
+            self.nodes += result.get("nodes", 0)
+        now = time.monotonic()
+        if self.every and now - self.last_report >= self.every:
+            self.last_report = now
+            self.report()
+
+    def report(self) -> None:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        print(
+            f"{self.finished} positions ({self.cached} cached, {self.errors} errors, "
+            f"{self.skipped} done before), "
+            f"{self.finished / elapsed:.2f}/s, {self.nodes / elapsed:.0f} nodes/s",
+            file=self.out,
+        )
+
+
+def analyze(
+    lines: Iterable[str],
+    out: TextIO,
+    time_limit: float = 1.0,
+    workers: int = 1,
+    done: Optional[set[Key]] = None,
+    report_every: float = 10.0,
+    cache: Optional[AnalysisCache] = None,
+) -> Throughput:
+    """Search every pending input line and write one JSON line per result.
+
+    At most 2 * workers lines are parsed and queued at a time, so inputs of
+    any size stream through in constant memory. With a cache, positions it
+    holds are answered from it and new results are added to it.
+    """
+    done = done or set()
+    stats = Throughput(sys.stderr, report_every, skipped=len(done))
+    todo = pending_lines(lines, done)
+    pending: set[Future[dict[str, Any]]] = set()
+    cache_keys: dict[Future[dict[str, Any]], tuple[int, str]] = {}
+
+    def emit(result: dict[str, Any]) -> None:
+        out.write(json.dumps(result) + "\n")
+        out.flush()
+        stats.add(result)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        try:
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < 2 * workers:
+                    item = next(todo, None)
+                    if item is None:
+                        exhausted = True
+                        continue
+                    key, cached = None, None
+                    if cache is not None:
+                        key, cached = _cached_result(cache, *item, time_limit)
+                    if cached is not None:
+                        emit(cached)
+                        continue
+                    future = executor.submit(analyze_line, *item, time_limit)
+                    pending.add(future)
+                    if key is not None:
+                        cache_keys[future] = key
+                if not pending:
+                    continue
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    result = future.result()
+                    key = cache_keys.pop(future, None)
+                    if cache is not None and key is not None and "error" not in result:
+                        cache.put_key(key, time_limit, _searched(result))
+                    emit(result)
+        except KeyboardInterrupt:
+            for future in pending:
+                future.cancel()
+            raise
+    return stats
+
+
+def _searched(result: dict[str, Any]) -> dict[str, Any]:
+    """The search part of a result line, as `search_position` returns it."""
+    return {k: v for k, v in result.items() if k not in ("line", "id", "elapsed_ms")}
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analyze a file of serialized positions")
+    parser.add_argument("input", help="JSON lines of positions, or - for stdin")
+    parser.add_argument(
+        "-o", "--output", type=Path, default=None,
+        help="JSON lines file to append results to (resumable); default stdout",
+    )
+    parser.add_argument("--time", type=float, default=1.0, help="seconds per position")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--report-every", type=float, default=10.0, help="seconds")
+    parser.add_argument("--cache", default=None, help="SQLite analysis cache to share")
+    args = parser.parse_args(argv)
+
+    done: set[Key] = set()
+    out: TextIO
+    if args.output is not None:
+        done = completed_keys(args.output)
+        if args.output.exists() and args.output.stat().st_size:
+            with open(args.output, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+        else:
+            torn = False
+        out = open(args.output, "a", encoding="utf-8")
+        if torn:
+            out.write("\n")  # end the line an interruption cut short
+    else:
+        out = sys.stdout
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    cache = AnalysisCache(args.cache) if args.cache else None
+    try:
+        stats = analyze(
+            source, out, args.time, args.workers, done, args.report_every, cache
+        )
+    except KeyboardInterrupt:
+        print("Interrupted; rerun the same command to resume", file=sys.stderr)
+        return 130
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+        if cache is not None:
+            cache.close()
+    stats.report()
+    return 1 if stats.errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
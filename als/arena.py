@@ -0,0 +1,251 @@
+"""Agent-vs-agent matches on a process pool with SPRT early stopping.
+
+Games are played in mirrored pairs: both games of a pair use the same
+deal for every battle (the shuffle depends only on the pair seed and the
+battle number) with the agents' seats swapped, so the luck of the deal
+largely cancels out. Each pair scores 0, 0.5 or 1 for agent A.
+
+Results are summarized as an Elo difference with a 95% interval, and a
+generalized sequential probability ratio test (on pair scores) decides
+between H0: elo = elo0 and H1: elo = elo1. The match stops as soon as the
+log-likelihood ratio crosses a bound.
+
+    python -m als.arena "alphabeta:time=0.05" greedy --pairs 2000 --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import os
+import random
+import sys
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Optional
+
+from als.agents import Agent, make_agent
+from als.engine import apply_move, current_player, finish_battle, is_terminal, start_battle
+from als.game_state import GameState
+
+# Guards against ability loops (e.g. repeated Redeploy extra turns).
+MAX_DECISIONS_PER_BATTLE = 1000
+PLAYER_IDS = (0, 1)
+
+
+def battle_deal(pair_seed: int, battle_number: int) -> list[int]:
+    """The deal (18 card_ids) used by every game of a pair for one battle."""
+    deal = list(range(18))
+    random.Random(f"{pair_seed}:{battle_number}").shuffle(deal)
+    return deal
+
+
+def play_game(
+    agents: dict[int, Agent],
+    pair_seed: int,
+    winning_score: int = 12,
+    beginner_mode: bool = False,
+) -> int:
+    """Play one full game; player 0 starts as 1st player. Returns the winner's id."""
+    game = GameState(PLAYER_IDS, first_player_id=PLAYER_IDS[0], winning_score=winning_score)
+    while not game.is_game_over():
+        battle = start_battle(game, battle_deal(pair_seed, game.battle_number))
+        for agent in agents.values():
+            agent.reset()
+        for _ in range(MAX_DECISIONS_PER_BATTLE):
+            if is_terminal(battle):
+                break
+            move = agents[current_player(battle)].select_move(battle)
+            apply_move(battle, move)
+            for agent in agents.values():
+                agent.observe(move, battle)
+        else:
+            raise RuntimeError(f"Battle exceeded {MAX_DECISIONS_PER_BATTLE} decisions")
+        for agent in agents.values():
+            agent.reset()  # also stops any pondering between battles
+        finish_battle(game, beginner_mode)
+    winner = game.get_winner()
+    assert winner is not None
+    return winner
+
+
+def play_pair(
+    spec_a: str, spec_b: str, pair_seed: int, winning_score: int, beginner_mode: bool
+) -> float:
+    """Worker entry point: play a mirrored pair and return agent A's score (0-1)."""
+    score = 0.0
+    for seat_a in PLAYER_IDS:
+        seat_b = 1 - seat_a
+        agents = {seat_a: make_agent(spec_a), seat_b: make_agent(spec_b)}
+        if play_game(agents, pair_seed, winning_score, beginner_mode) == seat_a:
+            score += 0.5
+    return score
+
+
+def elo_to_score(elo: float) -> float:
+    return 1.0 / (1.0 + 10.0 ** (-elo / 400.0))
+
+
+def score_to_elo(score: float) -> float:
+    score = min(max(score, 1e-6), 1.0 - 1e-6)
+    return -400.0 * math.log10(1.0 / score - 1.0)
+
+
+@dataclass
+class MatchStats:
+    """Running statistics over pair scores for agent A."""
+
+    pair_counts: dict[float, int] = field(default_factory=lambda: {0.0: 0, 0.5: 0, 1.0: 0})
+
+    def add(self, pair_score: float) -> None:
+        self.pair_counts[pair_score] += 1
+
+    @property
+    def pairs(self) -> int:
+        return sum(self.pair_counts.values())
+
+    @property
+    def mean(self) -> float:
+        return sum(s * n for s, n in self.pair_counts.items()) / self.pairs
+
+    @property
+    def variance(self) -> float:
+        mean = self.mean
+        return sum(n * (s - mean) ** 2 for s, n in self.pair_counts.items()) / self.pairs
+
+    def elo(self) -> tuple[float, float, float]:
+        """Elo difference A - B with a 95% interval, as (low, estimate, high)."""
+        margin = 1.96 * math.sqrt(self.variance / self.pairs)
+        return (
+            score_to_elo(self.mean - margin),
+            score_to_elo(self.mean),
+            score_to_elo(self.mean + margin),
+        )
+
+    def llr(self, elo0: float, elo1: float) -> float:
+        """GSPRT log-likelihood ratio of H1 (elo1) against H0 (elo0).
+
+        The variance includes half a pseudo-pair of each outcome, so a
+        perfect early record does not produce an unbounded ratio.
+        """
+        if self.pairs < 2:
+            return 0.0
+        counts = {s: n + 0.5 for s, n in self.pair_counts.items()}
+        total = sum(counts.values())
+        smoothed_mean = sum(s * n for s, n in counts.items()) / total
+        variance = sum(n * (s - smoothed_mean) ** 2 for s, n in counts.items()) / total
+        s0, s1 = elo_to_score(elo0), elo_to_score(elo1)
+        return self.pairs * (s1 - s0) * (2.0 * self.mean - s0 - s1) / (2.0 * variance)
+
+
+def sprt_bounds(alpha: float, beta: float) -> tuple[float, float]:
+    """(lower, upper) LLR bounds: below accepts H0, above accepts H1."""
+    return math.log(beta / (1.0 - alpha)), math.log((1.0 - beta) / alpha)
+
+
+@dataclass
+class MatchResult:
+    stats: MatchStats
+    llr: float
+    decision: Optional[str]  # "H0", "H1" or None if max_pairs was reached first
+
+
+def run_match(
+    spec_a: str,
+    spec_b: str,
+    max_pairs: int = 1000,
+    workers: Optional[int] = None,
+    elo0: float = 0.0,
+    elo1: float = 10.0,
+    alpha: float = 0.05,
+    beta: float = 0.05,
+    seed: int = 0,
+    winning_score: int = 12,
+    beginner_mode: bool = False,
+    report_every: int = 0,
+) -> MatchResult:
+    """Play up to max_pairs mirrored pairs, stopping early once the SPRT decides."""
+    make_agent(spec_a), make_agent(spec_b)  # fail fast on bad specs
+    lower, upper = sprt_bounds(alpha, beta)
+    stats = MatchStats()
+    llr, decision = 0.0, None
+    workers = workers or os.cpu_count() or 1
+    next_pair = 0
+    pending: set[Future[float]] = set()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while decision is None and (pending or next_pair < max_pairs):
+            while next_pair < max_pairs and len(pending) < 2 * workers:
+                pending.add(
+                    executor.submit(
+                        play_pair, spec_a, spec_b, seed * 1_000_003 + next_pair,
+                        winning_score, beginner_mode,
+                    )
+                )
+                next_pair += 1
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                stats.add(future.result())
+                llr = stats.llr(elo0, elo1)
+                if report_every and stats.pairs % report_every == 0:
+                    _report(stats, llr, lower, upper, sys.stderr)
+                if llr <= lower:
+                    decision = "H0"
+                elif llr >= upper:
+                    decision = "H1"
+                if decision is not None:
+                    break
+        for future in pending:
+            future.cancel()
+    return MatchResult(stats, llr, decision)
+
+
+def _report(stats: MatchStats, llr: float, lower: float, upper: float, out) -> None:
+    low, elo, high = stats.elo()
+    counts = stats.pair_counts
+    print(
+        f"pairs {stats.pairs:>6}  A-B pairs +{counts[1.0]} ={counts[0.5]} -{counts[0.0]}  "
+        f"elo {elo:+7.1f} [{low:+.1f}, {high:+.1f}]  "
+        f"LLR {llr:+.2f} ({lower:+.2f}, {upper:+.2f})",
+        file=out,
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Play two agents against each other")
+    parser.add_argument("agent_a", help='agent spec, e.g. "alphabeta:time=0.05"')
+    parser.add_argument("agent_b")
+    parser.add_argument("--pairs", type=int, default=1000, help="maximum mirrored pairs")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--elo0", type=float, default=0.0)
+    parser.add_argument("--elo1", type=float, default=10.0)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--beginner", action="store_true", help="1 VP per battle")
+    parser.add_argument(
+        "--winning-score", type=int, default=None, help="default 12, or 3 with --beginner"
+    )
+    parser.add_argument("--report-every", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    result = run_match(
+        args.agent_a, args.agent_b,
+        max_pairs=args.pairs, workers=args.workers,
+        elo0=args.elo0, elo1=args.elo1, alpha=args.alpha, beta=args.beta,
+        seed=args.seed,
+        winning_score=args.winning_score or (3 if args.beginner else 12),
+        beginner_mode=args.beginner, report_every=args.report_every,
+    )
+    lower, upper = sprt_bounds(args.alpha, args.beta)
+    _report(result.stats, result.llr, lower, upper, sys.stdout)
+    if result.decision == "H1":
+        print(f"SPRT: accept H1 (A is at least {args.elo1:+g} Elo stronger)")
+    elif result.decision == "H0":
+        print(f"SPRT: accept H0 (A is not stronger than {args.elo0:+g} Elo)")
+    else:
+        print("SPRT: inconclusive")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,339 @@
+"""Bayesian beliefs about the cards one player cannot see.
+
+From the observer's point of view the hidden cards are the opponent's
+hand, the deck and the opponent's facedown cards. `BeliefState` keeps a
+weighted set of particles; each particle is a complete BattleState (a
+determinization) that agrees with everything the observer has seen.
+Particles are forks, so they share every unchanged object.
+
+`observe(move, battle_state)` advances every particle by the same public
+move. When the observer cannot see which card was played (an opponent's
+improvise), each particle picks one of its own hand cards in proportion to
+an opponent model, and its weight is multiplied by the model's probability
+of the public action. A particle whose public view no longer matches the
+real battle gets weight zero. Particles are resampled when the effective
+sample size falls below a threshold.
+
+If every particle is ruled out by a card the opponent deploys, each
+particle is repaired by swapping that card into its hand. If that fails
+too, the particles are re-dealt uniformly from the current public view
+(which forgets anything learned about facedown cards earlier on).
+
+    belief = BeliefState(battle, observer_id=0, particles=256, seed=1)
+    ...
+    apply_move(battle, move)
+    belief.observe(move, battle)
+    world = belief.sample()  # a full BattleState to search
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import fields
+from typing import Any, Callable, Optional
+
+from als import instrumentation
+from als.card_instance import CardInstance
+from als.card_registry import CARD_STRENGTH
+from als.engine import Move, apply_move, current_player, legal_moves, opponent_of
+from als.enums import TurnAction
+from als.game_state import BattleState, mask_ids
+from als.serialization import battle_from_dict, battle_to_dict
+
+# Unnormalized probabilities of `moves` for the player to act in a state.
+OpponentModel = Callable[[BattleState, list[Move]], list[float]]
+
+
+class SoftmaxOpponentModel:
+    """Cheap opponent model: a softmax over card-strength features.
+
+    Strong cards are more likely to be deployed faceup than improvised, and
+    withdrawing is more likely from a weak hand. Ability choices are uniform.
+    """
+
+    def __init__(self, temperature: float = 1.0, withdraw_bias: float = -2.0) -> None:
+        self.temperature = temperature
+        self.withdraw_bias = withdraw_bias
+
+    def __call__(self, battle_state: BattleState, moves: list[Move]) -> list[float]:
+        hand = battle_state.players[current_player(battle_state)].hand_cards
+        mean_strength = sum(CARD_STRENGTH[c.card_id] for c in hand) / len(hand) if hand else 0.0
+        weights = []
+        for move in moves:
+            if move.is_ability_choice:
+                score = 0.0
+            elif move.action == TurnAction.WITHDRAW:
+                score = self.withdraw_bias - mean_strength / 2.0
+            else:
+                assert move.card_id is not None
+                strength = CARD_STRENGTH[move.card_id]
+                if move.action == TurnAction.DEPLOY:
+                    score = strength / 2.0
+                else:
+                    score = 1.0 - strength / 4.0
+            weights.append(math.exp(score / self.temperature))
+        return weights
+
+
+# --- Public information ---
+
+def _visible(card: CardInstance, observer_id: int) -> bool:
+    return card.is_faceup or card.owner == observer_id
+
+
+def public_view(battle_state: BattleState, observer_id: int) -> tuple:
+    """Everything about the position that the observer can see."""
+    bs = battle_state
+    pids = sorted(bs.players)
+    board = tuple(
+        tuple(
+            tuple(
+                (card.card_id if _visible(card, observer_id) else -1, card.is_faceup)
+                for card in theater.stacks[pid]._cards
+            )
+            if pid in theater.stacks
+            else ()
+            for pid in pids
+        )
+        for theater in sorted(bs.theaters, key=lambda t: t.position.index)
+    )
+    players = tuple(
+        (
+            pid,
+            (
+                tuple(mask_ids(bs.players[pid].hand_mask))
+                if pid == observer_id
+                else bs.players[pid].cards_in_hand
+            ),
+            bs.players[pid].has_withdrawn,
+            bs.players[pid].air_drop_active,
+        )
+        for pid in pids
+    )
+    return (
+        board,
+        players,
+        bs.deck.size,
+        bs.active_player_id,
+        bs.phase,
+        tuple(bs.pending_abilities),
+        tuple(bs.extra_turns),
+    )
+
+
+def _visible_ids(bs: BattleState, observer_id: int) -> set[int]:
+    ids = set(bs.players[observer_id].hand_ids)
+    for theater in bs.theaters:
+        ids.update(c.card_id for c in theater.all_cards() if _visible(c, observer_id))
+    return ids
+
+
+def _card_token(bs: BattleState, card: CardInstance, observer_id: int) -> Any:
+    """A card's id if the observer can see it, else its place on the board."""
+    if _visible(card, observer_id) or card.theater_position is None:
+        return card.card_id
+    index = card.theater_position.index
+    assert card.owner is not None  # every card on the battlefield has one
+    stack = bs.get_theater_at_position(index).stacks[card.owner]
+    return ("at", index, card.owner, stack._cards.index(card))
+
+
+def move_signature(battle_state: BattleState, move: Move, observer_id: int) -> tuple:
+    """What the observer sees of `move`; equal for moves it cannot tell apart."""
+    if not move.is_ability_choice:
+        hidden = (
+            move.action == TurnAction.IMPROVISE and current_player(battle_state) != observer_id
+        )
+        return (move.action, None if hidden else move.card_id, move.theater_index)
+    choice = move.choice
+    if choice is None:
+        return (None,)
+    return (type(choice).__name__,) + tuple(
+        _card_token(battle_state, value, observer_id) if isinstance(value, CardInstance) else value
+        for value in (getattr(choice, f.name) for f in fields(choice))
+    )
+
+
+# --- Belief state ---
+
+class BeliefState:
+    """Weighted particles over the hidden cards, updated move by move."""
+
+    def __init__(
+        self,
+        battle_state: BattleState,
+        observer_id: int,
+        particles: int = 256,
+        model: Optional[OpponentModel] = None,
+        seed: Optional[int] = None,
+        resample_threshold: float = 0.5,
+    ) -> None:
+        self.observer_id = observer_id
+        self.size = particles
+        self.model: OpponentModel = model or SoftmaxOpponentModel()
+        self.rng = random.Random(seed)
+        self.resample_threshold = resample_threshold
+        self.redeals = 0  # times every particle was ruled out
+        self._particles: list[BattleState] = []
+        self._weights: list[float] = []
+        self._last = battle_state.fork()
+        self._deal(battle_state)
+
+    def _deal(self, battle_state: BattleState) -> None:
+        """Fill the particles uniformly from the public view of battle_state."""
+        data = battle_to_dict(battle_state)
+        opponent = str(opponent_of(battle_state, self.observer_id))
+        # (container, key) of every card_id the observer cannot see.
+        slots: list[tuple[Any, Any]] = []
+        hand = data["players"][opponent]["hand"]
+        slots += [(hand, i) for i in range(len(hand))]
+        slots += [(data["deck"], i) for i in range(len(data["deck"]))]
+        for theater in data["theaters"]:
+            for entry in theater["stacks"].get(opponent, []):
+                if not entry["faceup"]:
+                    slots.append((entry, "card_id"))
+        hidden = [container[key] for container, key in slots]
+        self._particles = []
+        for _ in range(self.size):
+            self.rng.shuffle(hidden)
+            for (container, key), card_id in zip(slots, hidden):
+                container[key] = card_id
+            self._particles.append(battle_from_dict(data))
+        self._weights = [1.0 / self.size] * self.size
+
+    # --- Updates ---
+
+    def observe(self, move: Move, battle_state: BattleState) -> None:
+        """Condition on `move`, which turned the previous position into battle_state."""
+        with instrumentation.phase("belief.observe"):
+            self._observe(move, battle_state)
+
+    def _observe(self, move: Move, battle_state: BattleState) -> None:
+        particles, weights = self._advance(move, battle_state, repair=False)
+        if sum(weights) == 0.0:
+            # Every particle was ruled out: retry, swapping the card that
+            # turned up into each particle's hand instead of discarding it.
+            particles, weights = self._advance(move, battle_state, repair=True)
+        self._last = battle_state.fork()
+        total = sum(weights)
+        if total == 0.0:
+            self.redeals += 1
+            self._deal(battle_state)
+            return
+        self._particles = particles
+        self._weights = [w / total for w in weights]
+        if self.effective_sample_size() < self.resample_threshold * self.size:
+            self._resample()
+
+    def _advance(
+        self, move: Move, battle_state: BattleState, repair: bool
+    ) -> tuple[list[BattleState], list[float]]:
+        before = self._last
+        observer = self.observer_id
+        actor = current_player(before)
+        hidden_play = (
+            not move.is_ability_choice
+            and move.action == TurnAction.IMPROVISE
+            and actor != observer
+        )
+        signature = move_signature(before, move, observer) if move.is_ability_choice else None
+        revealed = _visible_ids(battle_state, observer) - _visible_ids(before, observer)
+        view = public_view(battle_state, observer)
+        particles = list(self._particles)
+        weights = list(self._weights)
+
+        for i, particle in enumerate(particles):
+            if weights[i] == 0.0:
+                continue
+            particle = particle.fork()
+            # The deck's order is exchangeable: a card the observer just saw
+            # drawn from it may as well have been on top.
+            for card in particle.deck.cards:
+                if card.card_id in revealed:
+                    particle.put_on_top_of_deck(card)
+            if actor == observer and signature is None:
+                # The observer's own turn action is the same move in every particle.
+                candidates = [move]
+            else:
+                if repair and signature is None and not hidden_play:
+                    self._repair_hand(particle, actor, move.card_id)
+                legal = legal_moves(particle)
+                if hidden_play:
+                    candidates = [
+                        m for m in legal
+                        if m.action == TurnAction.IMPROVISE
+                        and m.theater_index == move.theater_index
+                    ]
+                elif signature is None:
+                    candidates = [m for m in legal if m == move]
+                else:
+                    candidates = [
+                        m for m in legal if move_signature(particle, m, observer) == signature
+                    ]
+                if not candidates:
+                    weights[i] = 0.0
+                    continue
+                probabilities = dict(zip(legal, self.model(particle, legal)))
+                candidate_weights = [probabilities[m] for m in candidates]
+                weights[i] *= sum(candidate_weights) / sum(probabilities.values())
+                if len(candidates) > 1:
+                    candidates = self.rng.choices(candidates, candidate_weights)
+            apply_move(particle, candidates[0])
+            if public_view(particle, observer) != view:
+                weights[i] = 0.0
+                continue
+            particles[i] = particle
+        return particles, weights
+
+    def _repair_hand(self, particle: BattleState, player_id: int, card_id: Optional[int]) -> None:
+        """Swap a hidden card into the player's hand in place of a random hand card."""
+        hand = particle.players[player_id].hand_cards
+        if card_id is None or not hand or any(c.card_id == card_id for c in hand):
+            return
+        card = particle.find_card(card_id)
+        if card is not None and not _visible(card, self.observer_id):
+            particle.swap_cards(card, self.rng.choice(hand))
+
+    def _resample(self) -> None:
+        """Systematic resampling to equal weights."""
+        n = self.size
+        step = 1.0 / n
+        position = self.rng.random() * step
+        cumulative = 0.0
+        chosen: list[BattleState] = []
+        i = 0
+        for particle, weight in zip(self._particles, self._weights):
+            cumulative += weight
+            while position < cumulative and i < n:
+                chosen.append(particle.fork())
+                position += step
+                i += 1
+        while len(chosen) < n:  # floating-point shortfall
+            chosen.append(self._particles[-1].fork())
+        self._particles = chosen
+        self._weights = [step] * n
+
+    # --- Queries ---
+
+    def effective_sample_size(self) -> float:
+        return 1.0 / sum(w * w for w in self._weights)
+
+    def sample(self) -> BattleState:
+        """A determinization drawn from the belief, safe to mutate."""
+        particle = self.rng.choices(self._particles, self._weights)[0]
+        return particle.fork()
+
+    def samples(self, count: int) -> list[BattleState]:
+        return [p.fork() for p in self.rng.choices(self._particles, self._weights, k=count)]
+
+    def hand_probabilities(self) -> dict[int, float]:
+        """P(card is in the opponent's hand) for every card that might be."""
+        probabilities: dict[int, float] = {}
+        for particle, weight in zip(self._particles, self._weights):
+            if weight == 0.0:
+                continue
+            opponent = opponent_of(particle, self.observer_id)
+            for card_id in particle.players[opponent].hand_order:
+                probabilities[card_id] = probabilities.get(card_id, 0.0) + weight
+        return dict(sorted(probabilities.items()))
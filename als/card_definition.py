@@ -31,6 +31,15 @@ class CardDefinition:
         if not 1 <= self.printed_strength <= 6:
             raise ValueError(f"printed_strength must be 1-6, got {self.printed_strength}")
 
+    def __reduce_ex__(self, protocol: int):  # type: ignore[override]
+        # The registry's definitions pickle (and deep-copy) as a lookup, so
+        # worker processes and copied states keep using the shared objects.
+        from als.card_registry import CARD_DEFINITIONS, get_card_definition
+
+        if CARD_DEFINITIONS[self.card_id] is self:
+            return (get_card_definition, (self.card_id,))
+        return super().__reduce_ex__(protocol)
+
     def __repr__(self) -> str:
         label = self.name if self.name else f"{self.theater_type.name} {self.printed_strength}"
         return f"CardDefinition({self.card_id}, {label!r})"
@@ -18,6 +18,20 @@ class CardInstance:
         self.zone = CardZone.DECK
         self.owner: Optional[int] = None
         self.theater_position: Optional[TheaterPosition] = None
+        # Token of the BattleState allowed to mutate this instance in place
+        # after a fork (see BattleState.fork). None means "not yet claimed".
+        self._cow_owner: Optional[object] = None
+
+    def _clone(self, owner: object) -> CardInstance:
+        """Shallow copy sharing the definition, claimed by `owner`."""
+        clone = CardInstance.__new__(CardInstance)
+        clone.definition = self.definition
+        clone.orientation = self.orientation
+        clone.zone = self.zone
+        clone.owner = self.owner
+        clone.theater_position = self.theater_position
+        clone._cow_owner = owner
+        return clone
 
     # --- Properties ---
 
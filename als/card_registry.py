@@ -1,7 +1,15 @@
-"""Factory for all 18 CardDefinition objects."""
+"""The 18 CardDefinition objects, built once at import time.
+
+Every game, battle and worker process shares the same definition (and
+ability) objects, so definitions can be compared by identity across states.
+The per-card attribute tuples are indexed by card_id for hot paths that
+should not go through the definition objects.
+"""
 
 from __future__ import annotations
 
+from typing import Optional
+
 from als.abilities_impl import (
     AerodromeAbility,
     AirDropAbility,
@@ -21,9 +29,8 @@ from als.card_definition import CardDefinition
 from als.enums import AbilityTiming, TheaterType
 
 
-def create_all_card_definitions() -> list[CardDefinition]:
-    """Create and return all 18 CardDefinition objects for Air, Land, and Sea."""
-    return [
+def _build_card_definitions() -> tuple[CardDefinition, ...]:
+    return (
         # --- AIR cards ---
         CardDefinition(
             card_id=0, name="Support", theater_type=TheaterType.AIR,
@@ -114,4 +121,27 @@ def create_all_card_definitions() -> list[CardDefinition]:
             card_id=17, name="", theater_type=TheaterType.SEA,
             printed_strength=6,
         ),
-    ]
+    )
+
+
+CARD_DEFINITIONS: tuple[CardDefinition, ...] = _build_card_definitions()
+
+# Per-card attributes indexed by card_id.
+CARD_STRENGTH: tuple[int, ...] = tuple(d.printed_strength for d in CARD_DEFINITIONS)
+CARD_THEATER: tuple[TheaterType, ...] = tuple(d.theater_type for d in CARD_DEFINITIONS)
+CARD_TIMING: tuple[Optional[AbilityTiming], ...] = tuple(
+    d.ability_timing for d in CARD_DEFINITIONS
+)
+CARD_IS_ONGOING: tuple[bool, ...] = tuple(
+    d.ability_timing == AbilityTiming.ONGOING for d in CARD_DEFINITIONS
+)
+
+
+def get_card_definition(card_id: int) -> CardDefinition:
+    """Return the shared CardDefinition for card_id (0-17)."""
+    return CARD_DEFINITIONS[card_id]
+
+
+def create_all_card_definitions() -> list[CardDefinition]:
+    """Return all 18 shared CardDefinition objects for Air, Land, and Sea."""
+    return list(CARD_DEFINITIONS)
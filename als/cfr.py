@@ -0,0 +1,486 @@
+"""Monte Carlo CFR over an abstraction of battle decisions.
+
+Withdrawing and bluffing with facedown cards depend on what the opponent
+cannot see, which the perfect-information searchers ignore. This module
+trains a strategy for those decisions with external-sampling MCCFR and
+regret matching+ (CFR+ regret flooring and iteration-weighted averaging).
+
+The abstraction keeps only what the acting player knows:
+
+- Information set: the player's seat; the VPs either player would concede
+  by withdrawing now (`VP_TABLE` for their seat and hand size, 4 buckets
+  each); how many cards of printed strength 4+ the player holds (0-3+);
+  and per theater, the player's strength minus the opponent's, in 5
+  buckets (<= -4, -3..-1, 0, 1..3, >= 4). Strengths on the board are
+  public, since facedown cards count 2 whoever owns them. That is
+  2 * 4 * 4 * 4 * 125 = 16,000 information sets.
+- Actions: WITHDRAW, DEPLOY (the best faceup play) and IMPROVISE (the best
+  facedown play), where "best" is `PriorityRollout`'s choice within the
+  action. Ability choices are not abstracted; both sides make them by
+  one-ply evaluation.
+
+Each iteration deals a random battle (`DealStream`) and traverses it once
+for each player. Iterations are split across worker processes in rounds;
+workers start from the same regrets and the master sums what they
+return, flooring regrets at zero again.
+
+Regrets and strategy sums live in flat `array('d')`s, INFOSETS * ACTIONS
+long, and are saved to a small binary file. A table loaded for play keeps
+only the average strategy as an `array('f')`, so a lookup is one index
+computation and three reads:
+
+    python -m als.cfr train cfr.bin --iterations 20000 --workers 8
+    python -m als.cfr info cfr.bin
+
+    agent = make_agent("cfr:path=cfr.bin")
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Sequence, Union
+
+from als import strength_calculator
+from als.card_registry import CARD_DEFINITIONS
+from als.deals import DealStream
+from als.engine import (
+    Move,
+    apply_move,
+    current_player,
+    is_terminal,
+    legal_moves,
+    opponent_of,
+    start_battle,
+)
+from als.enums import BattleEndReason, PlayerPosition, TheaterType, TurnAction
+from als.evaluation import best_one_ply, terminal_value
+from als.game_state import BattleState, GameState
+from als.hashing import mix64
+from als.rollouts import PriorityRollout
+from als.scoring import VP_TABLE, outcome_code
+
+WITHDRAW, DEPLOY, IMPROVISE = 0, 1, 2
+ACTIONS = 3
+ACTION_NAMES = ("WITHDRAW", "DEPLOY", "IMPROVISE")
+_TURN_ACTIONS = (TurnAction.WITHDRAW, TurnAction.DEPLOY, TurnAction.IMPROVISE)
+
+_SEATS = 2
+_COSTS = 4
+_STRONG_BUCKETS = 4
+_MARGINS = 5
+_BOARDS = _MARGINS ** 3
+INFOSETS = _SEATS * _COSTS * _COSTS * _STRONG_BUCKETS * _BOARDS
+
+# VPs conceded by a withdrawal (2, 3, 4 or 6; always 1 in beginner mode) -> bucket.
+_COST_BUCKET = {1: 0, 2: 0, 3: 1, 4: 2, 6: 3}
+# Strength margin clamped to -6..6 -> bucket.
+_MARGIN_BUCKET = tuple(
+    0 if d <= -4 else 1 if d < 0 else 2 if d == 0 else 3 if d < 4 else 4 for d in range(-6, 7)
+)
+_STRONG_MASK = sum(1 << i for i, d in enumerate(CARD_DEFINITIONS) if d.printed_strength >= 4)
+
+_MAGIC = b"ALSCFR01"
+_HEADER = struct.Struct("<8sIIIQ")  # magic, infosets, actions, beginner mode, iterations
+MAX_DECISIONS_PER_BATTLE = 1000
+
+
+def _withdraw_cost(battle_state: BattleState, player_id: int, beginner_mode: bool) -> int:
+    player = battle_state.players[player_id]
+    code = outcome_code(
+        BattleEndReason.WITHDRAWAL, player.position, player.cards_in_hand, beginner_mode
+    )
+    return _COST_BUCKET[VP_TABLE[code]]
+
+
+def infoset_index(battle_state: BattleState, player_id: int, beginner_mode: bool = False) -> int:
+    """Index of player_id's abstract information set, in range(INFOSETS)."""
+    player = battle_state.players[player_id]
+    opponent = opponent_of(battle_state, player_id)
+    index = int(player.position == PlayerPosition.SECOND)
+    index = index * _COSTS + _withdraw_cost(battle_state, player_id, beginner_mode)
+    index = index * _COSTS + _withdraw_cost(battle_state, opponent, beginner_mode)
+    strong = (player.hand_mask & _STRONG_MASK).bit_count()
+    index = index * _STRONG_BUCKETS + min(strong, _STRONG_BUCKETS - 1)
+    strengths = strength_calculator.calculate_all_strengths(battle_state)
+    board = 0
+    for theater_index in sorted(strengths):
+        by_player = strengths[theater_index]
+        margin = max(-6, min(6, by_player[player_id] - by_player[opponent]))
+        board = board * _MARGINS + _MARGIN_BUCKET[margin + 6]
+    return index * _BOARDS + board
+
+
+def abstract_moves(
+    battle_state: BattleState, moves: list[Move], rng: random.Random, policy: PriorityRollout
+) -> list[Optional[Move]]:
+    """The concrete move for each abstract action (None where it has no legal move)."""
+    concrete: list[Optional[Move]] = [None] * ACTIONS
+    for action in (DEPLOY, IMPROVISE):
+        of_kind = [m for m in moves if m.action == _TURN_ACTIONS[action]]
+        if of_kind:
+            concrete[action] = policy.best(battle_state, of_kind, rng)
+    concrete[WITHDRAW] = next(m for m in moves if m.action == TurnAction.WITHDRAW)
+    return concrete
+
+
+def greedy_choice(
+    battle_state: BattleState, moves: list[Move], beginner_mode: bool = False
+) -> Move:
+    """The move with the best one-ply value for the player to act."""
+    if len(moves) == 1:
+        return moves[0]
+    best, _ = best_one_ply(battle_state, moves, beginner_mode=beginner_mode)
+    assert best is not None
+    return best
+
+
+def _normalize(weights: Sequence[float], legal: Sequence[bool]) -> list[float]:
+    """weights restricted to the legal actions and scaled to sum 1 (uniform if all zero)."""
+    masked = [w if ok and w > 0.0 else 0.0 for w, ok in zip(weights, legal)]
+    total = sum(masked)
+    if total > 0.0:
+        return [w / total for w in masked]
+    count = sum(legal)
+    return [1.0 / count if ok else 0.0 for ok in legal]
+
+
+class CFRTable:
+    """Cumulative regrets and strategy sums for every (information set, action)."""
+
+    def __init__(
+        self,
+        beginner_mode: bool = False,
+        regrets: Optional[array] = None,
+        strategy_sums: Optional[array] = None,
+        iterations: int = 0,
+    ) -> None:
+        size = INFOSETS * ACTIONS
+        self.beginner_mode = beginner_mode
+        self.regrets = regrets if regrets is not None else array("d", bytes(8 * size))
+        self.strategy_sums = (
+            strategy_sums if strategy_sums is not None else array("d", bytes(8 * size))
+        )
+        if len(self.regrets) != size or len(self.strategy_sums) != size:
+            raise ValueError("Table arrays do not match the abstraction size")
+        self.iterations = iterations
+
+    # --- Strategies ---
+
+    def current_strategy(self, index: int, legal: Sequence[bool]) -> list[float]:
+        """Regret matching over the legal actions of an information set."""
+        base = index * ACTIONS
+        return _normalize(self.regrets[base:base + ACTIONS], legal)
+
+    def average_strategy(
+        self, index: int, legal: Sequence[bool] = (True,) * ACTIONS
+    ) -> list[float]:
+        base = index * ACTIONS
+        return _normalize(self.strategy_sums[base:base + ACTIONS], legal)
+
+    def policy(self) -> CFRPolicy:
+        """The average strategy as a compact table for play."""
+        probabilities = array("f", bytes(4 * INFOSETS * ACTIONS))
+        visited = bytearray(INFOSETS)
+        sums = self.strategy_sums
+        for index in range(INFOSETS):
+            base = index * ACTIONS
+            total = sum(sums[base:base + ACTIONS])
+            if total > 0.0:
+                visited[index] = 1
+                for action in range(ACTIONS):
+                    probabilities[base + action] = sums[base + action] / total
+        return CFRPolicy(probabilities, visited, self.beginner_mode)
+
+    # --- Training ---
+
+    def traverse(
+        self,
+        battle_state: BattleState,
+        traverser: int,
+        weight: float,
+        rng: random.Random,
+        policy: PriorityRollout,
+    ) -> float:
+        """One external-sampling pass; returns traverser's value of battle_state.
+
+        Every abstract action of the traverser is explored and its regrets
+        updated. The opponent's actions and ability choices are sampled,
+        and the opponent's strategy is added to the strategy sums.
+        """
+        bs = battle_state
+        for _ in range(MAX_DECISIONS_PER_BATTLE):
+            if is_terminal(bs):
+                return terminal_value(bs, traverser, self.beginner_mode)
+            moves = legal_moves(bs)
+            if moves[0].is_ability_choice:
+                move = greedy_choice(bs, moves, self.beginner_mode)
+                bs = bs.fork()
+                apply_move(bs, move)
+                continue
+            player = current_player(bs)
+            index = infoset_index(bs, player, self.beginner_mode)
+            concrete = abstract_moves(bs, moves, rng, policy)
+            legal = [m is not None for m in concrete]
+            strategy = self.current_strategy(index, legal)
+            base = index * ACTIONS
+            if player != traverser:
+                for action in range(ACTIONS):
+                    self.strategy_sums[base + action] += weight * strategy[action]
+                action = rng.choices(range(ACTIONS), strategy)[0]
+                bs = bs.fork()
+                apply_move(bs, concrete[action])  # type: ignore[arg-type]
+                continue
+            values = [0.0] * ACTIONS
+            node_value = 0.0
+            for action, candidate in enumerate(concrete):
+                if candidate is None:
+                    continue
+                child = bs.fork()
+                apply_move(child, candidate)
+                values[action] = self.traverse(child, traverser, weight, rng, policy)
+                node_value += strategy[action] * values[action]
+            for action in range(ACTIONS):
+                if legal[action]:
+                    regret = self.regrets[base + action] + values[action] - node_value
+                    self.regrets[base + action] = regret if regret > 0.0 else 0.0
+            return node_value
+        raise RuntimeError(f"Battle exceeded {MAX_DECISIONS_PER_BATTLE} decisions")
+
+    def run_iterations(self, seed: int, start: int, count: int) -> None:
+        """Iterations start..start+count-1 of a seed's training schedule.
+
+        Iteration t deals deal t of `DealStream(seed)` with a theater order
+        drawn from (seed, t), and weighs its strategy by t + 1.
+        """
+        policy = PriorityRollout(epsilon=0.0)
+        stream = DealStream(seed)
+        for t in range(start, start + count):
+            rng = random.Random(mix64(seed * 0x100000001 + t))
+            order = list(TheaterType)
+            rng.shuffle(order)
+            game = GameState((0, 1), first_player_id=0)
+            game.theater_order = order
+            battle = start_battle(game, list(stream.deal_at(t)))
+            for traverser in (0, 1):
+                self.traverse(battle, traverser, float(t + 1), rng, policy)
+        self.iterations = max(self.iterations, start + count)
+
+    def visited(self) -> int:
+        """Number of information sets with a non-zero strategy sum."""
+        sums = self.strategy_sums
+        return sum(
+            1 for base in range(0, INFOSETS * ACTIONS, ACTIONS)
+            if sum(sums[base:base + ACTIONS]) > 0.0
+        )
+
+    # --- Persistence ---
+
+    def save(self, path: Union[str, Path]) -> None:
+        with open(path, "wb") as f:
+            f.write(
+                _HEADER.pack(
+                    _MAGIC, INFOSETS, ACTIONS, int(self.beginner_mode), self.iterations
+                )
+            )
+            self.regrets.tofile(f)
+            self.strategy_sums.tofile(f)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> CFRTable:
+        with open(path, "rb") as f:
+            magic, infosets, actions, beginner, iterations = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError(f"{path} is not a CFR table")
+            if (infosets, actions) != (INFOSETS, ACTIONS):
+                raise ValueError(f"{path} was trained with a different abstraction")
+            regrets = array("d")
+            regrets.fromfile(f, infosets * actions)
+            strategy_sums = array("d")
+            strategy_sums.fromfile(f, infosets * actions)
+        return cls(bool(beginner), regrets, strategy_sums, iterations)
+
+
+@functools.lru_cache(maxsize=8)
+def load_policy(path: str) -> CFRPolicy:
+    """CFRPolicy.load, cached so agents rebuilt per battle share one table."""
+    return CFRPolicy.load(path)
+
+
+class CFRPolicy:
+    """Average-strategy probabilities for play, INFOSETS * ACTIONS floats."""
+
+    def __init__(
+        self, probabilities: array, visited: bytearray, beginner_mode: bool = False
+    ) -> None:
+        self.probabilities = probabilities
+        self.visited = visited
+        self.beginner_mode = beginner_mode
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> CFRPolicy:
+        return CFRTable.load(path).policy()
+
+    def action_probabilities(self, index: int, legal: Sequence[bool]) -> Optional[list[float]]:
+        """Probabilities of the legal abstract actions; None for a set training never reached."""
+        if not self.visited[index]:
+            return None
+        base = index * ACTIONS
+        return _normalize(self.probabilities[base:base + ACTIONS], legal)
+
+    def probabilities_for(self, battle_state: BattleState, player_id: int) -> Optional[list[float]]:
+        """Abstract action probabilities for player_id, assuming every action is legal."""
+        index = infoset_index(battle_state, player_id, self.beginner_mode)
+        return self.action_probabilities(index, (True,) * ACTIONS)
+
+
+# --- Parallel training ---
+
+
+def _train_chunk(
+    regrets: bytes, beginner_mode: bool, seed: int, start: int, count: int
+) -> tuple[bytes, bytes]:
+    """Worker entry point: run iterations from shared regrets.
+
+    Returns (regret changes, strategy sums) for the master to add up.
+    """
+    before = array("d")
+    before.frombytes(regrets)
+    table = CFRTable(beginner_mode, array("d", before))
+    table.run_iterations(seed, start, count)
+    delta = array("d", (after - b for after, b in zip(table.regrets, before)))
+    return delta.tobytes(), table.strategy_sums.tobytes()
+
+
+def train(
+    table: CFRTable,
+    iterations: int,
+    workers: int = 1,
+    round_size: int = 64,
+    seed: int = 0,
+    report_every: float = 10.0,
+) -> None:
+    """Run `iterations` more iterations, `round_size` per worker per round.
+
+    Within a round every worker samples from the regrets at the start of
+    the round; a larger round means fewer merges but staler strategies.
+    """
+    done = 0
+    started = last_report = time.monotonic()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while done < iterations:
+            chunk = min(round_size, -(-(iterations - done) // workers))
+            futures = []
+            start = table.iterations
+            for _ in range(workers):
+                count = min(chunk, iterations - done)
+                if count <= 0:
+                    break
+                futures.append(executor.submit(
+                    _train_chunk, table.regrets.tobytes(), table.beginner_mode, seed, start, count,
+                ))
+                start += count
+                done += count
+            regrets, sums = table.regrets, table.strategy_sums
+            for future in futures:
+                delta_bytes, sums_bytes = future.result()
+                delta, chunk_sums = array("d"), array("d")
+                delta.frombytes(delta_bytes)
+                chunk_sums.frombytes(sums_bytes)
+                for i, d in enumerate(delta):
+                    if d:
+                        regrets[i] += d
+                for i, s in enumerate(chunk_sums):
+                    if s:
+                        sums[i] += s
+            for i, r in enumerate(regrets):
+                if r < 0.0:
+                    regrets[i] = 0.0
+            table.iterations = start
+            now = time.monotonic()
+            if report_every and now - last_report >= report_every:
+                last_report = now
+                print(
+                    f"{done}/{iterations} iterations, {done / (now - started):.1f}/s, "
+                    f"{table.visited()} information sets visited",
+                    file=sys.stderr,
+                )
+
+
+def describe(index: int) -> str:
+    """Human-readable form of an information set index."""
+    index, board = divmod(index, _BOARDS)
+    index, strong = divmod(index, _STRONG_BUCKETS)
+    index, opp_cost = divmod(index, _COSTS)
+    seat, my_cost = divmod(index, _COSTS)
+    margins = []
+    for _ in range(3):
+        board, bucket = divmod(board, _MARGINS)
+        margins.append(("<=-4", "-3..-1", "0", "1..3", ">=4")[bucket])
+    return (
+        f"{('1st', '2nd')[seat]} seat, withdraw costs me/them bucket {my_cost}/{opp_cost}, "
+        f"{strong}{'+' if strong == _STRONG_BUCKETS - 1 else ''} strong cards, "
+        f"margins {'/'.join(reversed(margins))}"
+    )
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Train or inspect a CFR strategy table")
+    commands = parser.add_subparsers(dest="command", required=True)
+    train_parser = commands.add_parser("train", help="train (or keep training) a table")
+    train_parser.add_argument("table", type=Path)
+    train_parser.add_argument("--iterations", type=int, default=1000)
+    train_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    train_parser.add_argument(
+        "--round-size", type=int, default=64, help="iterations per worker per round"
+    )
+    train_parser.add_argument("--seed", type=int, default=0)
+    train_parser.add_argument("--beginner", action="store_true", help="score every battle 1 VP")
+    train_parser.add_argument("--report-every", type=float, default=10.0, help="seconds")
+    info_parser = commands.add_parser("info", help="summarize a table")
+    info_parser.add_argument("table", type=Path)
+    info_parser.add_argument("--top", type=int, default=10, help="most-trained sets to show")
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        if args.table.exists():
+            table = CFRTable.load(args.table)
+            if table.beginner_mode != args.beginner:
+                parser.error(f"{args.table} was trained with beginner mode {table.beginner_mode}")
+        else:
+            table = CFRTable(args.beginner)
+        try:
+            train(
+                table, args.iterations, args.workers, args.round_size, args.seed,
+                args.report_every,
+            )
+        finally:
+            table.save(args.table)
+        print(f"{table.iterations} iterations, {table.visited()} information sets visited")
+        return
+
+    table = CFRTable.load(args.table)
+    print(
+        f"{table.iterations} iterations, beginner mode {table.beginner_mode}, "
+        f"{table.visited()}/{INFOSETS} information sets visited"
+    )
+    sums = table.strategy_sums
+    totals = sorted(
+        range(INFOSETS), key=lambda i: -sum(sums[i * ACTIONS:(i + 1) * ACTIONS])
+    )
+    for index in totals[:args.top]:
+        probabilities = table.average_strategy(index)
+        shown = ", ".join(f"{name} {p:.2f}" for name, p in zip(ACTION_NAMES, probabilities))
+        print(f"{describe(index)}: {shown}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,471 @@
+"""Offline database of the value of every starting deal.
+
+A deal is the 1st player's hand (6 of the 18 cards) and the 2nd player's
+hand (6 of the remaining 12); the other 6 cards form the deck, whose order
+is hidden and averaged over. For a fixed theater order there are
+C(18,6) * C(12,6) = 17,153,136 deals. Every card is distinct, so beyond the
+theater order (one database per order) there is no symmetry to reduce by;
+the job is sharded and resumable instead.
+
+Deals are indexed by combinatorial rank:
+
+    rank(1st hand) * 924 + rank(2nd hand among the 12 remaining cards)
+
+A database is a directory holding `meta.json`, `deals.f32` (one float32 per
+deal: expected battle VPs for the 1st player, NaN until evaluated),
+`done.bin` (one byte per 1st-player hand, set once its 924 deals are
+written) and, after aggregation, `hands.f32` (expected VPs for a hand's
+owner as 1st player, then as 2nd player). Lookups memory-map these files.
+
+    python -m als.deal_equity build deals/ --evaluator "playout:agent=greedy,playouts=8"
+    python -m als.deal_equity build deals/ --shard 3/16   # one of 16 machines
+    python -m als.deal_equity aggregate deals/
+    python -m als.deal_equity lookup deals/ 0,3,7,9,12,15 --position SECOND
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import mmap
+import random
+import sys
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Optional, Sequence, Union
+
+from als.agents import make_agent, parse_spec
+from als.alphabeta import AlphaBetaSearcher
+from als.engine import apply_move, current_player, is_terminal, start_battle
+from als.enums import BattleEndReason, PlayerPosition, TheaterType
+from als.game_state import BattleState, GameState
+from als.scoring import calculate_vps, pack_terminal, score_batch
+
+HAND_SIZE = 6
+CARDS = 18
+FIRST_HANDS = math.comb(CARDS, HAND_SIZE)  # 18,564
+SECOND_HANDS = math.comb(CARDS - HAND_SIZE, HAND_SIZE)  # 924
+DEALS = FIRST_HANDS * SECOND_HANDS
+# Guards against ability loops in playouts (as in als.arena).
+MAX_DECISIONS_PER_BATTLE = 1000
+
+_COMB = [[math.comb(n, k) for k in range(HAND_SIZE + 1)] for n in range(CARDS + 1)]
+_FLOAT = 4
+
+
+# --- Ranking ---
+
+def hand_rank(cards: Iterable[int]) -> int:
+    """Colex rank of a 6-card subset: the sum of C(card, i+1) over the sorted cards."""
+    return sum(_COMB[c][i + 1] for i, c in enumerate(sorted(cards)))
+
+
+def hand_unrank(rank: int) -> list[int]:
+    """Inverse of hand_rank."""
+    cards = []
+    for k in range(HAND_SIZE, 0, -1):
+        c = k - 1
+        while _COMB[c + 1][k] <= rank:
+            c += 1
+        rank -= _COMB[c][k]
+        cards.append(c)
+    return cards[::-1]
+
+
+# 2nd-player hands as positions among the 12 cards left after the 1st hand.
+_LOCAL_HANDS = [hand_unrank(r) for r in range(SECOND_HANDS)]
+
+
+def deal_index(first_hand: Iterable[int], second_hand: Iterable[int]) -> int:
+    first = sorted(first_hand)
+    rest = [c for c in range(CARDS) if c not in first]
+    return hand_rank(first) * SECOND_HANDS + hand_rank(rest.index(c) for c in second_hand)
+
+
+def deal_from_index(index: int) -> list[int]:
+    """The deal as 18 card_ids: 1st hand, 2nd hand, then the deck."""
+    first_rank, local_rank = divmod(index, SECOND_HANDS)
+    first = hand_unrank(first_rank)
+    rest = [c for c in range(CARDS) if c not in first]
+    second = [rest[i] for i in _LOCAL_HANDS[local_rank]]
+    return first + second + [c for c in rest if c not in second]
+
+
+def deal_battle(deal: Sequence[int], theater_order: Sequence[TheaterType]) -> BattleState:
+    """Start a battle from a deal; player 0 is the 1st player."""
+    game = GameState((0, 1), first_player_id=0)
+    game.theater_order = list(theater_order)
+    return start_battle(game, deal)
+
+
+# --- Evaluators ---
+
+# (deal, theater order, rng) -> expected battle VPs for the 1st player.
+DealEvaluator = Callable[[Sequence[int], Sequence[TheaterType], random.Random], float]
+
+
+class PlayoutEvaluator:
+    """Average result of self-play battles, reshuffling the deck for each one.
+
+    Agents are rebuilt for every deal, so seeded agent specs give the same
+    value for a deal whichever worker evaluates it.
+    """
+
+    def __init__(self, agent: str = "greedy", playouts: int = 8, beginner: bool = False) -> None:
+        make_agent(agent)  # fail fast on bad specs
+        self.agent = agent
+        self.playouts = playouts
+        self.beginner_mode = bool(beginner)
+
+    def __call__(
+        self, deal: Sequence[int], theater_order: Sequence[TheaterType], rng: random.Random
+    ) -> float:
+        agents = {0: make_agent(self.agent), 1: make_agent(self.agent)}
+        strengths: array = array("h")
+        codes: array = array("B")
+        for _ in range(self.playouts):
+            deck = list(deal[2 * HAND_SIZE:])
+            rng.shuffle(deck)
+            battle = deal_battle(list(deal[:2 * HAND_SIZE]) + deck, theater_order)
+            for agent in agents.values():
+                agent.reset()
+            for _ in range(MAX_DECISIONS_PER_BATTLE):
+                if is_terminal(battle):
+                    break
+                apply_move(battle, agents[current_player(battle)].select_move(battle))
+            else:
+                raise RuntimeError(f"Battle exceeded {MAX_DECISIONS_PER_BATTLE} decisions")
+            packed, code = pack_terminal(battle, self.beginner_mode)
+            strengths.extend(packed)
+            codes.append(code)
+        # Player 0 is always the 1st player in deal_battle.
+        first_wins, vps = score_batch(strengths, codes)
+        total = sum(v if won else -v for won, v in zip(first_wins, vps))
+        return total / self.playouts
+
+
+class SearchEvaluator:
+    """Alpha-beta/expectimax value of the opening position for the 1st player."""
+
+    def __init__(self, time: float = 0.05, depth: int = 64) -> None:
+        self.time_limit = time
+        self.depth = depth
+
+    def __call__(
+        self, deal: Sequence[int], theater_order: Sequence[TheaterType], rng: random.Random
+    ) -> float:
+        searcher = AlphaBetaSearcher(max_depth=self.depth)
+        battle = deal_battle(deal, theater_order)
+        return searcher.search(battle, time_limit=self.time_limit, player_id=0).value
+
+
+EVALUATORS: dict[str, Callable[..., DealEvaluator]] = {
+    "playout": PlayoutEvaluator,
+    "search": SearchEvaluator,
+}
+
+
+def make_evaluator(spec: str) -> DealEvaluator:
+    """Build an evaluator from e.g. "playout:agent=greedy,playouts=8" or "search:time=0.05"."""
+    name, kwargs = parse_spec(spec)
+    if name not in EVALUATORS:
+        raise ValueError(f"Unknown evaluator {name!r}; choose from {sorted(EVALUATORS)}")
+    return EVALUATORS[name](**kwargs)
+
+
+# --- Building ---
+
+def _paths(directory: Path) -> tuple[Path, Path, Path, Path]:
+    return (
+        directory / "meta.json",
+        directory / "deals.f32",
+        directory / "done.bin",
+        directory / "hands.f32",
+    )
+
+
+def _check_byte_order() -> None:
+    if sys.byteorder != "little":
+        raise RuntimeError("Deal equity files are little-endian float32")
+
+
+def create_database(
+    directory: Union[str, Path],
+    theater_order: Sequence[TheaterType],
+    evaluator: str,
+    seed: int = 0,
+) -> dict:
+    """Create an empty database, or return the metadata of an existing one.
+
+    Resuming with a different theater order, evaluator or seed is an error,
+    since it would mix incomparable values.
+    """
+    _check_byte_order()
+    directory = Path(directory)
+    meta_path, deals_path, done_path, _ = _paths(directory)
+    meta = {
+        "theater_order": [t.name for t in theater_order],
+        "evaluator": evaluator,
+        "seed": seed,
+        "deals": DEALS,
+    }
+    if meta_path.exists():
+        existing = json.loads(meta_path.read_text())
+        if existing != meta:
+            raise ValueError(f"{directory} was built with different settings: {existing}")
+        return existing
+    directory.mkdir(parents=True, exist_ok=True)
+    empty = array("f", [math.nan]) * SECOND_HANDS
+    with open(deals_path, "wb") as f:
+        for _ in range(FIRST_HANDS):
+            empty.tofile(f)
+    done_path.write_bytes(bytes(FIRST_HANDS))
+    meta_path.write_text(json.dumps(meta, indent=2))
+    return meta
+
+
+_worker_evaluators: dict[str, DealEvaluator] = {}
+
+
+def evaluate_first_hands(
+    directory: str, first_ranks: list[int], evaluator: str, theater_order: list[str], seed: int
+) -> int:
+    """Worker entry point: evaluate and store every deal for some 1st-player hands."""
+    if evaluator not in _worker_evaluators:
+        _worker_evaluators[evaluator] = make_evaluator(evaluator)
+    evaluate = _worker_evaluators[evaluator]
+    order = [TheaterType[name] for name in theater_order]
+    _, deals_path, done_path, _ = _paths(Path(directory))
+    with open(deals_path, "r+b") as deals_file, open(done_path, "r+b") as done_file:
+        for first_rank in first_ranks:
+            values = array("f")
+            base = first_rank * SECOND_HANDS
+            for local_rank in range(SECOND_HANDS):
+                index = base + local_rank
+                deal = deal_from_index(index)
+                values.append(evaluate(deal, order, random.Random(seed * DEALS + index)))
+            deals_file.seek(base * _FLOAT)
+            values.tofile(deals_file)
+            deals_file.flush()
+            # Mark the hand done only once its values are on disk.
+            done_file.seek(first_rank)
+            done_file.write(b"\x01")
+            done_file.flush()
+    return len(first_ranks) * SECOND_HANDS
+
+
+def build(
+    directory: Union[str, Path],
+    evaluator: str = "playout",
+    theater_order: Sequence[TheaterType] = (TheaterType.AIR, TheaterType.LAND, TheaterType.SEA),
+    workers: int = 1,
+    shard: tuple[int, int] = (0, 1),
+    seed: int = 0,
+    batch: int = 4,
+    limit: Optional[int] = None,
+    report_every: float = 10.0,
+) -> int:
+    """Evaluate this shard's unfinished 1st-player hands; returns deals evaluated.
+
+    Shard (k, n) owns the hands whose rank is k modulo n. `limit` caps the
+    number of hands processed in this run.
+    """
+    directory = Path(directory)
+    make_evaluator(evaluator)  # fail fast on bad specs
+    meta = create_database(directory, theater_order, evaluator, seed)
+    _, _, done_path, _ = _paths(directory)
+    done = done_path.read_bytes()
+    k, n = shard
+    todo = [r for r in range(k, FIRST_HANDS, n) if not done[r]]
+    if limit is not None:
+        todo = todo[:limit]
+    batches = [todo[i:i + batch] for i in range(0, len(todo), batch)]
+
+    evaluated = 0
+    started = last_report = time.monotonic()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                evaluate_first_hands, str(directory), ranks, evaluator,
+                meta["theater_order"], seed,
+            )
+            for ranks in batches
+        ]
+        for future in as_completed(futures):
+            evaluated += future.result()
+            now = time.monotonic()
+            if report_every and now - last_report >= report_every:
+                last_report = now
+                rate = evaluated / (now - started)
+                remaining = len(todo) * SECOND_HANDS - evaluated
+                print(
+                    f"{evaluated} deals, {rate:.0f}/s, ~{remaining / rate / 3600:.1f}h left",
+                    file=sys.stderr,
+                )
+    return evaluated
+
+
+def aggregate(directory: Union[str, Path]) -> int:
+    """Write per-hand expected VPs from the evaluated deals; returns deals used.
+
+    Deals not evaluated yet are skipped, so a partial database gives
+    estimates from the deals done so far.
+    """
+    _check_byte_order()
+    _, deals_path, _, hands_path = _paths(Path(directory))
+    sums = [[0.0] * FIRST_HANDS, [0.0] * FIRST_HANDS]
+    counts = [[0] * FIRST_HANDS, [0] * FIRST_HANDS]
+    used = 0
+    with open(deals_path, "rb") as f:
+        for first_rank in range(FIRST_HANDS):
+            values = array("f")
+            values.fromfile(f, SECOND_HANDS)
+            first = hand_unrank(first_rank)
+            rest = [c for c in range(CARDS) if c not in first]
+            for local, value in zip(_LOCAL_HANDS, values):
+                if math.isnan(value):
+                    continue
+                used += 1
+                sums[0][first_rank] += value
+                counts[0][first_rank] += 1
+                second_rank = sum(_COMB[rest[i]][j + 1] for j, i in enumerate(local))
+                sums[1][second_rank] -= value
+                counts[1][second_rank] += 1
+    hands = array("f", (
+        s / c if c else math.nan
+        for position in (0, 1)
+        for s, c in zip(sums[position], counts[position])
+    ))
+    with open(hands_path, "wb") as f:
+        hands.tofile(f)
+    return used
+
+
+# --- Lookup ---
+
+class DealEquityDB:
+    """Read-only, memory-mapped access to a deal equity database."""
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        _check_byte_order()
+        meta_path, deals_path, _, hands_path = _paths(Path(directory))
+        self.meta = json.loads(meta_path.read_text())
+        self.theater_order = [TheaterType[name] for name in self.meta["theater_order"]]
+        self._files: list[BinaryIO] = []
+        self._deals = self._map(deals_path)
+        self._hands = self._map(hands_path) if hands_path.exists() else None
+
+    def _map(self, path: Path) -> memoryview[float]:
+        f = open(path, "rb")
+        self._files.append(f)
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast("f")
+
+    def close(self) -> None:
+        self._deals.release()
+        if self._hands is not None:
+            self._hands.release()
+        for f in self._files:
+            f.close()
+
+    def __enter__(self) -> DealEquityDB:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def deal_value(self, first_hand: Iterable[int], second_hand: Iterable[int]) -> float:
+        """Expected battle VPs for the 1st player (NaN if not evaluated)."""
+        return self._deals[deal_index(first_hand, second_hand)]
+
+    def expected_vps(self, hand: Iterable[int], position: PlayerPosition) -> float:
+        """Expected battle VPs for the owner of `hand`, averaged over unseen cards."""
+        if self._hands is None:
+            raise ValueError("Database has not been aggregated")
+        offset = 0 if position == PlayerPosition.FIRST else FIRST_HANDS
+        return self._hands[offset + hand_rank(hand)]
+
+    def lookup(self, battle_state: BattleState, player_id: int) -> Optional[float]:
+        """Expected VPs for player_id at the opening of a battle, or None if
+        the database does not apply (play has started, or another theater order)."""
+        theaters = sorted(battle_state.theaters, key=lambda t: t.position.index)
+        player = battle_state.players[player_id]
+        if (
+            [t.theater_type for t in theaters] != self.theater_order
+            or any(t.total_card_count() for t in theaters)
+            or player.cards_in_hand != HAND_SIZE
+        ):
+            return None
+        value = self.expected_vps(player.hand_ids, player.position)
+        return None if math.isnan(value) else value
+
+    def should_withdraw(
+        self, hand: Iterable[int], position: PlayerPosition, margin: float = 0.0
+    ) -> bool:
+        """True if withdrawing before playing a card is expected to cost less
+        than fighting the battle out (by at least `margin` VPs)."""
+        cost = calculate_vps(BattleEndReason.WITHDRAWAL, position, HAND_SIZE)
+        return self.expected_vps(hand, position) < -cost - margin
+
+
+def _parse_cards(text: str) -> list[int]:
+    cards = [int(c) for c in text.split(",")]
+    if len(set(cards)) != HAND_SIZE or not all(0 <= c < CARDS for c in cards):
+        raise argparse.ArgumentTypeError("a hand is 6 distinct card ids 0-17")
+    return cards
+
+
+def _parse_shard(text: str) -> tuple[int, int]:
+    k, _, n = text.partition("/")
+    if not n or not 0 <= int(k) < int(n):
+        raise argparse.ArgumentTypeError("shard must look like K/N with 0 <= K < N")
+    return int(k), int(n)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build and query the deal equity database")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_cmd = commands.add_parser("build", help="evaluate deals (resumable)")
+    build_cmd.add_argument("directory", type=Path)
+    build_cmd.add_argument("--evaluator", default="playout:agent=greedy,playouts=8")
+    build_cmd.add_argument(
+        "--theater-order", default="AIR,LAND,SEA", help="comma-separated theater types"
+    )
+    build_cmd.add_argument("--workers", type=int, default=1)
+    build_cmd.add_argument("--shard", type=_parse_shard, default=(0, 1))
+    build_cmd.add_argument("--seed", type=int, default=0)
+    build_cmd.add_argument("--limit", type=int, default=None, help="max hands this run")
+
+    aggregate_cmd = commands.add_parser("aggregate", help="compute per-hand values")
+    aggregate_cmd.add_argument("directory", type=Path)
+
+    lookup_cmd = commands.add_parser("lookup", help="expected VPs for a hand")
+    lookup_cmd.add_argument("directory", type=Path)
+    lookup_cmd.add_argument("hand", type=_parse_cards)
+    lookup_cmd.add_argument(
+        "--position", choices=[p.name for p in PlayerPosition], default="FIRST"
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        order = [TheaterType[name.strip()] for name in args.theater_order.split(",")]
+        evaluated = build(
+            args.directory, args.evaluator, order, args.workers, args.shard, args.seed,
+            limit=args.limit,
+        )
+        print(f"Evaluated {evaluated} deals")
+    elif args.command == "aggregate":
+        print(f"Aggregated {aggregate(args.directory)} deals")
+    else:
+        position = PlayerPosition[args.position]
+        with DealEquityDB(args.directory) as db:
+            value = db.expected_vps(args.hand, position)
+            print(f"Expected VPs: {value:+.3f}")
+            print(f"Withdraw at once: {db.should_withdraw(args.hand, position)}")
+
+
+if __name__ == "__main__":
+    main()
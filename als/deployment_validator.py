@@ -26,7 +26,7 @@ def can_deploy_faceup(
         return True
 
     # Air Drop flag allows any theater (one-time)
-    if battle_state.get_player_flag(player_id, "air_drop_active", False):
+    if battle_state.players[player_id].air_drop_active:
         return True
 
     # Aerodrome: ongoing ability allowing strength <= 3 to non-matching
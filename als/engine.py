@@ -0,0 +1,418 @@
+"""Battle turn flow: legal moves, applying them, and ability resolution.
+
+A battle is driven one decision at a time. In the PLAYER_TURN phase the
+active player deploys, improvises or withdraws. When a card is revealed
+with an instant ability the battle enters ABILITY_RESOLUTION and the
+ability's owner picks one of its choices; abilities with a single forced
+outcome are resolved without asking. Every decision is a `Move`, so search
+code treats turn actions and ability choices the same way.
+
+`apply_move` mutates the state it is given; fork first to keep the parent:
+
+    child = state.fork()
+    apply_move(child, move)
+
+`start_battle` and `finish_battle` deal and score the battles of a GameState.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field, fields, is_dataclass
+from typing import Any, Optional, Sequence
+
+from als.abilities import AbilityContext, TacticalAbility
+from als.abilities_impl import (
+    DisruptChoice,
+    FlipChoice,
+    RedeployChoice,
+    ReinforceChoice,
+    TransportChoice,
+)
+from als.card_instance import CardInstance
+from als.card_registry import CARD_DEFINITIONS
+from als.deployment_validator import (
+    can_deploy_faceup,
+    post_play_blockade_check,
+    post_play_containment_check,
+)
+from als.enums import (
+    AbilityTiming,
+    BattlePhase,
+    CardOrientation,
+    GamePhase,
+    PlayerFlag,
+    PlayerPosition,
+    TurnAction,
+)
+from als.game_state import BattleState, Deck, GameState, PlayerState
+from als.hashing import position_hash
+from als.scoring import battle_result, is_battle_over
+from als.theater import Theater
+from als.types import TheaterPosition
+
+# --- Move codes ---
+#
+# Every move packs into a 15-bit int so tables and trees can store it
+# compactly. Bit 0 is the kind (0 = turn action, 1 = ability choice).
+#   turn action:    bits 1-2 action, bits 3-7 card_id, bits 8-9 theater index
+#   ability choice: bits 1-3 choice type, bits 4-8 first operand,
+#                   bits 9-13 second operand (card ids, or theater index + 1)
+
+_ACTION_CODES = {TurnAction.DEPLOY: 0, TurnAction.IMPROVISE: 1, TurnAction.WITHDRAW: 2}
+_CODE_ACTIONS = {code: action for action, code in _ACTION_CODES.items()}
+
+_DECLINE, _FLIP, _REINFORCE, _DISRUPT, _TRANSPORT, _REDEPLOY = range(6)
+
+
+@dataclass(frozen=True)
+class Move:
+    """One decision: a turn action, or a choice for the resolving ability.
+
+    Moves compare and hash by `code` alone, so the same move generated in
+    different branches of a battle is equal.
+    """
+
+    code: int
+    action: Optional[TurnAction] = field(default=None, compare=False)
+    card_id: Optional[int] = field(default=None, compare=False)
+    theater_index: Optional[int] = field(default=None, compare=False)
+    choice: Any = field(default=None, compare=False)
+
+    @property
+    def is_ability_choice(self) -> bool:
+        return self.code & 1 == 1
+
+    def __repr__(self) -> str:
+        if self.is_ability_choice:
+            return f"Move(choice={self.choice!r})"
+        if self.action == TurnAction.WITHDRAW:
+            return "Move(WITHDRAW)"
+        assert self.action is not None
+        return f"Move({self.action.name}, card={self.card_id}, theater={self.theater_index})"
+
+
+def turn_move(
+    action: TurnAction, card_id: Optional[int] = None, theater_index: Optional[int] = None
+) -> Move:
+    code = (_ACTION_CODES[action] << 1) | ((card_id or 0) << 3) | ((theater_index or 0) << 8)
+    return Move(code, action, card_id, theater_index)
+
+
+def _choice_code(choice: Any) -> int:
+    if choice is None:
+        kind, a, b = _DECLINE, 0, 0
+    elif isinstance(choice, FlipChoice):
+        kind, a, b = _FLIP, choice.card_to_flip.card_id, 0
+    elif isinstance(choice, ReinforceChoice):
+        target = choice.target_theater_index
+        kind, a, b = _REINFORCE, 0 if target is None else target + 1, 0
+    elif isinstance(choice, DisruptChoice):
+        kind = _DISRUPT
+        a, b = choice.opponent_card_to_flip.card_id, choice.own_card_to_flip.card_id
+    elif isinstance(choice, TransportChoice):
+        kind = _TRANSPORT
+        a, b = choice.card_to_move.card_id, choice.destination_theater_index + 1
+    elif isinstance(choice, RedeployChoice):
+        card = choice.card_to_return
+        kind, a, b = _REDEPLOY, 0 if card is None else card.card_id + 1, 0
+    else:
+        raise TypeError(f"Unknown ability choice {choice!r}")
+    return 1 | (kind << 1) | (a << 4) | (b << 9)
+
+
+def choice_move(choice: Any) -> Move:
+    return Move(_choice_code(choice), choice=choice)
+
+
+def decode_move(battle_state: BattleState, code: int) -> Move:
+    """Rebuild a Move from its code, resolving card ids against battle_state."""
+    if code & 1 == 0:
+        action = _CODE_ACTIONS[(code >> 1) & 3]
+        if action == TurnAction.WITHDRAW:
+            return turn_move(action)
+        return turn_move(action, (code >> 3) & 31, (code >> 8) & 3)
+
+    kind, a, b = (code >> 1) & 7, (code >> 4) & 31, (code >> 9) & 31
+
+    def card(card_id: int) -> CardInstance:
+        found = battle_state.find_card(card_id)
+        if found is None:
+            raise ValueError(f"Card {card_id} not found for move code {code}")
+        return found
+
+    choice: Any
+    if kind == _DECLINE:
+        choice = None
+    elif kind == _FLIP:
+        choice = FlipChoice(card_to_flip=card(a))
+    elif kind == _REINFORCE:
+        choice = ReinforceChoice(target_theater_index=None if a == 0 else a - 1)
+    elif kind == _DISRUPT:
+        choice = DisruptChoice(opponent_card_to_flip=card(a), own_card_to_flip=card(b))
+    elif kind == _TRANSPORT:
+        choice = TransportChoice(card_to_move=card(a), destination_theater_index=b - 1)
+    elif kind == _REDEPLOY:
+        choice = RedeployChoice(card_to_return=None if a == 0 else card(a - 1))
+    else:
+        raise ValueError(f"Invalid move code {code}")
+    return Move(code, choice=choice)
+
+
+# --- Queries ---
+
+def current_player(battle_state: BattleState) -> int:
+    """The player who makes the next decision."""
+    if battle_state.phase == BattlePhase.ABILITY_RESOLUTION:
+        return battle_state.pending_abilities[0][1]
+    return battle_state.active_player_id
+
+
+def opponent_of(battle_state: BattleState, player_id: int) -> int:
+    return next(pid for pid in battle_state.players if pid != player_id)
+
+
+def ability_context(battle_state: BattleState) -> tuple[TacticalAbility, AbilityContext]:
+    """The ability being resolved and its context (phase must be ABILITY_RESOLUTION)."""
+    card_id, owner = battle_state.pending_abilities[0]
+    card = battle_state.find_card(card_id)
+    assert card is not None and card.definition.ability is not None
+    ctx = AbilityContext(battle_state, card, owner, opponent_of(battle_state, owner))
+    return card.definition.ability, ctx
+
+
+def _is_decline(choice: Any) -> bool:
+    if choice is None:
+        return True
+    return is_dataclass(choice) and all(getattr(choice, f.name) is None for f in fields(choice))
+
+
+def _ability_choices(ability: TacticalAbility, ctx: AbilityContext) -> list[Any]:
+    if not ability.is_possible(ctx):
+        return []
+    choices = list(ability.get_choices(ctx))
+    if choices and ability.is_optional and not any(_is_decline(c) for c in choices):
+        choices.append(None)
+    return choices
+
+
+def legal_moves(battle_state: BattleState) -> list[Move]:
+    """All decisions available to `current_player` (empty once the battle is over)."""
+    if battle_state.phase == BattlePhase.BATTLE_END:
+        return []
+    if battle_state.phase == BattlePhase.ABILITY_RESOLUTION:
+        ability, ctx = ability_context(battle_state)
+        return [choice_move(c) for c in _ability_choices(ability, ctx)]
+
+    player_id = battle_state.active_player_id
+    hand = battle_state.players[player_id].hand_cards
+    moves: list[Move] = []
+    for card in hand:
+        for theater in battle_state.theaters:
+            if can_deploy_faceup(battle_state, card, theater, player_id):
+                moves.append(turn_move(TurnAction.DEPLOY, card.card_id, theater.position.index))
+    for card in hand:
+        for theater in battle_state.theaters:
+            moves.append(turn_move(TurnAction.IMPROVISE, card.card_id, theater.position.index))
+    moves.append(turn_move(TurnAction.WITHDRAW))
+    return moves
+
+
+def distinct_moves(battle_state: BattleState) -> list[Move]:
+    """legal_moves with ability choices that lead to the same position merged.
+
+    Several choices of an ability (flipping either of two identical covered
+    cards, a Transport or Maneuver that changes nothing) can produce the
+    same position. Each choice is applied to a fork and only the first one
+    per resulting `position_hash` is kept, in legal_moves order. Turn
+    actions are returned unchanged.
+    """
+    moves = legal_moves(battle_state)
+    if len(moves) < 2 or not moves[0].is_ability_choice:
+        return moves
+    seen: set[int] = set()
+    distinct: list[Move] = []
+    for move in moves:
+        child = battle_state.fork()
+        apply_move(child, move)
+        h = position_hash(child)
+        if h not in seen:
+            seen.add(h)
+            distinct.append(move)
+    return distinct
+
+
+# --- Transitions ---
+
+def apply_move(battle_state: BattleState, move: Move) -> None:
+    """Apply a legal move for `current_player`, mutating battle_state."""
+    bs = battle_state
+    if bs.phase == BattlePhase.ABILITY_RESOLUTION:
+        if not move.is_ability_choice:
+            raise ValueError(f"{move!r} is not an ability choice")
+        ability, ctx = ability_context(bs)
+        bs.pending_abilities.pop(0)
+        if not _is_decline(move.choice):
+            _execute(bs, ability, ctx, move.choice)
+        _resolve_pending(bs)
+        return
+
+    if bs.phase != BattlePhase.PLAYER_TURN or move.is_ability_choice:
+        raise ValueError(f"{move!r} is not legal in phase {bs.phase.name}")
+
+    player_id = bs.active_player_id
+    if move.action == TurnAction.WITHDRAW:
+        bs.withdraw(player_id)
+        bs.phase = BattlePhase.BATTLE_END
+        return
+
+    assert move.card_id is not None and move.theater_index is not None
+    card = bs.players[player_id].hand_card(move.card_id)
+    if card is None:
+        raise ValueError(f"Card {move.card_id} is not in player {player_id}'s hand")
+    theater = bs.get_theater_at_position(move.theater_index)
+    faceup = move.action == TurnAction.DEPLOY
+    if faceup and not can_deploy_faceup(bs, card, theater, player_id):
+        raise ValueError(f"{move!r} is not a legal faceup deployment")
+
+    # Air Drop only lasts for the turn after it was played.
+    air_drop_used = bs.players[player_id].air_drop_active
+    cards_before = theater.total_card_count()
+    card = bs.remove_card_from_hand(card, player_id)
+    bs.play_card_to_theater(
+        card, player_id, theater, CardOrientation.FACEUP if faceup else CardOrientation.FACEDOWN
+    )
+    if air_drop_used:
+        bs.set_player_flag(player_id, PlayerFlag.AIR_DROP_ACTIVE, False)
+
+    if not _destroyed_on_play(bs, card, player_id, cards_before) and faceup:
+        _trigger(bs, card, player_id)
+    _resolve_pending(bs)
+
+
+def _destroyed_on_play(
+    bs: BattleState, card: CardInstance, player_id: int, cards_before: int
+) -> bool:
+    assert card.theater_position is not None
+    theater = bs.get_theater_at_position(card.theater_position.index)
+    if post_play_containment_check(bs, card, player_id) or post_play_blockade_check(
+        bs, card, theater, cards_before
+    ):
+        bs.destroy_card(card)
+        return True
+    return False
+
+
+def _trigger(bs: BattleState, card: CardInstance, player_id: int) -> None:
+    ability = card.definition.ability
+    if ability is not None and ability.timing == AbilityTiming.INSTANT:
+        bs.pending_abilities.append((card.card_id, player_id))
+
+
+def _execute(bs: BattleState, ability: TacticalAbility, ctx: AbilityContext, choice: Any) -> None:
+    """Execute a choice, then apply post-play checks and reveal triggers it caused."""
+    before = {
+        c.card_id: (c.orientation, t.position.index)
+        for t in bs.theaters
+        for c in t.all_cards()
+    }
+    counts_before = {t.position.index: t.total_card_count() for t in bs.theaters}
+    ability.execute(ctx, choice)
+
+    for theater in bs.theaters:
+        for player_id, stack in list(theater.stacks.items()):
+            for card in stack.cards:
+                previous = before.get(card.card_id)
+                if previous is None:
+                    # Played by the ability (Reinforce): normal play rules apply.
+                    index = theater.position.index
+                    if not _destroyed_on_play(bs, card, player_id, counts_before[index]):
+                        if card.is_faceup:
+                            _trigger(bs, card, player_id)
+                elif previous[0] == CardOrientation.FACEDOWN and card.is_faceup:
+                    _trigger(bs, card, player_id)
+
+
+def _resolve_pending(bs: BattleState) -> None:
+    """Resolve forced abilities; stop at the first one that needs a decision."""
+    while bs.pending_abilities:
+        bs.phase = BattlePhase.ABILITY_RESOLUTION
+        ability, ctx = ability_context(bs)
+        choices = _ability_choices(ability, ctx)
+        if len(choices) > 1:
+            return
+        bs.pending_abilities.pop(0)
+        if choices and not _is_decline(choices[0]):
+            _execute(bs, ability, ctx, choices[0])
+    _end_turn(bs)
+
+
+def _end_turn(bs: BattleState) -> None:
+    bs.phase = BattlePhase.PLAYER_TURN
+    if is_battle_over(bs):
+        bs.phase = BattlePhase.BATTLE_END
+        return
+    bs.turn_number += 1
+    next_player = bs.take_extra_turn()
+    if next_player is None:
+        next_player = opponent_of(bs, bs.active_player_id)
+    if not bs.players[next_player].hand_mask:
+        next_player = opponent_of(bs, next_player)
+    bs.active_player_id = next_player
+
+
+def is_terminal(battle_state: BattleState) -> bool:
+    return battle_state.phase == BattlePhase.BATTLE_END
+
+
+# --- Battles within a game ---
+
+def start_battle(game: GameState, deal: Sequence[int]) -> BattleState:
+    """Begin the next battle of `game` from a deal of all 18 card_ids.
+
+    The first six cards go to the 1st player, the next six to the 2nd
+    player, and the remaining six form the deck (listed bottom to top).
+    Theaters are laid out in `game.theater_order`.
+    """
+    if sorted(deal) != list(range(len(CARD_DEFINITIONS))):
+        raise ValueError("A deal must contain each card_id 0-17 exactly once")
+    theaters = [
+        Theater(theater_type, TheaterPosition(index))
+        for index, theater_type in enumerate(game.theater_order)
+    ]
+    first = game.first_player_id
+    second = next(pid for pid in game.player_ids if pid != first)
+    players = {
+        first: PlayerState(first, PlayerPosition.FIRST),
+        second: PlayerState(second, PlayerPosition.SECOND),
+    }
+    cards = [CardInstance(CARD_DEFINITIONS[card_id]) for card_id in deal]
+    for card in cards[:6]:
+        players[first].add_to_hand(card)
+    for card in cards[6:12]:
+        players[second].add_to_hand(card)
+    battle = BattleState(theaters, players, Deck(cards[12:]), active_player_id=first)
+    game.current_battle = battle
+    game.battle_number += 1
+    game.phase = GamePhase.BATTLE_IN_PROGRESS
+    return battle
+
+
+def finish_battle(game: GameState, beginner_mode: bool = False) -> tuple[int, int]:
+    """Score the finished current battle and set up the game for the next one.
+
+    Returns (winner player id, VPs awarded). Theaters rotate and the Supreme
+    Commander cards are exchanged unless the game is over.
+    """
+    battle = game.current_battle
+    if battle is None or not is_terminal(battle):
+        raise ValueError("No finished battle to score")
+    winner, vps = battle_result(battle, beginner_mode)
+    game.players[winner].victory_points += vps
+    game.current_battle = None
+    if game.is_game_over():
+        game.phase = GamePhase.GAME_OVER
+    else:
+        game.phase = GamePhase.SETUP
+        game.rotate_theater_order()
+        game.swap_first_player()
+    return winner, vps
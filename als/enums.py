@@ -1,6 +1,6 @@
 """Enumerations for all Air, Land, and Sea game concepts."""
 
-from enum import Enum, auto
+from enum import Enum, IntFlag, auto
 
 
 class TheaterType(Enum):
@@ -54,3 +54,8 @@ class CardZone(Enum):
     HAND = auto()
     BATTLEFIELD = auto()
     DECK = auto()
+
+
+class PlayerFlag(IntFlag):
+    """Per-player battle flags, stored as bits of PlayerState.flag_bits."""
+    AIR_DROP_ACTIVE = auto()
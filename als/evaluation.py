@@ -0,0 +1,123 @@
+"""Position values for search, in victory points from one player's view.
+
+A finished battle is worth exactly the VPs it awards: positive if the
+player won it, negative if the opponent did. Unfinished positions get a
+heuristic estimate on the same scale. Current theater control (with the
+1st player's tie and empty-theater rules) and strength margins give a
+chance of winning, which counts for less the more cards are still to be
+played. Either player can still withdraw, so the stakes are what each
+would concede by withdrawing now: the estimate is the chance-weighted
+mix of the opponent's and the player's withdrawal cost, and never falls
+below what withdrawing at once would cost the player.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Optional, Sequence
+
+from als import strength_calculator
+from als.engine import Move, apply_move, current_player, is_terminal
+from als.enums import BattleEndReason
+from als.game_state import BattleState
+from als.scoring import (
+    VP_TABLE,
+    battle_result,
+    first_player_controls,
+    first_player_id,
+    outcome_code,
+)
+
+# Win-chance logit per theater controlled beyond half of the three.
+CONTROL_WEIGHT = 1.0
+# Win-chance logit per point of (clamped) strength margin, summed over theaters.
+MARGIN_WEIGHT = 0.1
+MARGIN_CLAMP = 6
+# Cards left in both hands at which the board's lead counts half.
+CARDS_SCALE = 4.0
+MAX_VALUE = 6.0
+
+
+def terminal_value(battle_state: BattleState, player_id: int, beginner_mode: bool = False) -> float:
+    """Signed VPs of a finished battle for player_id."""
+    winner, vps = battle_result(battle_state, beginner_mode)
+    return float(vps if winner == player_id else -vps)
+
+
+def controlled_theaters(
+    battle_state: BattleState, strengths: dict[int, dict[int, int]], player_id: int
+) -> int:
+    """Number of theaters player_id would control if the battle ended now."""
+    first = first_player_id(battle_state)
+    second = next(pid for pid in battle_state.players if pid != first)
+    controlled = 0
+    for by_player in strengths.values():
+        first_wins = first_player_controls(by_player[first], by_player[second])
+        controlled += first_wins == (player_id == first)
+    return controlled
+
+
+def withdrawal_cost(
+    battle_state: BattleState, player_id: int, beginner_mode: bool = False
+) -> int:
+    """VPs player_id's opponent would score if player_id withdrew now."""
+    player = battle_state.players[player_id]
+    code = outcome_code(
+        BattleEndReason.WITHDRAWAL, player.position, player.cards_in_hand, beginner_mode
+    )
+    return VP_TABLE[code]
+
+
+def win_chance(battle_state: BattleState, player_id: int) -> float:
+    """Estimated chance that player_id wins the battle if it is played out."""
+    strengths = strength_calculator.calculate_all_strengths(battle_state)
+    opponent = next(pid for pid in battle_state.players if pid != player_id)
+    margin = 0
+    for by_player in strengths.values():
+        diff = by_player[player_id] - by_player[opponent]
+        margin += max(-MARGIN_CLAMP, min(MARGIN_CLAMP, diff))
+    controlled = controlled_theaters(battle_state, strengths, player_id)
+    lead = CONTROL_WEIGHT * (controlled - 1.5) + MARGIN_WEIGHT * margin
+    cards_left = sum(p.cards_in_hand for p in battle_state.players.values())
+    return 1.0 / (1.0 + math.exp(-lead / (1.0 + cards_left / CARDS_SCALE)))
+
+
+def heuristic_value(
+    battle_state: BattleState, player_id: int, beginner_mode: bool = False
+) -> float:
+    """Estimated signed VPs for player_id of a battle still in progress.
+
+    Lies strictly between -withdrawal_cost(player_id) and
+    withdrawal_cost(opponent).
+    """
+    opponent = next(pid for pid in battle_state.players if pid != player_id)
+    win = win_chance(battle_state, player_id)
+    return (
+        win * withdrawal_cost(battle_state, opponent, beginner_mode)
+        - (1.0 - win) * withdrawal_cost(battle_state, player_id, beginner_mode)
+    )
+
+
+def best_one_ply(
+    battle_state: BattleState,
+    moves: Sequence[Move],
+    player_id: Optional[int] = None,
+    beginner_mode: bool = False,
+) -> tuple[Optional[Move], float]:
+    """The first of `moves` with the best value one ply ahead, and that value.
+
+    Values are for `player_id` (default: the player to act); the move is
+    None if `moves` is empty.
+    """
+    player = current_player(battle_state) if player_id is None else player_id
+    best, best_value = None, -float("inf")
+    for move in moves:
+        child = battle_state.fork()
+        apply_move(child, move)
+        if is_terminal(child):
+            value = terminal_value(child, player, beginner_mode)
+        else:
+            value = heuristic_value(child, player, beginner_mode)
+        if value > best_value:
+            best, best_value = move, value
+    return best, best_value
@@ -3,90 +3,463 @@
 from __future__ import annotations
 
 import random
-from typing import Any, Optional
+from collections.abc import Iterable, Iterator, Mapping, MutableMapping, MutableSequence
+from typing import Any, Optional, Union, overload
 
 from als.card_instance import CardInstance
+from als.card_registry import CARD_DEFINITIONS
 from als.enums import (
     BattlePhase,
     CardOrientation,
     CardZone,
     GamePhase,
+    PlayerFlag,
     PlayerPosition,
     TheaterType,
 )
-from als.theater import Theater
+from als.theater import PlayerTheaterStack, Theater
 from als.types import TheaterPosition
 
 
+# Hands and the deck store card_ids only. A card there is always facedown,
+# away from the battlefield and (in a hand) owned by the hand's player, so
+# one shared, read-only CardInstance per card and place stands in for it in
+# every state of the process. They carry this marker as their `_cow_owner`;
+# `BattleState._own_card` always copies them.
+_SHARED_CARD = object()
+DECK_CAPACITY = len(CARD_DEFINITIONS)
+
+
+class _SharedCard(CardInstance):
+    """A hand or deck card shared by every state; writing to it raises."""
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(
+            f"{self!r} is shared by every state's hands and deck and cannot be "
+            "modified; use the BattleState methods (e.g. remove_card_from_hand, "
+            "which returns this state's own instance)"
+        )
+
+
+def _shared_card(card_id: int, zone: CardZone, owner: Optional[int]) -> CardInstance:
+    card = _SharedCard.__new__(_SharedCard)
+    for name, value in (
+        ("definition", CARD_DEFINITIONS[card_id]),
+        ("orientation", CardOrientation.FACEDOWN),
+        ("zone", zone),
+        ("owner", owner),
+        ("theater_position", None),
+        ("_cow_owner", _SHARED_CARD),
+    ):
+        object.__setattr__(card, name, value)
+    return card
+
+
+_AIR_DROP_ACTIVE = int(PlayerFlag.AIR_DROP_ACTIVE)
+_FLAG_BITS = {name.lower(): int(flag) for name, flag in PlayerFlag.__members__.items()}
+_DECK_CARDS = tuple(_shared_card(i, CardZone.DECK, None) for i in range(DECK_CAPACITY))
+_HAND_CARDS: dict[int, tuple[CardInstance, ...]] = {}  # player id -> card per card_id
+
+
+def _hand_cards(player_id: int) -> tuple[CardInstance, ...]:
+    cards = _HAND_CARDS.get(player_id)
+    if cards is None:
+        cards = tuple(_shared_card(i, CardZone.HAND, player_id) for i in range(DECK_CAPACITY))
+        _HAND_CARDS[player_id] = cards
+    return cards
+
+
+def mask_ids(mask: int) -> list[int]:
+    """The card_ids whose bits are set in `mask`, ascending."""
+    ids = []
+    while mask:
+        low = mask & -mask
+        ids.append(low.bit_length() - 1)
+        mask ^= low
+    return ids
+
+
 class Deck:
-    """Remaining cards pile."""
+    """Remaining cards pile: a fixed ring buffer of card_ids, bottom to top."""
 
     def __init__(self, cards: Optional[list[CardInstance]] = None) -> None:
-        self._cards: list[CardInstance] = list(cards) if cards else []
+        ids = [c.card_id for c in cards] if cards else []
+        if len(ids) > DECK_CAPACITY:
+            raise ValueError(f"A deck holds at most {DECK_CAPACITY} cards")
+        self._ring = bytearray(DECK_CAPACITY)
+        self._ring[: len(ids)] = bytes(ids)
+        self._bottom = 0
+        self._size = len(ids)
+        self._cow_owner: Optional[object] = None
+
+    def _clone(self, owner: object) -> Deck:
+        clone = Deck.__new__(Deck)
+        clone._ring = bytearray(self._ring)
+        clone._bottom = self._bottom
+        clone._size = self._size
+        clone._cow_owner = owner
+        return clone
+
+    @property
+    def card_ids(self) -> list[int]:
+        """card_ids from bottom to top."""
+        end = self._bottom + self._size
+        if end <= DECK_CAPACITY:
+            return list(self._ring[self._bottom:end])
+        return list(self._ring[self._bottom:]) + list(self._ring[: end - DECK_CAPACITY])
 
     @property
     def cards(self) -> list[CardInstance]:
-        return list(self._cards)
+        """Cards from bottom to top, as new instances (the deck holds card_ids)."""
+        return [_DECK_CARDS[i]._clone(None) for i in self.card_ids]
 
     @property
     def is_empty(self) -> bool:
-        return len(self._cards) == 0
+        return self._size == 0
 
     @property
     def size(self) -> int:
-        return len(self._cards)
+        return self._size
+
+    def holds(self, card_id: int) -> bool:
+        return card_id in self.card_ids
+
+    def __contains__(self, card: CardInstance) -> bool:
+        return self.holds(card.card_id)
 
     def peek(self) -> Optional[CardInstance]:
-        return self._cards[-1] if self._cards else None
+        if not self._size:
+            return None
+        return _DECK_CARDS[self._ring[(self._bottom + self._size - 1) % DECK_CAPACITY]]._clone(None)
 
     def draw(self) -> Optional[CardInstance]:
-        if self._cards:
-            card = self._cards.pop()
-            return card
-        return None
+        """Take the top card, as a new instance the caller may modify."""
+        if not self._size:
+            return None
+        self._size -= 1
+        card_id = self._ring[(self._bottom + self._size) % DECK_CAPACITY]
+        return _DECK_CARDS[card_id]._clone(None)
 
     def place_on_bottom(self, card: CardInstance) -> None:
-        card.orientation = CardOrientation.FACEDOWN
-        card.zone = CardZone.DECK
-        card.owner = None
-        card.theater_position = None
-        self._cards.insert(0, card)
+        if self._size == DECK_CAPACITY:
+            raise ValueError("Deck is full")
+        if card._cow_owner is not _SHARED_CARD:
+            card.orientation = CardOrientation.FACEDOWN
+            card.zone = CardZone.DECK
+            card.owner = None
+            card.theater_position = None
+        self._bottom = (self._bottom - 1) % DECK_CAPACITY
+        self._ring[self._bottom] = card.card_id
+        self._size += 1
+
+    def move_to_top(self, card_id: int) -> None:
+        """Move a card already in the deck to the top."""
+        ids = self.card_ids
+        ids.remove(card_id)  # ValueError if it is not in the deck
+        ids.append(card_id)
+        self._reset(ids)
+
+    def exchange(self, first_id: int, second_id: int) -> None:
+        """Swap two card_ids where they occur (either may be outside the deck)."""
+        for offset in range(self._size):
+            i = (self._bottom + offset) % DECK_CAPACITY
+            if self._ring[i] == first_id:
+                self._ring[i] = second_id
+            elif self._ring[i] == second_id:
+                self._ring[i] = first_id
 
     def shuffle(self, rng: Optional[random.Random] = None) -> None:
+        ids = self.card_ids
         if rng:
-            rng.shuffle(self._cards)
+            rng.shuffle(ids)
         else:
-            random.shuffle(self._cards)
+            random.shuffle(ids)
+        self._reset(ids)
+
+    def _reset(self, ids: list[int]) -> None:
+        self._ring[: len(ids)] = bytes(ids)
+        self._bottom = 0
+        self._size = len(ids)
+
+
+class HandView(MutableSequence[CardInstance]):
+    """List-compatible view of a player's hand, in the order cards were added.
+
+    Reading gives new CardInstances each time (facedown, in hand, owned by
+    the player), so changing one does not touch any state. Cards are
+    matched by card_id: `card in hand`, `hand.remove(card)` and
+    `hand.index(card)` accept any instance of a card. Writing through the
+    view changes the player's hand; once a BattleState has been forked,
+    use its methods instead.
+    """
+
+    __slots__ = ("_player",)
+
+    def __init__(self, player: PlayerState) -> None:
+        self._player = player
+
+    def _card(self, card_id: int) -> CardInstance:
+        return _hand_cards(self._player.player_id)[card_id]._clone(None)
+
+    def __len__(self) -> int:
+        return len(self._player.hand_order)
+
+    @overload
+    def __getitem__(self, index: int) -> CardInstance: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[CardInstance]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[CardInstance, list[CardInstance]]:
+        if isinstance(index, slice):
+            return [self._card(card_id) for card_id in self._player.hand_order[index]]
+        return self._card(self._player.hand_order[index])
+
+    @overload
+    def __setitem__(self, index: int, value: CardInstance) -> None: ...
+
+    @overload
+    def __setitem__(self, index: slice, value: Iterable[CardInstance]) -> None: ...
+
+    def __setitem__(self, index: Union[int, slice], value: Any) -> None:
+        ids = list(self._player.hand_order)
+        if isinstance(index, slice):
+            ids[index] = [card.card_id for card in value]
+        else:
+            ids[index] = value.card_id
+        self._player._set_hand_ids(ids)
+
+    def __delitem__(self, index: Union[int, slice]) -> None:
+        ids = list(self._player.hand_order)
+        del ids[index]
+        self._player._set_hand_ids(ids)
+
+    def insert(self, index: int, value: CardInstance) -> None:
+        if self._player.holds(value.card_id):
+            raise ValueError(f"{value!r} is already in player {self._player.player_id}'s hand")
+        self._player.add_to_hand(value)
+        ids = list(self._player.hand_order)
+        ids.insert(index, ids.pop())
+        self._player._set_hand_ids(ids)
+
+    def append(self, value: CardInstance) -> None:
+        self._player.add_to_hand(value)
+
+    def __contains__(self, value: object) -> bool:
+        return isinstance(value, CardInstance) and self._player.holds(value.card_id)
+
+    def index(self, value: Any, start: int = 0, stop: Optional[int] = None) -> int:
+        order = self._player.hand_order
+        card_id = value.card_id if isinstance(value, CardInstance) else -1
+        i = order.find(bytes((card_id,)), start, len(order) if stop is None else stop)
+        if card_id < 0 or i < 0:
+            raise ValueError(f"{value!r} is not in player {self._player.player_id}'s hand")
+        return i
+
+    def count(self, value: Any) -> int:
+        return int(value in self)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, (HandView, list, tuple)):
+            return NotImplemented
+        return list(self._player.hand_order) == [card.card_id for card in other]
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class FlagsView(MutableMapping[str, Any]):
+    """Dict-compatible view of a player's flags, keyed by name.
+
+    The `PlayerFlag` names ("air_drop_active") are stored as bits and read
+    back as bools; any other name keeps its value as given. Writing through
+    the view changes the player's flags, as for `HandView`.
+    """
+
+    __slots__ = ("_player",)
+
+    def __init__(self, player: PlayerState) -> None:
+        self._player = player
+
+    def __getitem__(self, name: str) -> Any:
+        player = self._player
+        bit = _FLAG_BITS.get(name)
+        if bit is None:
+            if player.other_flags is None:
+                raise KeyError(name)
+            return player.other_flags[name]
+        if not player.flags_set & bit:
+            raise KeyError(name)
+        return player.flag_bits & bit != 0
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        player = self._player
+        bit = _FLAG_BITS.get(name)
+        if bit is None:
+            if player.other_flags is None:
+                player.other_flags = {}
+            player.other_flags[name] = value
+            return
+        player.flags_set |= bit
+        player.flag_bits = player.flag_bits | bit if value else player.flag_bits & ~bit
+
+    def __delitem__(self, name: str) -> None:
+        player = self._player
+        bit = _FLAG_BITS.get(name)
+        if bit is None:
+            if player.other_flags is None:
+                raise KeyError(name)
+            del player.other_flags[name]
+            return
+        if not player.flags_set & bit:
+            raise KeyError(name)
+        player.flags_set &= ~bit
+        player.flag_bits &= ~bit
+
+    def __iter__(self) -> Iterator[str]:
+        flags_set = self._player.flags_set
+        names = [name for name, bit in _FLAG_BITS.items() if flags_set & bit]
+        return iter(names + list(self._player.other_flags or ()))
+
+    def __len__(self) -> int:
+        return self._player.flags_set.bit_count() + len(self._player.other_flags or ())
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
 
 
 class PlayerState:
-    """Per-player state within a battle."""
+    """Per-player state within a battle.
+
+    The hand is stored as its card_ids in the order they were added (an
+    immutable bytes object, shared until changed, plus an 18-bit mask of
+    the same ids) and flags as `PlayerFlag` bits. `hand` and `flags` are
+    list- and dict-compatible views of them (`HandView`, `FlagsView`);
+    `hand_cards` and `hand_card` give shared read-only instances for code
+    that only reads.
+    """
 
     def __init__(self, player_id: int, position: PlayerPosition) -> None:
         self.player_id = player_id
         self.position = position
-        self.hand: list[CardInstance] = []
+        self.hand_order: bytes = b""
+        self.hand_mask: int = 0
         self.victory_points: int = 0
         self.has_withdrawn: bool = False
-        self.flags: dict[str, Any] = {}
+        self.flag_bits: int = 0  # PlayerFlag bits, kept as a plain int
+        self.flags_set: int = 0  # PlayerFlag bits that have been given a value
+        self.other_flags: Optional[dict[str, Any]] = None  # flags with other names
+        self._cow_owner: Optional[object] = None
+
+    def _clone(self, owner: object) -> PlayerState:
+        clone = PlayerState.__new__(PlayerState)
+        clone.player_id = self.player_id
+        clone.position = self.position
+        clone.hand_order = self.hand_order
+        clone.hand_mask = self.hand_mask
+        clone.victory_points = self.victory_points
+        clone.has_withdrawn = self.has_withdrawn
+        clone.flag_bits = self.flag_bits
+        clone.flags_set = self.flags_set
+        clone.other_flags = None if self.other_flags is None else dict(self.other_flags)
+        clone._cow_owner = owner
+        return clone
+
+    @property
+    def hand(self) -> HandView:
+        return HandView(self)
+
+    @hand.setter
+    def hand(self, cards: Iterable[CardInstance]) -> None:
+        self._set_hand_ids([card.card_id for card in cards])
+
+    @property
+    def hand_ids(self) -> list[int]:
+        """card_ids in hand, in the order they were added."""
+        return list(self.hand_order)
+
+    @property
+    def hand_cards(self) -> list[CardInstance]:
+        """Cards in hand, in order, as shared read-only instances."""
+        cards = _hand_cards(self.player_id)
+        return [cards[i] for i in self.hand_order]
 
     @property
     def cards_in_hand(self) -> int:
-        return len(self.hand)
+        return len(self.hand_order)
+
+    def holds(self, card_id: int) -> bool:
+        return bool(self.hand_mask >> card_id & 1)
+
+    def hand_card(self, card_id: int) -> Optional[CardInstance]:
+        """The hand's shared read-only instance of card_id, or None if not in hand."""
+        return _hand_cards(self.player_id)[card_id] if self.holds(card_id) else None
 
     def add_to_hand(self, card: CardInstance) -> None:
-        card.zone = CardZone.HAND
-        card.owner = self.player_id
-        card.theater_position = None
-        card.orientation = CardOrientation.FACEDOWN
-        self.hand.append(card)
+        if card._cow_owner is not _SHARED_CARD:
+            card.zone = CardZone.HAND
+            card.owner = self.player_id
+            card.theater_position = None
+            card.orientation = CardOrientation.FACEDOWN
+        bit = 1 << card.card_id
+        if not self.hand_mask & bit:
+            self.hand_mask |= bit
+            self.hand_order += bytes((card.card_id,))
 
     def remove_from_hand(self, card: CardInstance) -> None:
-        self.hand.remove(card)
+        bit = 1 << card.card_id
+        if not self.hand_mask & bit:
+            raise ValueError(f"Card {card.card_id} is not in player {self.player_id}'s hand")
+        self.hand_mask ^= bit
+        self.hand_order = self.hand_order.replace(bytes((card.card_id,)), b"", 1)
+
+    def _set_hand_ids(self, ids: list[int]) -> None:
+        mask = 0
+        for card_id in ids:
+            mask |= 1 << card_id
+        if mask.bit_count() != len(ids):
+            raise ValueError(f"A card appears twice in player {self.player_id}'s hand")
+        self.hand_order = bytes(ids)
+        self.hand_mask = mask
+
+    def _exchange(self, first_id: int, second_id: int) -> None:
+        """Swap two card_ids where they occur in the hand."""
+        swap = {first_id: second_id, second_id: first_id}
+        self._set_hand_ids([swap.get(card_id, card_id) for card_id in self.hand_order])
+
+    @property
+    def air_drop_active(self) -> bool:
+        return self.flag_bits & _AIR_DROP_ACTIVE != 0
+
+    @property
+    def flags(self) -> FlagsView:
+        return FlagsView(self)
+
+    @flags.setter
+    def flags(self, values: Mapping[str, Any]) -> None:
+        self.flag_bits = self.flags_set = 0
+        self.other_flags = None
+        self.flags.update(values)
+
+
+def _flag_name(flag: Union[PlayerFlag, str]) -> str:
+    if isinstance(flag, PlayerFlag):
+        assert flag.name is not None
+        return flag.name.lower()
+    return flag
 
 
 class BattleState:
-    """Complete state of one battle."""
+    """Complete state of one battle.
+
+    States can be branched cheaply with `fork()`. A fork shares its theaters,
+    stacks, hands, deck and cards with the state it was forked from; the
+    mutation methods below copy an object the first time a branch writes to
+    it. Once a state has been forked, mutate it only through these methods
+    (or the abilities, which use them) so that sibling branches stay intact.
+    """
 
     def __init__(
         self,
@@ -101,10 +474,102 @@ class BattleState:
         self.active_player_id = active_player_id
         self.turn_number: int = 1
         self.phase: BattlePhase = BattlePhase.PLAYER_TURN
+        # Players owed an extra turn, first in line first.
         self.extra_turns: list[int] = []
+        # Triggered instant abilities awaiting resolution, oldest first, as
+        # (card_id, owning player_id). The head is the one being resolved
+        # while phase is ABILITY_RESOLUTION.
+        self.pending_abilities: list[tuple[int, int]] = []
+        # Copy-on-write bookkeeping: while `_shared` is False nothing has been
+        # forked and every object is mutated in place. Afterwards an object may
+        # be mutated in place only if its `_cow_owner` is this state's token.
+        self._shared: bool = False
+        self._token: object = object()
+
+    # --- Branching ---
+
+    def fork(self) -> BattleState:
+        """Return an independent branch of this state in O(1) card copies.
+
+        Both this state and the fork keep sharing every theater, stack, hand,
+        deck and card until one of them mutates it.
+        """
+        self._shared = True
+        self._token = object()
+        clone = BattleState.__new__(BattleState)
+        clone.theaters = list(self.theaters)
+        clone.players = dict(self.players)
+        clone.deck = self.deck
+        clone.active_player_id = self.active_player_id
+        clone.turn_number = self.turn_number
+        clone.phase = self.phase
+        clone.extra_turns = list(self.extra_turns)
+        clone.pending_abilities = list(self.pending_abilities)
+        clone._shared = True
+        clone._token = object()
+        return clone
+
+    def snapshot(self) -> BattleState:
+        """Return a fork meant to be kept as a read-only record of this position."""
+        return self.fork()
+
+    def _own_theater(self, index: int) -> Theater:
+        for i, theater in enumerate(self.theaters):
+            if theater.position.index == index:
+                if self._shared and theater._cow_owner is not self._token:
+                    theater = theater._clone(self._token)
+                    self.theaters[i] = theater
+                return theater
+        raise ValueError(f"No theater at position {index}")
 
-    # --- Query methods ---
+    def _own_stack(self, theater_index: int, player_id: int) -> PlayerTheaterStack:
+        theater = self._own_theater(theater_index)
+        stack = theater.get_stack(player_id)
+        if self._shared and stack._cow_owner is not self._token:
+            stack = stack._clone(self._token)
+            theater.stacks[player_id] = stack
+        return stack
+
+    def _own_player(self, player_id: int) -> PlayerState:
+        player = self.players[player_id]
+        if self._shared and player._cow_owner is not self._token:
+            player = player._clone(self._token)
+            self.players[player_id] = player
+        return player
+
+    def _own_deck(self) -> Deck:
+        if self._shared and self.deck._cow_owner is not self._token:
+            self.deck = self.deck._clone(self._token)
+        return self.deck
+
+    def _own_card(self, card: CardInstance) -> CardInstance:
+        """Return this state's writable instance of `card`.
+
+        Cards are matched by card_id, so an instance taken from another branch
+        of the same battle resolves to this branch's copy. A card in a hand or
+        the deck comes back as a new instance, since those hold card_ids only.
+        """
+        owner = card._cow_owner
+        if owner is self._token or (not self._shared and owner is not _SHARED_CARD):
+            return card
+        card_id = card.card_id
+        for theater in self.theaters:
+            for player_id, stack in theater.stacks.items():
+                for i, c in enumerate(stack._cards):
+                    if c.card_id == card_id:
+                        cards = self._own_stack(theater.position.index, player_id)._cards
+                        return self._claim(cards, i)
+        # In a hand, the deck or in transit (e.g. just drawn).
+        return card._clone(self._token)
+
+    def _claim(self, cards: list[CardInstance], i: int) -> CardInstance:
+        card = cards[i]
+        if card._cow_owner is not self._token:
+            card = card._clone(self._token)
+            cards[i] = card
+        return card
 
+    # --- Query methods ---
     def get_theater_at_position(self, index: int) -> Theater:
         for theater in self.theaters:
             if theater.position.index == index:
@@ -123,6 +588,20 @@ class BattleState:
             if t.position.is_adjacent_to(theater.position)
         ]
 
+    def find_card(self, card_id: int) -> Optional[CardInstance]:
+        """Return this state's instance of a card wherever it is (None if in transit)."""
+        for theater in self.theaters:
+            for stack in theater.stacks.values():
+                for card in stack._cards:
+                    if card.card_id == card_id:
+                        return card
+        for player in self.players.values():
+            if player.holds(card_id):
+                return player.hand_card(card_id)
+        if self.deck.holds(card_id):
+            return _DECK_CARDS[card_id]
+        return None
+
     def get_all_battlefield_cards(self, player_id: int) -> list[CardInstance]:
         result: list[CardInstance] = []
         for theater in self.theaters:
@@ -149,6 +628,7 @@ class BattleState:
     # --- Mutation methods ---
 
     def flip_card(self, card: CardInstance) -> None:
+        card = self._own_card(card)
         if card.orientation == CardOrientation.FACEUP:
             card.orientation = CardOrientation.FACEDOWN
         else:
@@ -156,29 +636,30 @@ class BattleState:
 
     def destroy_card(self, card: CardInstance) -> None:
         """Remove card from battlefield and place on bottom of deck."""
+        card = self._own_card(card)
         if card.zone != CardZone.BATTLEFIELD:
             return
         # Remove from theater stack
         for theater in self.theaters:
             if card.theater_position == theater.position:
-                for stack in theater.stacks.values():
+                for player_id, stack in theater.stacks.items():
                     if card in stack._cards:
-                        stack.remove_card(card)
+                        self._own_stack(theater.position.index, player_id).remove_card(card)
                         break
                 break
-        self.deck.place_on_bottom(card)
+        self._own_deck().place_on_bottom(card)
 
     def move_card(self, card: CardInstance, player_id: int, dest_theater: Theater) -> None:
         """Move a card from its current theater to another (same player's side)."""
+        card = self._own_card(card)
         # Remove from old theater
         if card.theater_position is not None:
-            old_theater = self.get_theater_at_position(card.theater_position.index)
-            old_stack = old_theater.get_stack(player_id)
+            old_stack = self._own_stack(card.theater_position.index, player_id)
             old_stack.remove_card(card)
 
         # Place on top of destination
         card.theater_position = dest_theater.position
-        dest_stack = dest_theater.get_stack(player_id)
+        dest_stack = self._own_stack(dest_theater.position.index, player_id)
         dest_stack.place_on_top(card)
 
     def play_card_to_theater(
@@ -189,30 +670,88 @@ class BattleState:
         orientation: CardOrientation,
     ) -> None:
         """Place a card on the battlefield in a theater."""
+        card = self._own_card(card)
         card.orientation = orientation
         card.zone = CardZone.BATTLEFIELD
         card.owner = player_id
         card.theater_position = theater.position
-        stack = theater.get_stack(player_id)
+        stack = self._own_stack(theater.position.index, player_id)
         stack.place_on_top(card)
 
     def return_card_to_hand(self, card: CardInstance, player_id: int) -> None:
         """Return a card from battlefield to player's hand."""
+        card = self._own_card(card)
         if card.zone == CardZone.BATTLEFIELD and card.theater_position is not None:
-            theater = self.get_theater_at_position(card.theater_position.index)
-            stack = theater.get_stack(player_id)
+            stack = self._own_stack(card.theater_position.index, player_id)
             stack.remove_card(card)
-        player = self.players[player_id]
+        player = self._own_player(player_id)
         player.add_to_hand(card)
 
+    def remove_card_from_hand(self, card: CardInstance, player_id: int) -> CardInstance:
+        """Take a card out of a player's hand and return this state's instance of it."""
+        card = self._own_card(card)
+        self._own_player(player_id).remove_from_hand(card)
+        return card
+
+    def draw_from_deck(self) -> Optional[CardInstance]:
+        """Draw the top card of the deck (None if the deck is empty)."""
+        if self.deck.is_empty:
+            return None
+        card = self._own_deck().draw()
+        assert card is not None
+        card._cow_owner = self._token
+        return card
+
+    def put_on_top_of_deck(self, card: CardInstance) -> None:
+        """Move a card already in the deck to the top (used to fix a draw in search)."""
+        self._own_deck().move_to_top(card.card_id)
+
+    def swap_cards(self, first: CardInstance, second: CardInstance) -> None:
+        """Exchange two cards' places; each takes over the other's orientation,
+        zone and owner (used to repair hidden-card determinizations)."""
+        first_id, second_id = first.card_id, second.card_id
+        if first_id == second_id:
+            return
+        # Hands and the deck hold card_ids, so the ids are exchanged there;
+        # battlefield instances exchange definitions.
+        off_board = {
+            card_id
+            for card_id in (first_id, second_id)
+            if self.deck.holds(card_id) or any(p.holds(card_id) for p in self.players.values())
+        }
+        on_board = [
+            self._own_card(card)
+            for card in (first, second)
+            if card.card_id not in off_board
+        ]
+        for player_id, player in self.players.items():
+            if player.holds(first_id) != player.holds(second_id):
+                self._own_player(player_id)._exchange(first_id, second_id)
+        if self.deck.holds(first_id) or self.deck.holds(second_id):
+            self._own_deck().exchange(first_id, second_id)
+        for card in on_board:
+            card.definition = CARD_DEFINITIONS[
+                second_id if card.card_id == first_id else first_id
+            ]
+
+    def withdraw(self, player_id: int) -> None:
+        self._own_player(player_id).has_withdrawn = True
+
     def grant_extra_turn(self, player_id: int) -> None:
         self.extra_turns.append(player_id)
 
-    def set_player_flag(self, player_id: int, flag: str, value: Any) -> None:
-        self.players[player_id].flags[flag] = value
+    def take_extra_turn(self) -> Optional[int]:
+        """Remove and return the next player owed an extra turn (None if nobody)."""
+        return self.extra_turns.pop(0) if self.extra_turns else None
+
+    def set_player_flag(self, player_id: int, flag: Union[PlayerFlag, str], value: Any) -> None:
+        self._own_player(player_id).flags[_flag_name(flag)] = value
 
-    def get_player_flag(self, player_id: int, flag: str, default: Any = None) -> Any:
-        return self.players[player_id].flags.get(flag, default)
+    def get_player_flag(
+        self, player_id: int, flag: Union[PlayerFlag, str], default: Any = None
+    ) -> Any:
+        """A flag's value, or `default` if it has never been set."""
+        return self.players[player_id].flags.get(_flag_name(flag), default)
 
 
 class GameState:
@@ -0,0 +1,142 @@
+"""Position keys and stable 64-bit position hashes for BattleState.
+
+Two states get the same key when they are the same position for both
+players: same cards in the same stack order and orientation, same hands,
+same set of cards in the deck, same player to move and the same pending
+abilities, extra turns and flags. The deck's order is hidden from both
+players and is deliberately left out, as is the turn counter.
+
+`position_hash` is a Zobrist hash over the same information. Its tables
+are generated from a fixed seed, so hashes are identical across processes
+and runs and can be used for shared-memory and on-disk tables.
+`position_id` adds the theater order, which both of the above leave out,
+and is the key of the on-disk tables (retrograde, analysis cache).
+"""
+
+from __future__ import annotations
+
+import random
+
+from als.enums import BattlePhase, CardOrientation, PlayerPosition
+from als.game_state import BattleState, mask_ids
+
+_MAX_STACK = 18
+_MAX_QUEUE = 4
+# Card location slots: two hands, the deck, then every
+# (theater, player, depth in stack, orientation) on the battlefield.
+_HAND_SLOT = 0
+_DECK_SLOT = 2
+_BOARD_SLOT = 3
+_SLOTS = _BOARD_SLOT + 3 * 2 * _MAX_STACK * 2
+
+_MASK64 = (1 << 64) - 1
+
+_rng = random.Random(0xA15)
+
+
+def _table(size: int) -> tuple[int, ...]:
+    return tuple(_rng.getrandbits(64) for _ in range(size))
+
+
+_CARD_KEYS = _table(18 * _SLOTS)
+_FIRST_PLAYER_KEYS = _table(2)
+_TO_MOVE_KEYS = _table(2)
+_PHASE_KEYS = _table(len(BattlePhase))
+_PENDING_KEYS = _table(_MAX_QUEUE * 18 * 2)
+_EXTRA_TURN_KEYS = _table(_MAX_QUEUE * 2)
+_AIR_DROP_KEYS = _table(2)
+_WITHDRAWN_KEYS = _table(2)
+_PHASE_INDEX = {phase: i for i, phase in enumerate(BattlePhase)}
+
+
+def mix64(z: int) -> int:
+    """SplitMix64 output function."""
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+def _player_index(battle_state: BattleState) -> dict[int, int]:
+    return {pid: i for i, pid in enumerate(sorted(battle_state.players))}
+
+
+def position_key(battle_state: BattleState) -> tuple:
+    """Exact, hashable description of the position (see module docstring)."""
+    bs = battle_state
+    pids = sorted(bs.players)
+    board = tuple(
+        (
+            theater.theater_type.value,
+            tuple(
+                tuple(
+                    (card.card_id, card.orientation == CardOrientation.FACEUP)
+                    for card in theater.stacks[pid]._cards
+                )
+                if pid in theater.stacks
+                else ()
+                for pid in pids
+            ),
+        )
+        for theater in sorted(bs.theaters, key=lambda t: t.position.index)
+    )
+    players = tuple(
+        (
+            pid,
+            bs.players[pid].position.value,
+            tuple(mask_ids(bs.players[pid].hand_mask)),
+            bs.players[pid].air_drop_active,
+            bs.players[pid].has_withdrawn,
+        )
+        for pid in pids
+    )
+    deck = tuple(sorted(bs.deck.card_ids))
+    return (
+        board,
+        players,
+        deck,
+        bs.active_player_id,
+        bs.phase.value,
+        tuple(bs.pending_abilities),
+        tuple(bs.extra_turns),
+    )
+
+
+def position_hash(battle_state: BattleState) -> int:
+    """Stable unsigned 64-bit Zobrist hash of `position_key`'s information."""
+    bs = battle_state
+    index = _player_index(bs)
+    h = 0
+    for theater in bs.theaters:
+        t = theater.position.index
+        for pid, stack in theater.stacks.items():
+            base = _BOARD_SLOT + (t * 2 + index[pid]) * _MAX_STACK * 2
+            for depth, card in enumerate(stack._cards):
+                slot = base + depth * 2 + (card.orientation == CardOrientation.FACEUP)
+                h ^= _CARD_KEYS[card.card_id * _SLOTS + slot]
+    for pid, player in bs.players.items():
+        i = index[pid]
+        for card_id in mask_ids(player.hand_mask):
+            h ^= _CARD_KEYS[card_id * _SLOTS + _HAND_SLOT + i]
+        if player.position == PlayerPosition.FIRST:
+            h ^= _FIRST_PLAYER_KEYS[i]
+        if player.air_drop_active:
+            h ^= _AIR_DROP_KEYS[i]
+        if player.has_withdrawn:
+            h ^= _WITHDRAWN_KEYS[i]
+    for card_id in bs.deck.card_ids:
+        h ^= _CARD_KEYS[card_id * _SLOTS + _DECK_SLOT]
+    h ^= _TO_MOVE_KEYS[index[bs.active_player_id]]
+    h ^= _PHASE_KEYS[_PHASE_INDEX[bs.phase]]
+    for n, (card_id, owner) in enumerate(bs.pending_abilities[:_MAX_QUEUE]):
+        h ^= _PENDING_KEYS[(n * 18 + card_id) * 2 + index[owner]]
+    for n, pid in enumerate(bs.extra_turns[:_MAX_QUEUE]):
+        h ^= _EXTRA_TURN_KEYS[n * 2 + index[pid]]
+    return h
+
+
+def position_id(battle_state: BattleState) -> int:
+    """position_hash plus the theater order, which the hash leaves out."""
+    order = 0
+    for theater in sorted(battle_state.theaters, key=lambda t: t.position.index):
+        order = order * 8 + theater.theater_type.value
+    return position_hash(battle_state) ^ mix64(order + 1)
@@ -0,0 +1,221 @@
+"""Optional counters and timers around the engine's hot paths.
+
+Instrumentation is off by default and costs nothing while off: `enable()`
+wraps the instrumented functions in place (BattleState mutations, Deck
+operations, strength calculation and every ability's `execute` /
+`get_choices`) and `disable()` puts the originals back. Search code marks
+its phases with `phase()`, which returns a shared no-op context manager
+while instrumentation is disabled.
+
+Usage:
+
+    from als import instrumentation
+
+    instrumentation.enable()
+    ...  # run searches
+    instrumentation.export_prometheus("/var/lib/node_exporter/als.prom")
+    instrumentation.disable()
+
+Timings are inclusive: a call to `calculate_all_strengths` also shows up
+as six `calculate_theater_strength` calls. Wrappers replace class and module
+attributes, which is why the package calls the strength functions through
+the module (`strength_calculator.calculate_all_strengths(...)`): a name
+bound with `from ... import` would keep the unwrapped original.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import time
+from contextlib import AbstractContextManager, nullcontext
+from pathlib import Path
+from typing import Any, Callable, Union
+
+from als import strength_calculator
+from als.abilities import TacticalAbility
+from als.game_state import BattleState, Deck
+
+_BATTLE_STATE_METHODS = (
+    "fork",
+    "flip_card",
+    "destroy_card",
+    "move_card",
+    "play_card_to_theater",
+    "return_card_to_hand",
+    "remove_card_from_hand",
+    "draw_from_deck",
+    "withdraw",
+    "grant_extra_turn",
+    "set_player_flag",
+)
+_DECK_METHODS = ("draw", "place_on_bottom", "shuffle")
+_STRENGTH_FUNCTIONS = ("calculate_theater_strength", "calculate_all_strengths")
+_ABILITY_METHODS = ("execute", "get_choices")
+
+_NULL_CONTEXT = nullcontext()
+
+_enabled = False
+# (owner, attribute, original) for every wrapper currently installed.
+_installed: list[tuple[Any, str, Any]] = []
+# name -> [calls, total nanoseconds]
+_timers: dict[str, list[int]] = {}
+_counters: dict[str, int] = {}
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def _timed(name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+    stats = _timers.setdefault(name, [0, 0])
+    perf_counter_ns = time.perf_counter_ns
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = perf_counter_ns()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats[0] += 1
+            stats[1] += perf_counter_ns() - start
+
+    return wrapper
+
+
+def _install(owner: Any, attr: str, name: str) -> None:
+    original = owner.__dict__[attr]
+    _installed.append((owner, attr, original))
+    setattr(owner, attr, _timed(name, original))
+
+
+def _ability_classes() -> list[type[TacticalAbility]]:
+    found: list[type[TacticalAbility]] = []
+    pending = list(TacticalAbility.__subclasses__())
+    while pending:
+        cls = pending.pop()
+        found.append(cls)
+        pending.extend(cls.__subclasses__())
+    return found
+
+
+def enable() -> None:
+    """Install the wrappers. Calling it while already enabled does nothing."""
+    global _enabled
+    if _enabled:
+        return
+    for attr in _BATTLE_STATE_METHODS:
+        _install(BattleState, attr, f"battle_state.{attr}")
+    for attr in _DECK_METHODS:
+        _install(Deck, attr, f"deck.{attr}")
+    for attr in _STRENGTH_FUNCTIONS:
+        _install(strength_calculator, attr, f"strength.{attr}")
+    for cls in _ability_classes():
+        for attr in _ABILITY_METHODS:
+            if attr in cls.__dict__:
+                _install(cls, attr, f"ability.{cls.__name__}.{attr}")
+    _enabled = True
+
+
+def disable() -> None:
+    """Restore the original functions. Collected statistics are kept."""
+    global _enabled
+    while _installed:
+        owner, attr, original = _installed.pop()
+        setattr(owner, attr, original)
+    _enabled = False
+
+
+def reset() -> None:
+    """Zero every counter and timer."""
+    for stats in _timers.values():
+        stats[0] = 0
+        stats[1] = 0
+    _counters.clear()
+
+
+def count(name: str, n: int = 1) -> None:
+    """Add n to a named event counter (ignored while disabled)."""
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+class _Phase:
+    __slots__ = ("_stats", "_start")
+
+    def __init__(self, stats: list[int]) -> None:
+        self._stats = stats
+        self._start = 0
+
+    def __enter__(self) -> None:
+        self._start = time.perf_counter_ns()
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stats[0] += 1
+        self._stats[1] += time.perf_counter_ns() - self._start
+
+
+def phase(name: str) -> AbstractContextManager[None]:
+    """Time a block of search code under `name`, e.g. `phase("search.expand")`."""
+    if not _enabled:
+        return _NULL_CONTEXT
+    return _Phase(_timers.setdefault(name, [0, 0]))
+
+
+def snapshot() -> dict[str, Any]:
+    """Return the current statistics as plain data."""
+    return {
+        "enabled": _enabled,
+        "timestamp": time.time(),
+        "timers": {
+            name: {"calls": calls, "seconds": total_ns / 1e9}
+            for name, (calls, total_ns) in sorted(_timers.items())
+            if calls
+        },
+        "counters": dict(sorted(_counters.items())),
+    }
+
+
+def _write_atomic(path: Union[str, Path], text: str) -> None:
+    # Scrapers must never see a half-written file.
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+def export_json(path: Union[str, Path]) -> None:
+    _write_atomic(path, json.dumps(snapshot(), indent=2) + "\n")
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def prometheus_text() -> str:
+    """Render the statistics in the Prometheus text exposition format."""
+    snap = snapshot()
+    lines = [
+        "# HELP als_calls_total Calls of an instrumented function or search phase.",
+        "# TYPE als_calls_total counter",
+    ]
+    for name, stats in snap["timers"].items():
+        lines.append(f'als_calls_total{{name="{_label(name)}"}} {stats["calls"]}')
+    lines += [
+        "# HELP als_seconds_total Inclusive wall time spent in a function or phase.",
+        "# TYPE als_seconds_total counter",
+    ]
+    for name, stats in snap["timers"].items():
+        lines.append(f'als_seconds_total{{name="{_label(name)}"}} {stats["seconds"]:.9f}')
+    lines += [
+        "# HELP als_events_total Named event counters.",
+        "# TYPE als_events_total counter",
+    ]
+    for name, value in snap["counters"].items():
+        lines.append(f'als_events_total{{name="{_label(name)}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def export_prometheus(path: Union[str, Path]) -> None:
+    _write_atomic(path, prometheus_text())
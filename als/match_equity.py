@@ -0,0 +1,197 @@
+"""Match-win probabilities across battles, by dynamic programming.
+
+A battle's result is summarized by a distribution over signed VPs from the
+1st player's point of view (e.g. {+6: 0.3, +2: 0.1, -3: 0.2, ...}). Given
+that distribution and the winning score, `MatchEquityTable.build` computes
+the probability of winning the whole game for every (my VPs, opponent VPs,
+my position in the next battle) state. Positions swap after every battle
+(`GameState.swap_first_player`), and each battle awards at least one VP, so
+states are filled in order of decreasing total VPs.
+
+Searchers can then maximize match equity instead of raw battle VPs:
+
+    table = MatchEquityTable.build(outcomes, winning_score=12)
+    utility = table.battle_utility(my_vp=7, opp_vp=9, my_position=PlayerPosition.FIRST)
+    searcher = AlphaBetaSearcher(utility=utility)
+
+The table is a flat array of doubles and can be saved to and loaded from
+a small binary file.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import struct
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Mapping, Optional, Union
+
+from als.agents import make_agent
+from als.engine import apply_move, current_player, finish_battle, is_terminal, start_battle
+from als.enums import BattleEndReason, PlayerPosition
+from als.game_state import GameState
+from als.scoring import calculate_vps
+
+_MAGIC = b"ALSMEQ01"
+_HEADER = struct.Struct("<8sI")
+_POSITIONS = (PlayerPosition.FIRST, PlayerPosition.SECOND)
+
+
+class MatchEquityTable:
+    """Probability of winning the game from each score and seat."""
+
+    def __init__(self, winning_score: int, equities: array) -> None:
+        if len(equities) != winning_score * winning_score * 2:
+            raise ValueError("Equity array does not match the winning score")
+        self.winning_score = winning_score
+        self._equities = equities
+
+    @staticmethod
+    def _index(winning_score: int, my_vp: int, opp_vp: int, my_position: PlayerPosition) -> int:
+        return (my_vp * winning_score + opp_vp) * 2 + (my_position == PlayerPosition.SECOND)
+
+    @classmethod
+    def build(
+        cls, first_player_outcomes: Mapping[int, float], winning_score: int = 12
+    ) -> MatchEquityTable:
+        """Fill the table from the 1st player's signed-VP outcome distribution."""
+        total = sum(first_player_outcomes.values())
+        if total <= 0 or any(v == 0 for v in first_player_outcomes):
+            raise ValueError("Outcomes need positive total probability and non-zero VPs")
+        outcomes = [(v, p / total) for v, p in first_player_outcomes.items() if p > 0]
+        w = winning_score
+        eq = array("d", bytes(8 * w * w * 2))
+
+        def value(my_vp: int, opp_vp: int, position: PlayerPosition) -> float:
+            if my_vp >= w:
+                return 1.0
+            if opp_vp >= w:
+                return 0.0
+            return eq[cls._index(w, my_vp, opp_vp, position)]
+
+        for vp_total in range(2 * w - 2, -1, -1):
+            for my_vp in range(max(0, vp_total - w + 1), min(w - 1, vp_total) + 1):
+                opp_vp = vp_total - my_vp
+                for position in _POSITIONS:
+                    following = (
+                        PlayerPosition.SECOND
+                        if position == PlayerPosition.FIRST
+                        else PlayerPosition.FIRST
+                    )
+                    sign = 1 if position == PlayerPosition.FIRST else -1
+                    e = 0.0
+                    for first_vps, p in outcomes:
+                        mine = sign * first_vps
+                        if mine > 0:
+                            e += p * value(my_vp + mine, opp_vp, following)
+                        else:
+                            e += p * value(my_vp, opp_vp - mine, following)
+                    eq[cls._index(w, my_vp, opp_vp, position)] = e
+        return cls(w, eq)
+
+    # --- Lookups ---
+
+    def equity(self, my_vp: int, opp_vp: int, my_position: PlayerPosition) -> float:
+        """P(win the game) before a battle in which I am `my_position`."""
+        if my_vp >= self.winning_score:
+            return 1.0
+        if opp_vp >= self.winning_score:
+            return 0.0
+        return self._equities[self._index(self.winning_score, my_vp, opp_vp, my_position)]
+
+    def equity_after(
+        self, my_vp: int, opp_vp: int, my_position: PlayerPosition, battle_vps: int
+    ) -> float:
+        """P(win the game) once the current battle ends with signed VPs for me."""
+        following = (
+            PlayerPosition.SECOND if my_position == PlayerPosition.FIRST else PlayerPosition.FIRST
+        )
+        if battle_vps > 0:
+            return self.equity(my_vp + battle_vps, opp_vp, following)
+        return self.equity(my_vp, opp_vp - battle_vps, following)
+
+    def withdraw_equity(
+        self, my_vp: int, opp_vp: int, my_position: PlayerPosition, cards_in_hand: int
+    ) -> float:
+        """P(win the game) if I withdraw now with `cards_in_hand` cards left."""
+        vps = calculate_vps(BattleEndReason.WITHDRAWAL, my_position, cards_in_hand)
+        return self.equity_after(my_vp, opp_vp, my_position, -vps)
+
+    def battle_utility(
+        self, my_vp: int, opp_vp: int, my_position: PlayerPosition
+    ) -> Callable[[float], float]:
+        """Map signed battle VPs for me to match equity, for use as a search utility.
+
+        Fractional (heuristic) values interpolate between neighbouring VP totals.
+        """
+        cache = {v: self.equity_after(my_vp, opp_vp, my_position, v) for v in range(-6, 7) if v}
+        cache[0] = (cache[1] + cache[-1]) / 2.0
+
+        def utility(battle_vps: float) -> float:
+            v = max(-6.0, min(6.0, battle_vps))
+            low = int(v // 1)
+            if low == v:
+                return cache[low]
+            return cache[low] + (v - low) * (cache[low + 1] - cache[low])
+
+        return utility
+
+    # --- Persistence ---
+
+    def save(self, path: Union[str, Path]) -> None:
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, self.winning_score))
+            self._equities.tofile(f)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> MatchEquityTable:
+        with open(path, "rb") as f:
+            magic, winning_score = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError(f"{path} is not a match equity table")
+            equities = array("d")
+            equities.fromfile(f, winning_score * winning_score * 2)
+        return cls(winning_score, equities)
+
+
+def estimate_outcomes(
+    agent_spec: str, battles: int, seed: int = 0, beginner_mode: bool = False
+) -> dict[int, float]:
+    """Estimate the 1st player's signed-VP distribution from self-play battles."""
+    rng = random.Random(seed)
+    counts: Counter[int] = Counter()
+    agents = {0: make_agent(agent_spec), 1: make_agent(agent_spec)}
+    for _ in range(battles):
+        game = GameState((0, 1), first_player_id=0)
+        deal = list(range(18))
+        rng.shuffle(deal)
+        battle = start_battle(game, deal)
+        while not is_terminal(battle):
+            apply_move(battle, agents[current_player(battle)].select_move(battle))
+        winner, vps = finish_battle(game, beginner_mode)
+        counts[vps if winner == 0 else -vps] += 1
+    return {v: n / battles for v, n in sorted(counts.items())}
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build a match equity table")
+    parser.add_argument("output", type=Path)
+    parser.add_argument(
+        "--agent", default="alphabeta:time=0.02", help="agent spec used to sample battles"
+    )
+    parser.add_argument("--battles", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--winning-score", type=int, default=12)
+    args = parser.parse_args(argv)
+
+    outcomes = estimate_outcomes(args.agent, args.battles, args.seed)
+    print("1st player outcomes:", {v: round(p, 4) for v, p in outcomes.items()})
+    table = MatchEquityTable.build(outcomes, args.winning_score)
+    table.save(args.output)
+    print(f"Opening equity as 1st player: {table.equity(0, 0, PlayerPosition.FIRST):.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""Monte Carlo tree search that keeps its tree between moves.
+
+`MCTSSearcher` runs UCT from the current position. Like the alpha-beta
+searcher it treats hands and facedown cards as known; deck draws are not:
+every iteration replays the tree's moves from the root state and samples a
+fresh top card for each Reinforce, so nodes stand for move sequences
+(open-loop search) and their statistics average over draws. A move that is
+not legal after some draw (an ability choice naming the drawn card) is
+simply not selectable in that iteration.
+
+After each move actually played — by either player, including ability
+choices — call `advance(move, battle_state)`. The child subtree for that
+move becomes the new root and keeps its statistics; any other subtree is
+dropped. With pondering, a background thread keeps adding iterations to
+the tree while the opponent is thinking:
+
+    searcher.advance(my_move, battle)
+    searcher.start_pondering()
+    ...  # opponent thinks
+    searcher.advance(their_move, battle)  # safe while pondering
+    result = searcher.search(battle, time_limit=0.5)  # stops pondering first
+
+With `distinct_choices` (the default), ability choices that lead to the
+same position share one child (see `engine.distinct_moves`); the merged
+choice sets are cached by position hash until the tree is cleared. With
+`pruning` ("strict" or "aggressive"), turn actions are filtered through
+`pruning.prune_turn_moves` as well.
+
+Nodes live in an als.node_pool.NodePool of `max_nodes` nodes (or at most
+`max_bytes`), allocated once; re-rooting returns the dropped subtrees to
+the pool. When the pool is full, iterations keep running but stop adding
+nodes.
+
+Rollouts play `rollout` moves (see als.rollouts) to the end of the battle
+(or `rollout_depth` moves, then use the heuristic evaluation). Values are
+signed VPs divided by `evaluation.MAX_VALUE`, so they lie in [-1, 1].
+"""
+
+from __future__ import annotations
+
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from als import instrumentation
+from als.abilities_impl import ReinforceChoice
+from als.engine import (
+    Move,
+    apply_move,
+    current_player,
+    decode_move,
+    distinct_moves,
+    is_terminal,
+    legal_moves,
+)
+from als.evaluation import MAX_VALUE, heuristic_value, terminal_value
+from als.game_state import BattleState
+from als.hashing import position_hash
+from als.node_pool import NO_PLAYER, NULL, NodePool
+from als.pruning import check_mode, prune_turn_moves
+from als.rollouts import RolloutPolicy, random_rollout
+
+
+@dataclass
+class MCTSResult:
+    best_move: Optional[Move]
+    value: float  # mean result in [-1, 1] for the player to move
+    iterations: int  # iterations run by this call
+    root_visits: int  # total, including visits reused from earlier searches
+    reused_visits: int
+    elapsed: float
+    principal_variation: list[Move] = field(default_factory=list)
+
+
+class MCTSSearcher:
+    """UCT with tree reuse across moves and optional background pondering."""
+
+    def __init__(
+        self,
+        exploration: float = 1.4,
+        rollout: RolloutPolicy = random_rollout,
+        rollout_depth: Optional[int] = None,
+        beginner_mode: bool = False,
+        seed: Optional[int] = None,
+        ponder_iterations: int = 200_000,
+        distinct_choices: bool = True,
+        max_nodes: int = 1 << 20,
+        max_bytes: Optional[int] = None,
+        pruning: Optional[str] = None,
+    ) -> None:
+        self.exploration = exploration
+        self.rollout = rollout
+        self.rollout_depth = rollout_depth
+        self.beginner_mode = beginner_mode
+        self.rng = random.Random(seed)
+        # Upper bound on iterations per pondering session, to bound memory.
+        self.ponder_iterations = ponder_iterations
+        self.distinct_choices = distinct_choices
+        self.pruning = check_mode(pruning)
+        self._distinct: dict[int, frozenset[int]] = {}
+        self._pool = NodePool(max_nodes, max_bytes)
+        self._root = self._pool.allocate()
+        self._root_state: Optional[BattleState] = None
+        self._root_hash: Optional[int] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._ponder_thread: Optional[threading.Thread] = None
+
+    # --- Tree management ---
+
+    def clear(self) -> None:
+        """Drop the tree (and stop pondering)."""
+        self.stop_pondering()
+        with self._lock:
+            self._pool.clear()
+            self._root = self._pool.allocate()
+            self._root_state = None
+            self._root_hash = None
+            self._distinct.clear()
+
+    def _set_root(self, battle_state: BattleState, child: int = NULL) -> None:
+        """Make child of the current root (or a fresh node) the root."""
+        self._root = self._pool.reroot(self._root, child)
+        if self._root == NULL:
+            self._root = self._pool.allocate()
+        self._root_state = battle_state.fork()
+        self._root_hash = position_hash(battle_state)
+
+    def advance(self, move: Move, battle_state: BattleState) -> None:
+        """Re-root on the child for `move`, which led to `battle_state`."""
+        with self._lock:
+            self._set_root(battle_state, self._pool.child(self._root, move.code))
+
+    @property
+    def root_visits(self) -> int:
+        return self._pool.visits[self._root]
+
+    @property
+    def tree_size(self) -> int:
+        """Nodes in use, including the root."""
+        return self._pool.in_use
+
+    # --- Search ---
+
+    def search(
+        self,
+        battle_state: BattleState,
+        time_limit: Optional[float] = None,
+        iterations: Optional[int] = None,
+        deadline: Optional[float] = None,
+    ) -> MCTSResult:
+        """Search until the deadline or iteration budget (default 1000 iterations).
+
+        The existing tree is reused if battle_state is its root position.
+        """
+        self.stop_pondering()
+        start = time.monotonic()
+        if time_limit is not None:
+            limit = start + time_limit
+            deadline = limit if deadline is None else min(deadline, limit)
+        if deadline is None and iterations is None:
+            iterations = 1000
+        if self._root_state is None or position_hash(battle_state) != self._root_hash:
+            self._set_root(battle_state)
+            self._distinct.clear()
+        reused = self.root_visits
+
+        count = 0
+        if not is_terminal(battle_state):
+            with instrumentation.phase("search.mcts"):
+                while (iterations is None or count < iterations) and (
+                    deadline is None or time.monotonic() < deadline
+                ):
+                    self._iterate()
+                    count += 1
+        instrumentation.count("search.mcts.iterations", count)
+
+        moves = self._moves(battle_state)
+        best = self._best_child(self._root, moves)
+        pv = self._principal_variation()
+        return MCTSResult(
+            best_move=best[0] if best is not None else (moves[0] if moves else None),
+            value=self._pool.mean(best[1]) if best is not None else 0.0,
+            iterations=count,
+            root_visits=self.root_visits,
+            reused_visits=reused,
+            elapsed=time.monotonic() - start,
+            principal_variation=pv,
+        )
+
+    def _best_child(self, node: int, moves: list[Move]) -> Optional[tuple[Move, int]]:
+        """(move, child) of the most visited child among `moves`."""
+        children = self._pool.children_by_move(node)
+        visits = self._pool.visits
+        candidates = [(m, children[m.code]) for m in moves if m.code in children]
+        return max(candidates, key=lambda c: visits[c[1]], default=None)
+
+    def _principal_variation(self) -> list[Move]:
+        pv: list[Move] = []
+        if self._root_state is None:
+            return pv
+        pool = self._pool
+        state = self._root_state.fork()
+        node = pool.most_visited_child(self._root)
+        while node != NULL:
+            try:
+                move = decode_move(state, pool.move[node])
+            except ValueError:
+                break  # names a card only some sampled draws put in play
+            pv.append(move)
+            apply_move(state, move)
+            node = pool.most_visited_child(node)
+        return pv
+
+    def _moves(self, state: BattleState) -> list[Move]:
+        moves = legal_moves(state)
+        if len(moves) < 2:
+            return moves
+        if not moves[0].is_ability_choice:
+            return moves if self.pruning is None else prune_turn_moves(state, moves, self.pruning)
+        if not (self.distinct_choices or self.pruning):
+            return moves
+        h = position_hash(state)
+        codes = self._distinct.get(h)
+        if codes is None:
+            codes = frozenset(m.code for m in distinct_moves(state))
+            self._distinct[h] = codes
+            instrumentation.count("search.mcts.merged_choices", len(moves) - len(codes))
+        return [m for m in moves if m.code in codes]
+
+    def _apply(self, state: BattleState, move: Move) -> None:
+        choice = move.choice
+        if (
+            isinstance(choice, ReinforceChoice)
+            and choice.target_theater_index is not None
+            and state.deck.size > 1
+        ):
+            # Sample the hidden draw instead of using the real deck order.
+            state.put_on_top_of_deck(self.rng.choice(state.deck.cards))
+        apply_move(state, move)
+
+    def _iterate(self) -> None:
+        assert self._root_state is not None
+        pool = self._pool
+        visits, value_sum, players = pool.visits, pool.value_sum, pool.player
+        state = self._root_state.fork()
+        node = self._root
+        path = [node]
+        while not is_terminal(state):
+            moves = self._moves(state)
+            children = pool.children_by_move(node)
+            untried = [m for m in moves if m.code not in children]
+            if untried:
+                move = self.rng.choice(untried)
+                child = pool.allocate(node, move.code, current_player(state))
+                self._apply(state, move)
+                if child != NULL:  # else the pool is full: just play out
+                    path.append(child)
+                break
+            log_visits = math.log(visits[node])
+            c = self.exploration
+
+            def uct(m: Move) -> float:
+                child = children[m.code]
+                n = visits[child]
+                return value_sum[child] / n + c * math.sqrt(log_visits / n)
+
+            move = max(moves, key=uct)
+            node = children[move.code]
+            self._apply(state, move)
+            path.append(node)
+
+        perspective = next(iter(state.players))
+        value = self._playout(state, perspective)
+        for visited in path:
+            visits[visited] += 1
+            player = players[visited]
+            if player != NO_PLAYER:
+                value_sum[visited] += value if player == perspective else -value
+
+    def _playout(self, state: BattleState, player_id: int) -> float:
+        """Result for player_id in [-1, 1] of a rollout from state (mutated)."""
+        steps = 0
+        while not is_terminal(state):
+            if self.rollout_depth is not None and steps >= self.rollout_depth:
+                return heuristic_value(state, player_id, self.beginner_mode) / MAX_VALUE
+            self._apply(state, self.rollout(state, self.rng))
+            steps += 1
+        return terminal_value(state, player_id, self.beginner_mode) / MAX_VALUE
+
+    # --- Pondering ---
+
+    def start_pondering(self) -> None:
+        """Keep searching from the current root in a background thread."""
+        if self._ponder_thread is not None:
+            return
+        if self._root_state is None or is_terminal(self._root_state):
+            return
+        self._stop.clear()
+        self._ponder_thread = threading.Thread(
+            target=self._ponder, name="mcts-ponder", daemon=True
+        )
+        self._ponder_thread.start()
+
+    def stop_pondering(self) -> None:
+        thread = self._ponder_thread
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+            self._ponder_thread = None
+
+    @property
+    def is_pondering(self) -> bool:
+        return self._ponder_thread is not None
+
+    def _ponder(self) -> None:
+        count = 0
+        while not self._stop.is_set() and count < self.ponder_iterations:
+            with self._lock:
+                if self._root_state is None or is_terminal(self._root_state):
+                    break
+                self._iterate()
+            count += 1
+        instrumentation.count("search.mcts.ponder_iterations", count)
@@ -0,0 +1,183 @@
+"""Fixed-capacity, struct-of-arrays storage for search-tree nodes.
+
+A tree of Python objects costs a few hundred bytes per node and keeps the
+garbage collector busy. A `NodePool` instead keeps every node field in
+its own preallocated array and refers to nodes by index:
+
+    visits       array('I')  visit count
+    value_sum    array('d')  sum of results, from `player`'s point of view
+    prior        array('f')  prior probability of the move (0 if unused)
+    parent       array('i')  parent index, NULL for a root
+    first_child  array('i')  head of the child list, NULL for a leaf
+    next_sibling array('i')  next child of the same parent (or next free node)
+    move         array('H')  code of the move leading here (NO_MOVE for a root)
+    player       array('h')  id of the player who chose `move` (NO_PLAYER for a root)
+
+That is 32 bytes a node. Capacity is fixed when the pool is created, as
+a node count or a memory cap in bytes, so memory use is predictable and
+no allocation happens during a search. `allocate` returns NULL when the
+pool is full; callers then stop growing the tree. Subtrees that are no
+longer needed (everything but the new root after a move) go back on a
+free list with `reroot` or `free_subtree`.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Iterator, Optional
+
+NULL = -1
+NO_MOVE = 0xFFFF
+NO_PLAYER = -1
+BYTES_PER_NODE = 4 + 8 + 4 + 4 + 4 + 4 + 2 + 2
+
+
+class NodePool:
+    """Preallocated arrays of tree nodes with a free list."""
+
+    def __init__(self, capacity: int = 1 << 20, max_bytes: Optional[int] = None) -> None:
+        if max_bytes is not None:
+            capacity = min(capacity, max_bytes // BYTES_PER_NODE)
+        if capacity < 1:
+            raise ValueError("A node pool needs room for at least one node")
+        self.capacity = capacity
+        self.visits = array("I", bytes(4 * capacity))
+        self.value_sum = array("d", bytes(8 * capacity))
+        self.prior = array("f", bytes(4 * capacity))
+        self.parent = array("i", [NULL]) * capacity
+        self.first_child = array("i", [NULL]) * capacity
+        self.next_sibling = array("i", [NULL]) * capacity
+        self.move = array("H", [NO_MOVE]) * capacity
+        self.player = array("h", [NO_PLAYER]) * capacity
+        self._high = 0  # nodes at or above this index have never been used
+        self._free = NULL  # free list, linked through next_sibling
+        self.in_use = 0
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.capacity * BYTES_PER_NODE
+
+    @property
+    def full(self) -> bool:
+        return self._free == NULL and self._high == self.capacity
+
+    def clear(self) -> None:
+        """Free every node."""
+        self._high = 0
+        self._free = NULL
+        self.in_use = 0
+
+    # --- Allocation ---
+
+    def allocate(
+        self,
+        parent: int = NULL,
+        move: int = NO_MOVE,
+        player: int = NO_PLAYER,
+        prior: float = 0.0,
+    ) -> int:
+        """A new node, linked as the first child of `parent`; NULL if the pool is full."""
+        if self._free != NULL:
+            node = self._free
+            self._free = self.next_sibling[node]
+        elif self._high < self.capacity:
+            node = self._high
+            self._high += 1
+        else:
+            return NULL
+        self.in_use += 1
+        self.visits[node] = 0
+        self.value_sum[node] = 0.0
+        self.prior[node] = prior
+        self.parent[node] = parent
+        self.first_child[node] = NULL
+        self.move[node] = move
+        self.player[node] = player
+        if parent != NULL:
+            self.next_sibling[node] = self.first_child[parent]
+            self.first_child[parent] = node
+        else:
+            self.next_sibling[node] = NULL
+        return node
+
+    def free_subtree(self, node: int) -> int:
+        """Return node and all its descendants to the free list; returns the count.
+
+        The caller unlinks node from its parent first (or frees a root).
+        """
+        freed = 0
+        stack = [node]
+        first_child, next_sibling = self.first_child, self.next_sibling
+        while stack:
+            n = stack.pop()
+            child = first_child[n]
+            while child != NULL:
+                stack.append(child)
+                child = next_sibling[child]
+            next_sibling[n] = self._free
+            self._free = n
+            freed += 1
+        self.in_use -= freed
+        return freed
+
+    def reroot(self, root: int, new_root: int) -> int:
+        """Keep only new_root's subtree (new_root is a child of root, or NULL).
+
+        Returns the new root (NULL if new_root was NULL).
+        """
+        if new_root != NULL:
+            # Unlink new_root from its siblings before freeing the rest.
+            previous = NULL
+            child = self.first_child[root]
+            while child != new_root:
+                if child == NULL:
+                    raise ValueError(f"Node {new_root} is not a child of {root}")
+                previous, child = child, self.next_sibling[child]
+            following = self.next_sibling[new_root]
+            if previous == NULL:
+                self.first_child[root] = following
+            else:
+                self.next_sibling[previous] = following
+            self.parent[new_root] = NULL
+            self.next_sibling[new_root] = NULL
+            self.move[new_root] = NO_MOVE
+            self.player[new_root] = NO_PLAYER
+        self.free_subtree(root)
+        return new_root
+
+    # --- Navigation ---
+
+    def children(self, node: int) -> Iterator[int]:
+        child = self.first_child[node]
+        while child != NULL:
+            yield child
+            child = self.next_sibling[child]
+
+    def children_by_move(self, node: int) -> dict[int, int]:
+        """{move code: child index} for node's children."""
+        result = {}
+        move, next_sibling = self.move, self.next_sibling
+        child = self.first_child[node]
+        while child != NULL:
+            result[move[child]] = child
+            child = next_sibling[child]
+        return result
+
+    def child(self, node: int, move: int) -> int:
+        """The child reached by move code `move`, or NULL."""
+        child = self.first_child[node]
+        while child != NULL and self.move[child] != move:
+            child = self.next_sibling[child]
+        return child
+
+    def most_visited_child(self, node: int) -> int:
+        best, best_visits = NULL, -1
+        visits = self.visits
+        for child in self.children(node):
+            if visits[child] > best_visits:
+                best, best_visits = child, visits[child]
+        return best
+
+    def mean(self, node: int) -> float:
+        visits = self.visits[node]
+        return self.value_sum[node] / visits if visits else 0.0
@@ -0,0 +1,115 @@
+"""Removing dominated and equivalent moves before a search expands them.
+
+`prune_moves` filters a legal move list in one of two modes.
+
+STRICT removes only moves whose result is exactly that of a move it keeps:
+
+- A card destroyed on play (facedown under the opponent's Containment, or
+  into a theater with 3+ cards next to a Blockade) goes to the bottom of
+  the deck whatever theater or orientation it was played with, and
+  triggers nothing. One such play per card is kept.
+- Ability choices that lead to the same position are merged, as in
+  `engine.distinct_moves` (up to deck order, which `position_hash`
+  leaves out and chance nodes average over anyway).
+
+AGGRESSIVE also removes moves that are almost never better than one it
+keeps:
+
+- Plays that would be destroyed, while some other play survives.
+- Improvising one of two interchangeable cards (same printed strength and
+  ability, e.g. the three Maneuvers) into a theater the other one is also
+  improvised into; the lower card_id is kept.
+- Improvising a card without an ability where it can be deployed faceup.
+
+Withdrawing is never pruned, and a non-empty list never prunes to empty.
+Moves keep their relative order.
+
+    searcher = AlphaBetaSearcher(pruning=STRICT)
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from als.card_registry import CARD_DEFINITIONS
+from als.engine import Move, distinct_moves, legal_moves
+from als.enums import TurnAction
+from als.game_state import BattleState
+from als.rollouts import destroyed_on_play
+
+STRICT = "strict"
+AGGRESSIVE = "aggressive"
+MODES = (STRICT, AGGRESSIVE)
+
+# Cards that play identically once improvised: (printed strength, ability type).
+_KIND = tuple((d.printed_strength, type(d.ability)) for d in CARD_DEFINITIONS)
+_VANILLA = tuple(d.ability is None for d in CARD_DEFINITIONS)
+
+
+def check_mode(mode: Optional[str]) -> Optional[str]:
+    """Validate a pruning mode; None and "" mean no pruning."""
+    if not mode:
+        return None
+    if mode not in MODES:
+        raise ValueError(f"Unknown pruning mode {mode!r}; expected one of {MODES}")
+    return mode
+
+
+def prune_moves(battle_state: BattleState, moves: list[Move], mode: str = STRICT) -> list[Move]:
+    """`moves` (all legal in battle_state) without those `mode` prunes."""
+    if len(moves) < 2:
+        return moves
+    if moves[0].is_ability_choice:
+        codes = {m.code for m in distinct_moves(battle_state)}
+        return [m for m in moves if m.code in codes]
+    return prune_turn_moves(battle_state, moves, mode)
+
+
+def pruned_moves(battle_state: BattleState, mode: str = STRICT) -> list[Move]:
+    return prune_moves(battle_state, legal_moves(battle_state), mode)
+
+
+def prune_turn_moves(
+    battle_state: BattleState, moves: list[Move], mode: str = STRICT
+) -> list[Move]:
+    """Turn actions only: the rule-based part of `prune_moves`."""
+    contained, blocked = destroyed_on_play(battle_state, battle_state.active_player_id)
+    aggressive = mode == AGGRESSIVE
+    destroyed_kept: set[int] = set()
+    improvised: set[tuple[int, tuple[int, type]]] = set()
+    faceup: set[tuple[Optional[int], Optional[int]]] = set()
+    if aggressive:
+        faceup = {
+            (m.card_id, m.theater_index) for m in moves if m.action == TurnAction.DEPLOY
+        }
+    kept: list[Move] = []
+    pruned_destroyed: list[Move] = []
+    for move in moves:
+        if move.action == TurnAction.WITHDRAW:
+            kept.append(move)
+            continue
+        card_id = move.card_id
+        assert card_id is not None and move.theater_index is not None
+        if move.theater_index in blocked or (contained and move.action == TurnAction.IMPROVISE):
+            if card_id in destroyed_kept:
+                continue
+            destroyed_kept.add(card_id)
+            if aggressive:
+                pruned_destroyed.append(move)
+            else:
+                kept.append(move)
+            continue
+        if aggressive and move.action == TurnAction.IMPROVISE:
+            if _VANILLA[card_id] and (card_id, move.theater_index) in faceup:
+                continue
+            slot = (move.theater_index, _KIND[card_id])
+            if slot in improvised:
+                continue
+            improvised.add(slot)
+        kept.append(move)
+    if aggressive and pruned_destroyed and all(
+        m.action == TurnAction.WITHDRAW for m in kept
+    ):
+        # Every play is destroyed: keep one per card after all.
+        kept = [m for m in moves if m in pruned_destroyed or m.action == TurnAction.WITHDRAW]
+    return kept
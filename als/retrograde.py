@@ -0,0 +1,364 @@
+"""Exact values of positions near the end of a battle, solved offline.
+
+With few cards left in the hands the rest of a battle is a small tree, but
+searchers re-derive it at every leaf that gets there. This module solves
+such positions once, by backward induction from the end of the battle, and
+stores their exact values in a file that searchers probe in O(1).
+
+Every possible board with N cards in hand is far too many positions to
+enumerate. The build instead plays battles from a reproducible deal stream
+(als.deals). Wherever a position has at most N + 1 cards in hand, every
+move leading to a position with at most N cards is expanded, and that
+position's whole subtree is solved, unless it grows past a node budget
+(`--max-nodes` new positions per frontier position; such subtrees are
+skipped). The values are exact, and the set of positions covers those that
+play actually reaches. As in the alpha-beta
+searcher, hands and facedown cards are known, and Reinforce draws are
+averaged over the deck. Values are expected battle VPs for the 1st player.
+
+Positions are keyed by `hashing.position_id` (`position_hash` with the
+theater order mixed in).
+The file holds a CHD ("hash, displace") perfect hash over the keys: a
+displacement per bucket of about four keys, then one key and one float32
+value per slot. A lookup hashes twice and compares the stored key.
+
+    python -m als.retrograde build final1.db --cards 1 --battles 1000
+    python -m als.retrograde info final1.db
+
+    db = RetrogradeDB("final1.db")
+    searcher = AlphaBetaSearcher(endgame=db)
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import mmap
+import struct
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Optional, Union
+
+from als.abilities_impl import ReinforceChoice
+from als.agents import make_agent
+from als.deals import DealStream, materialize
+from als.engine import Move, apply_move, current_player, is_terminal, legal_moves
+from als.enums import PlayerPosition, TheaterType
+from als.evaluation import terminal_value
+from als.game_state import BattleState
+from als.hashing import mix64, position_id
+from als.scoring import first_player_id
+
+_MAGIC = b"ALSRETR1"
+# magic, keys, slots, buckets, max cards, beginner mode
+_HEADER = struct.Struct("<8sIIIB?10x")
+_MASK64 = (1 << 64) - 1
+_BUCKET_SALT = 0xD6E8FEB86659FD93
+_SLOT_STEP = 0x9E3779B97F4A7C15
+_KEYS_PER_BUCKET = 4
+_LOAD_FACTOR = 0.9
+_MAX_DISPLACEMENT = 1 << 24
+THEATER_ORDERS = tuple(
+    tuple(TheaterType)[i:] + tuple(TheaterType)[:i] for i in range(len(TheaterType))
+)
+
+
+def cards_in_hand(battle_state: BattleState) -> int:
+    return sum(p.cards_in_hand for p in battle_state.players.values())
+
+
+def _bucket(key: int, buckets: int) -> int:
+    return mix64(key ^ _BUCKET_SALT) % buckets
+
+
+def _slot(key: int, displacement: int, slots: int) -> int:
+    return mix64((key + _SLOT_STEP * (displacement + 1)) & _MASK64) % slots
+
+
+class _Cycle(Exception):
+    """A position repeats within its own subtree (e.g. Redeploy loops)."""
+
+
+class _OverBudget(Exception):
+    """A subtree needs more than the solver's node budget."""
+
+
+# --- Solving ---
+
+class RetrogradeSolver:
+    """Backward induction over positions with few cards in hand.
+
+    Redeploy returns cards to hand and every Reinforce branches once per
+    deck card, so a few frontier positions have huge subtrees. `add` gives
+    up on a position once it has expanded `max_nodes` new positions; the
+    subtrees it finished before that keep their (exact) values.
+    """
+
+    def __init__(
+        self, max_cards: int, beginner_mode: bool = False, max_nodes: int = 20_000
+    ) -> None:
+        self.max_cards = max_cards
+        self.beginner_mode = beginner_mode
+        self.max_nodes = max_nodes
+        self.values: dict[int, float] = {}  # position_id -> 1st player's value
+        self.cycles = 0
+        self.over_budget = 0
+        self._solved: dict[int, float] = {}  # including positions above max_cards
+        self._path: set[int] = set()
+        self._nodes = 0
+
+    def add(self, battle_state: BattleState) -> Optional[float]:
+        """Solve a position and its subtree; None if play can loop from it or it is too big."""
+        self._nodes = 0
+        try:
+            return self._solve(battle_state, first_player_id(battle_state))
+        except _Cycle:
+            self.cycles += 1
+            return None
+        except _OverBudget:
+            self.over_budget += 1
+            return None
+        finally:
+            self._path.clear()
+
+    def _solve(self, bs: BattleState, first: int) -> float:
+        if is_terminal(bs):
+            return terminal_value(bs, first, self.beginner_mode)
+        key = position_id(bs)
+        value = self._solved.get(key)
+        if value is not None:
+            return value
+        if key in self._path:
+            raise _Cycle
+        self._nodes += 1
+        if self._nodes > self.max_nodes:
+            raise _OverBudget
+        self._path.add(key)
+        maximizing = current_player(bs) == first
+        best = -math.inf if maximizing else math.inf
+        for move in legal_moves(bs):
+            value = self._child_value(bs, move, first)
+            best = max(best, value) if maximizing else min(best, value)
+        self._path.discard(key)
+        self._solved[key] = best
+        if cards_in_hand(bs) <= self.max_cards:
+            self.values[key] = best
+        return best
+
+    def _child_value(self, bs: BattleState, move: Move, first: int) -> float:
+        choice = move.choice
+        if (
+            isinstance(choice, ReinforceChoice)
+            and choice.target_theater_index is not None
+            and bs.deck.size > 1
+        ):
+            deck = bs.deck.cards
+            total = 0.0
+            for card in deck:
+                child = bs.fork()
+                child.put_on_top_of_deck(card)
+                apply_move(child, move)
+                total += self._solve(child, first)
+            return total / len(deck)
+        child = bs.fork()
+        apply_move(child, move)
+        return self._solve(child, first)
+
+
+def harvest(
+    solver: RetrogradeSolver,
+    battles: int,
+    agent: str = "random:seed=0",
+    seed: int = 0,
+    stream: int = 0,
+    report_every: float = 0.0,
+) -> None:
+    """Play `battles` battles and solve every frontier position they pass.
+
+    Use a seeded agent spec for a reproducible build. Progress goes to
+    stderr every `report_every` seconds (never if 0).
+    """
+    deals = DealStream(seed, stream)
+    players = {0: make_agent(agent), 1: make_agent(agent)}
+    limit = solver.max_cards
+    start = last_report = time.monotonic()
+    for n in range(battles):
+        game = materialize(next(deals), THEATER_ORDERS[n % len(THEATER_ORDERS)])
+        battle = game.current_battle
+        assert battle is not None
+        for player in players.values():
+            player.reset()
+        while not is_terminal(battle):
+            if cards_in_hand(battle) <= limit + 1:
+                for move in legal_moves(battle):
+                    child = battle.fork()
+                    apply_move(child, move)
+                    if not is_terminal(child) and cards_in_hand(child) <= limit:
+                        solver.add(child)
+            apply_move(battle, players[current_player(battle)].select_move(battle))
+        now = time.monotonic()
+        if report_every and now - last_report >= report_every:
+            last_report = now
+            print(
+                f"{n + 1}/{battles} battles, {len(solver.values)} positions "
+                f"({(n + 1) / (now - start):.2f} battles/s, "
+                f"{solver.over_budget} subtrees over budget)",
+                file=sys.stderr,
+            )
+
+
+# --- File format ---
+
+def write_database(
+    path: Union[str, Path], values: dict[int, float], max_cards: int, beginner_mode: bool
+) -> None:
+    """Build the perfect hash over `values` and write the database file."""
+    n = len(values)
+    slots = max(1, math.ceil(n / _LOAD_FACTOR))
+    buckets = max(1, n // _KEYS_PER_BUCKET)
+    members: list[list[int]] = [[] for _ in range(buckets)]
+    for key in values:
+        members[_bucket(key, buckets)].append(key)
+
+    taken = bytearray(slots)
+    displacements = array("I", bytes(4 * (buckets + buckets % 2)))  # padded to 8 bytes
+    keys = array("Q", bytes(8 * slots))
+    table = array("f", [math.nan]) * slots
+    for b in sorted(range(buckets), key=lambda b: -len(members[b])):
+        bucket_keys = members[b]
+        if not bucket_keys:
+            break
+        for d in range(_MAX_DISPLACEMENT):
+            chosen = {_slot(k, d, slots) for k in bucket_keys}
+            if len(chosen) == len(bucket_keys) and not any(taken[s] for s in chosen):
+                break
+        else:
+            raise RuntimeError("Could not place a bucket; try a lower load factor")
+        displacements[b] = d
+        for k in bucket_keys:
+            s = _slot(k, d, slots)
+            taken[s] = 1
+            keys[s] = k
+            table[s] = values[k]
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, n, slots, buckets, max_cards, beginner_mode))
+        displacements.tofile(f)
+        keys.tofile(f)
+        table.tofile(f)
+
+
+class RetrogradeDB:
+    """Read-only, memory-mapped retrograde database."""
+
+    def __init__(self, path: Union[str, Path]) -> None:
+        if sys.byteorder != "little":
+            raise RuntimeError("Retrograde databases are little-endian")
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.size, self._slots, self._buckets, self.max_cards, self.beginner_mode = (
+            _HEADER.unpack_from(self._mmap)
+        )
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a retrograde database")
+        view = memoryview(self._mmap)
+        offset = _HEADER.size
+        end = offset + 4 * (self._buckets + self._buckets % 2)
+        self._displacements = view[offset:end].cast("I")
+        offset, end = end, end + 8 * self._slots
+        self._keys = view[offset:end].cast("Q")
+        self._values = view[end:end + 4 * self._slots].cast("f")
+        view.release()
+
+    def close(self) -> None:
+        for view in (self._displacements, self._keys, self._values):
+            view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> RetrogradeDB:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def first_player_value(self, key: int) -> Optional[float]:
+        """Stored value for a position_id, or None."""
+        d = self._displacements[_bucket(key, self._buckets)]
+        s = _slot(key, d, self._slots)
+        return self._values[s] if self._keys[s] == key else None
+
+    def value(self, battle_state: BattleState, player_id: int) -> Optional[float]:
+        """Exact expected VPs for player_id, or None if the position is not stored."""
+        if cards_in_hand(battle_state) > self.max_cards:
+            return None
+        value = self.first_player_value(position_id(battle_state))
+        if value is None:
+            return None
+        first = battle_state.players[player_id].position == PlayerPosition.FIRST
+        return value if first else -value
+
+
+def build(
+    path: Union[str, Path],
+    max_cards: int,
+    battles: int,
+    agent: str = "random:seed=0",
+    seed: int = 0,
+    beginner_mode: bool = False,
+    max_nodes: int = 20_000,
+    report_every: float = 0.0,
+) -> RetrogradeSolver:
+    solver = RetrogradeSolver(max_cards, beginner_mode, max_nodes)
+    harvest(solver, battles, agent, seed, report_every=report_every)
+    write_database(path, solver.values, max_cards, beginner_mode)
+    return solver
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Build and inspect retrograde databases")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build_cmd = commands.add_parser("build", help="solve final positions and write a database")
+    build_cmd.add_argument("path", type=Path)
+    build_cmd.add_argument("--cards", type=int, default=2, help="max cards left in both hands")
+    build_cmd.add_argument("--battles", type=int, default=1000)
+    build_cmd.add_argument(
+        "--agent", default="random:seed=0", help="agent spec that plays the battles"
+    )
+    build_cmd.add_argument("--seed", type=int, default=0)
+    build_cmd.add_argument("--beginner", action="store_true")
+    build_cmd.add_argument(
+        "--max-nodes", type=int, default=20_000,
+        help="skip frontier positions whose subtree needs more new positions than this",
+    )
+    build_cmd.add_argument("--report-every", type=float, default=10.0, help="seconds")
+
+    info_cmd = commands.add_parser("info", help="describe a database")
+    info_cmd.add_argument("path", type=Path)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        start = time.monotonic()
+        solver = build(
+            args.path, args.cards, args.battles, args.agent, args.seed, args.beginner,
+            args.max_nodes, args.report_every,
+        )
+        print(
+            f"Wrote {len(solver.values)} positions with <= {args.cards} cards in hand "
+            f"({solver.cycles} looping and {solver.over_budget} over-budget subtrees skipped) "
+            f"in {time.monotonic() - start:.1f}s"
+        )
+    else:
+        with RetrogradeDB(args.path) as db:
+            print(f"{len(db)} positions, <= {db.max_cards} cards in hand, "
+                  f"beginner mode {db.beginner_mode}, {args.path.stat().st_size} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Cheap move policies for Monte Carlo playouts.
+
+A rollout policy picks the next move for the player to act; it is called
+once per decision of every playout, so it must be much cheaper than a
+search. Policies here score turn actions from per-card tables precomputed
+from the card registry (strength, instant/ongoing timing), plus a one-step
+lookahead that avoids plays the opponent's Containment or a Blockade would
+destroy on the spot. Ability choices are made uniformly at random.
+
+- `random_rollout`: uniform over legal moves (never withdraws unless forced).
+- `PriorityRollout`: the best-scoring move, with `epsilon` random moves.
+- `SoftmaxRollout`: samples moves in proportion to exp(score / temperature),
+  where the score also rewards playing into contested theaters.
+
+Scores come from `RolloutWeights`, which can be tuned and passed in:
+
+    policy = SoftmaxRollout(RolloutWeights(contest=1.0), temperature=0.5)
+    searcher = MCTSSearcher(rollout=policy)
+
+`benchmarks.bench_rollouts` measures playout throughput for each policy.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import dataclass
+from typing import Callable
+
+from als import strength_calculator
+from als.abilities_impl import BlockadeAbility, ContainmentAbility
+from als.card_registry import CARD_DEFINITIONS, CARD_STRENGTH, CARD_TIMING
+from als.deployment_validator import post_play_blockade_check
+from als.engine import Move, current_player, legal_moves
+from als.enums import AbilityTiming, TurnAction
+from als.game_state import BattleState
+
+# Picks the next rollout move for the player to act.
+RolloutPolicy = Callable[[BattleState, random.Random], Move]
+
+
+def random_rollout(battle_state: BattleState, rng: random.Random) -> Move:
+    """Uniformly random legal move; never withdraws unless forced."""
+    moves = legal_moves(battle_state)
+    if len(moves) > 1 and not moves[-1].is_ability_choice:
+        moves = moves[:-1]  # drop WITHDRAW
+    return rng.choice(moves)
+
+
+@dataclass(frozen=True)
+class RolloutWeights:
+    """Linear score terms for turn actions."""
+
+    strength: float = 1.0  # per point of a faceup card's strength
+    instant: float = 1.5  # faceup play that triggers an instant ability
+    ongoing: float = 1.0  # faceup play that turns on an ongoing ability
+    improvise: float = 2.0  # facedown play (strength 2)...
+    improvise_strength: float = 0.5  # ...less this per point of the card's own strength
+    destroyed: float = -8.0  # play destroyed by Containment or Blockade
+    contest: float = 0.5  # per point the theater is behind, clamped to +-6 (softmax only)
+    withdraw: float = -10.0
+
+
+def _tables(weights: RolloutWeights) -> tuple[tuple[float, ...], tuple[float, ...]]:
+    """Per-card static scores for faceup and facedown plays."""
+    deploy = tuple(
+        weights.strength * CARD_STRENGTH[c]
+        + weights.instant * (CARD_TIMING[c] == AbilityTiming.INSTANT)
+        + weights.ongoing * (CARD_TIMING[c] == AbilityTiming.ONGOING)
+        for c in range(len(CARD_DEFINITIONS))
+    )
+    improvise = tuple(
+        weights.improvise - weights.improvise_strength * CARD_STRENGTH[c]
+        for c in range(len(CARD_DEFINITIONS))
+    )
+    return deploy, improvise
+
+
+def destroyed_on_play(battle_state: BattleState, player_id: int) -> tuple[bool, frozenset[int]]:
+    """(facedown plays are destroyed, theater indexes where any play is destroyed)."""
+    contained = False
+    blockade = False
+    for card, owner in battle_state.get_active_ongoing_abilities():
+        ability = card.definition.ability
+        if isinstance(ability, ContainmentAbility) and owner != player_id:
+            contained = True
+        elif isinstance(ability, BlockadeAbility):
+            blockade = True
+    blocked: frozenset[int] = frozenset()
+    hand = battle_state.players[player_id].hand_cards
+    if blockade and hand:
+        blocked = frozenset(
+            theater.position.index
+            for theater in battle_state.theaters
+            if post_play_blockade_check(
+                battle_state, hand[0], theater, theater.total_card_count()
+            )
+        )
+    return contained, blocked
+
+
+class PriorityRollout:
+    """Plays the highest-scoring move; a random one with probability epsilon."""
+
+    def __init__(self, weights: RolloutWeights = RolloutWeights(), epsilon: float = 0.1) -> None:
+        self.weights = weights
+        self.epsilon = epsilon
+        self._deploy, self._improvise = _tables(weights)
+
+    def _score(self, move: Move, contained: bool, blocked: frozenset[int]) -> float:
+        if move.action == TurnAction.WITHDRAW:
+            return self.weights.withdraw
+        assert move.card_id is not None
+        if move.action == TurnAction.DEPLOY:
+            score = self._deploy[move.card_id]
+        else:
+            score = self._improvise[move.card_id]
+            if contained:
+                score += self.weights.destroyed
+        if move.theater_index in blocked:
+            score += self.weights.destroyed
+        return score
+
+    def __call__(self, battle_state: BattleState, rng: random.Random) -> Move:
+        moves = legal_moves(battle_state)
+        if moves[0].is_ability_choice:
+            return rng.choice(moves)
+        if rng.random() < self.epsilon:
+            return rng.choice(moves[:-1] or moves)  # never a random WITHDRAW
+        return self.best(battle_state, moves, rng)
+
+    def best(self, battle_state: BattleState, moves: list[Move], rng: random.Random) -> Move:
+        """The best-scoring of `moves` (turn actions legal now), ties broken at random."""
+        contained, blocked = destroyed_on_play(battle_state, battle_state.active_player_id)
+        best, best_score, ties = moves[0], -math.inf, 0
+        for move in moves:
+            score = self._score(move, contained, blocked)
+            if score > best_score:
+                best, best_score, ties = move, score, 1
+            elif score == best_score:
+                ties += 1
+                if rng.random() * ties < 1.0:  # uniform among ties
+                    best = move
+        return best
+
+
+class SoftmaxRollout(PriorityRollout):
+    """Samples moves with probability proportional to exp(score / temperature)."""
+
+    def __init__(
+        self, weights: RolloutWeights = RolloutWeights(), temperature: float = 1.0
+    ) -> None:
+        super().__init__(weights, epsilon=0.0)
+        self.temperature = temperature
+
+    def __call__(self, battle_state: BattleState, rng: random.Random) -> Move:
+        moves = legal_moves(battle_state)
+        if moves[0].is_ability_choice:
+            return rng.choice(moves)
+        player = current_player(battle_state)
+        opponent = next(pid for pid in battle_state.players if pid != player)
+        contained, blocked = destroyed_on_play(battle_state, player)
+        strengths = strength_calculator.calculate_all_strengths(battle_state)
+        behind = {
+            index: max(-6, min(6, by_player[opponent] - by_player[player]))
+            for index, by_player in strengths.items()
+        }
+        scores = []
+        for move in moves:
+            score = self._score(move, contained, blocked)
+            if move.theater_index is not None and move.action != TurnAction.WITHDRAW:
+                score += self.weights.contest * behind[move.theater_index]
+            scores.append(score / self.temperature)
+        top = max(scores)
+        return rng.choices(moves, [math.exp(s - top) for s in scores])[0]
+
+
+ROLLOUTS: dict[str, Callable[[], RolloutPolicy]] = {
+    "random": lambda: random_rollout,
+    "priority": PriorityRollout,
+    "softmax": SoftmaxRollout,
+}
+
+
+def make_rollout(name: str) -> RolloutPolicy:
+    """A rollout policy with default weights, by name."""
+    if name not in ROLLOUTS:
+        raise ValueError(f"Unknown rollout policy {name!r}; choose from {sorted(ROLLOUTS)}")
+    return ROLLOUTS[name]()
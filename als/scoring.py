@@ -1,8 +1,20 @@
-"""Victory point scoring calculator."""
+"""Victory point scoring calculator and battle outcome.
+
+`calculate_vps` is the rule as written; `VP_TABLE` holds its value for
+every (end reason, withdrawing position, cards left, beginner mode), and
+`battle_result` scores through the table. For many finished battles at
+once (rollouts, deal evaluation), pack each one with `pack_terminal` into
+six strengths and an outcome code and call `score_batch`.
+"""
 
 from __future__ import annotations
 
+from array import array
+from typing import Optional, Sequence
+
+from als import strength_calculator
 from als.enums import BattleEndReason, PlayerPosition
+from als.game_state import BattleState
 
 
 def calculate_vps(
@@ -51,3 +63,169 @@ def calculate_vps(
     if n == 2:
         return 4
     return 6  # n <= 1
+
+
+def first_player_controls(first_strength: int, second_strength: int) -> bool:
+    """Theater control: the 1st player wins ties, including empty theaters."""
+    return first_strength >= second_strength
+
+
+def first_player_id(battle_state: BattleState) -> int:
+    for pid, player in battle_state.players.items():
+        if player.position == PlayerPosition.FIRST:
+            return pid
+    raise ValueError("Battle has no 1st player")
+
+
+def is_battle_over(battle_state: BattleState) -> bool:
+    """True once a player has withdrawn or both hands are empty."""
+    players = battle_state.players.values()
+    return any(p.has_withdrawn for p in players) or all(not p.hand_mask for p in players)
+
+
+def battle_end_reason(battle_state: BattleState) -> Optional[BattleEndReason]:
+    """How the battle ended, or None if it is still in progress."""
+    players = battle_state.players.values()
+    if any(p.has_withdrawn for p in players):
+        return BattleEndReason.WITHDRAWAL
+    if all(not p.hand_mask for p in players):
+        return BattleEndReason.ALL_CARDS_PLAYED
+    return None
+
+
+def battle_winner(battle_state: BattleState) -> int:
+    """Player id of the battle winner (the battle must be over).
+
+    A withdrawal hands the battle to the opponent; otherwise the player
+    controlling at least two theaters wins.
+    """
+    for pid, player in battle_state.players.items():
+        if player.has_withdrawn:
+            return next(other for other in battle_state.players if other != pid)
+    first = first_player_id(battle_state)
+    second = next(pid for pid in battle_state.players if pid != first)
+    controlled = 0
+    for theater in battle_state.theaters:
+        if first_player_controls(
+            strength_calculator.calculate_theater_strength(battle_state, theater, first),
+            strength_calculator.calculate_theater_strength(battle_state, theater, second),
+        ):
+            controlled += 1
+    return first if controlled >= 2 else second
+
+
+def battle_result(battle_state: BattleState, beginner_mode: bool = False) -> tuple[int, int]:
+    """Return (winner player id, VPs awarded) for a finished battle."""
+    reason = battle_end_reason(battle_state)
+    if reason is None:
+        raise ValueError("Battle is not over")
+    withdrawing = next(
+        (p for p in battle_state.players.values() if p.has_withdrawn), None
+    )
+    code = outcome_code(
+        reason,
+        withdrawing.position if withdrawing else None,
+        withdrawing.cards_in_hand if withdrawing else 0,
+        beginner_mode,
+    )
+    return battle_winner(battle_state), VP_TABLE[code]
+
+
+# --- Table-driven and batch scoring ---
+
+# calculate_vps is the same for every hand size from this one up.
+MAX_CARDS_IN_HAND = 6
+_ENDINGS = (
+    (BattleEndReason.ALL_CARDS_PLAYED, None),
+    (BattleEndReason.WITHDRAWAL, PlayerPosition.FIRST),
+    (BattleEndReason.WITHDRAWAL, PlayerPosition.SECOND),
+)
+_CARD_COUNTS = MAX_CARDS_IN_HAND + 1
+
+
+def outcome_code(
+    battle_end_reason: BattleEndReason,
+    withdrawing_player_position: PlayerPosition | None,
+    cards_remaining_in_hand: int,
+    beginner_mode: bool = False,
+) -> int:
+    """Index into VP_TABLE; arguments as for calculate_vps."""
+    if battle_end_reason == BattleEndReason.ALL_CARDS_PLAYED:
+        ending, cards = 0, 0
+    else:
+        ending = 1 if withdrawing_player_position == PlayerPosition.FIRST else 2
+        cards = min(cards_remaining_in_hand, MAX_CARDS_IN_HAND)
+    return (int(beginner_mode) * len(_ENDINGS) + ending) * _CARD_COUNTS + cards
+
+
+def _build_vp_table() -> tuple[int, ...]:
+    table = [0] * (2 * len(_ENDINGS) * _CARD_COUNTS)
+    for beginner_mode in (False, True):
+        for reason, position in _ENDINGS:
+            for cards in range(_CARD_COUNTS):
+                code = outcome_code(reason, position, cards, beginner_mode)
+                table[code] = calculate_vps(reason, position, cards, beginner_mode)
+    return tuple(table)
+
+
+VP_TABLE: tuple[int, ...] = _build_vp_table()
+
+
+def _first_player_wins(code: int, controlled: int) -> bool:
+    ending = (code // _CARD_COUNTS) % len(_ENDINGS)
+    if ending == 0:
+        return controlled >= 2
+    return ending == 2  # the 2nd player withdrew
+
+
+# Indexed by outcome code * 4 + theaters the 1st player controls.
+_FIRST_WINS = bytes(
+    _first_player_wins(code, controlled)
+    for code in range(len(VP_TABLE))
+    for controlled in range(4)
+)
+_VPS = bytes(vps for vps in VP_TABLE for _ in range(4))
+
+
+def pack_terminal(
+    battle_state: BattleState, beginner_mode: bool = False
+) -> tuple[tuple[int, ...], int]:
+    """(1st and 2nd player strength per theater, outcome code) of a finished battle."""
+    reason = battle_end_reason(battle_state)
+    if reason is None:
+        raise ValueError("Battle is not over")
+    first = first_player_id(battle_state)
+    second = next(pid for pid in battle_state.players if pid != first)
+    if reason == BattleEndReason.ALL_CARDS_PLAYED:
+        strengths = tuple(
+            strength_calculator.calculate_theater_strength(battle_state, theater, pid)
+            for theater in battle_state.theaters
+            for pid in (first, second)
+        )
+        code = outcome_code(reason, None, 0, beginner_mode)
+    else:
+        strengths = (0,) * (2 * len(battle_state.theaters))  # control is irrelevant
+        withdrawing = next(p for p in battle_state.players.values() if p.has_withdrawn)
+        code = outcome_code(reason, withdrawing.position, withdrawing.cards_in_hand, beginner_mode)
+    return strengths, code
+
+
+def score_batch(strengths: Sequence[int], codes: Sequence[int]) -> tuple[array, array]:
+    """Score many finished battles at once.
+
+    `strengths` holds six ints per battle: the 1st and 2nd player's strength
+    in each of the three theaters (as from `pack_terminal`, concatenated);
+    `codes` holds one outcome code per battle. Returns (1 where the 1st
+    player won else 0, VPs awarded) as unsigned byte arrays.
+    """
+    if len(strengths) != 6 * len(codes):
+        raise ValueError("Expected six strengths per outcome code")
+    f0, s0, f1, s1, f2, s2 = (strengths[i::6] for i in range(6))
+    keys = [
+        code * 4 + (a >= b) + (c >= d) + (e >= f)
+        for code, a, b, c, d, e, f in zip(codes, f0, s0, f1, s1, f2, s2)
+    ]
+    return (
+        array("B", map(_FIRST_WINS.__getitem__, keys)),
+        array("B", map(_VPS.__getitem__, keys)),
+    )
@@ -0,0 +1,211 @@
+"""JSON-compatible encoding of GameState, BattleState and moves.
+
+Cards are written as card_ids and resolved against the shared registry on
+load. Enums are written by name. Player ids become strings when used as
+JSON object keys and are converted back to ints on load.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from als.abilities_impl import (
+    DisruptChoice,
+    FlipChoice,
+    RedeployChoice,
+    ReinforceChoice,
+    TransportChoice,
+)
+from als.card_instance import CardInstance
+from als.card_registry import CARD_DEFINITIONS
+from als.engine import Move, decode_move
+from als.enums import (
+    BattlePhase,
+    CardOrientation,
+    CardZone,
+    GamePhase,
+    PlayerPosition,
+    TheaterType,
+)
+from als.game_state import BattleState, Deck, GameState, PlayerState
+from als.theater import Theater
+from als.types import TheaterPosition
+
+
+def _player_to_dict(player: PlayerState) -> dict[str, Any]:
+    return {
+        "position": player.position.name,
+        "hand": player.hand_ids,
+        "victory_points": player.victory_points,
+        "has_withdrawn": player.has_withdrawn,
+        "flags": dict(player.flags),
+    }
+
+
+def battle_to_dict(battle_state: BattleState) -> dict[str, Any]:
+    bs = battle_state
+    return {
+        "theaters": [
+            {
+                "type": t.theater_type.name,
+                "position": t.position.index,
+                "stacks": {
+                    str(pid): [
+                        {"card_id": c.card_id, "faceup": c.is_faceup} for c in stack.cards
+                    ]
+                    for pid, stack in t.stacks.items()
+                    if not stack.is_empty
+                },
+            }
+            for t in bs.theaters
+        ],
+        "players": {str(pid): _player_to_dict(p) for pid, p in bs.players.items()},
+        "deck": [c.card_id for c in bs.deck.cards],  # bottom to top
+        "active_player_id": bs.active_player_id,
+        "turn_number": bs.turn_number,
+        "phase": bs.phase.name,
+        "extra_turns": list(bs.extra_turns),
+        "pending_abilities": [list(p) for p in bs.pending_abilities],
+    }
+
+
+def _new_card(card_id: int) -> CardInstance:
+    if not 0 <= card_id < len(CARD_DEFINITIONS):
+        raise ValueError(f"Invalid card_id {card_id}")
+    return CardInstance(CARD_DEFINITIONS[card_id])
+
+
+def _player_from_dict(pid: int, data: dict[str, Any]) -> PlayerState:
+    player = PlayerState(pid, PlayerPosition[data["position"]])
+    for card_id in data.get("hand", []):
+        player.add_to_hand(_new_card(card_id))
+    player.victory_points = data.get("victory_points", 0)
+    player.has_withdrawn = data.get("has_withdrawn", False)
+    player.flags = dict(data.get("flags", {}))
+    return player
+
+
+def battle_from_dict(data: dict[str, Any]) -> BattleState:
+    """Rebuild a BattleState; raises ValueError if a card appears twice or is missing."""
+    theaters: list[Theater] = []
+    for t in data["theaters"]:
+        theater = Theater(TheaterType[t["type"]], TheaterPosition(t["position"]))
+        for pid_text, cards in t.get("stacks", {}).items():
+            pid = int(pid_text)
+            stack = theater.get_stack(pid)
+            for entry in cards:
+                card = _new_card(entry["card_id"])
+                card.orientation = (
+                    CardOrientation.FACEUP if entry["faceup"] else CardOrientation.FACEDOWN
+                )
+                card.zone = CardZone.BATTLEFIELD
+                card.owner = pid
+                card.theater_position = theater.position
+                stack.place_on_top(card)
+        theaters.append(theater)
+    players = {
+        int(pid): _player_from_dict(int(pid), p) for pid, p in data["players"].items()
+    }
+    deck = Deck([_new_card(card_id) for card_id in data.get("deck", [])])
+    bs = BattleState(theaters, players, deck, data["active_player_id"])
+    bs.turn_number = data.get("turn_number", 1)
+    bs.phase = BattlePhase[data.get("phase", BattlePhase.PLAYER_TURN.name)]
+    bs.extra_turns = list(data.get("extra_turns", []))
+    bs.pending_abilities = [(int(c), int(p)) for c, p in data.get("pending_abilities", [])]
+
+    seen = [c.card_id for t in theaters for c in t.all_cards()]
+    seen += [card_id for p in players.values() for card_id in p.hand_ids]
+    seen += deck.card_ids
+    if sorted(seen) != list(range(len(CARD_DEFINITIONS))):
+        raise ValueError("Battle must contain each of the 18 cards exactly once")
+    return bs
+
+
+def game_to_dict(game: GameState) -> dict[str, Any]:
+    return {
+        "player_ids": list(game.player_ids),
+        "first_player_id": game.first_player_id,
+        "winning_score": game.winning_score,
+        "phase": game.phase.name,
+        "battle_number": game.battle_number,
+        "theater_order": [t.name for t in game.theater_order],
+        "players": {str(pid): _player_to_dict(p) for pid, p in game.players.items()},
+        "current_battle": (
+            battle_to_dict(game.current_battle) if game.current_battle is not None else None
+        ),
+    }
+
+
+def game_from_dict(data: dict[str, Any]) -> GameState:
+    player_ids = tuple(data["player_ids"])
+    game = GameState(
+        (player_ids[0], player_ids[1]),
+        data["first_player_id"],
+        data.get("winning_score", 12),
+    )
+    game.phase = GamePhase[data.get("phase", GamePhase.SETUP.name)]
+    game.battle_number = data.get("battle_number", 0)
+    if "theater_order" in data:
+        game.theater_order = [TheaterType[t] for t in data["theater_order"]]
+    for pid_text, p in data.get("players", {}).items():
+        player = game.players[int(pid_text)]
+        player.position = PlayerPosition[p["position"]]
+        player.victory_points = p.get("victory_points", 0)
+    battle = data.get("current_battle")
+    game.current_battle = battle_from_dict(battle) if battle is not None else None
+    return game
+
+
+def state_from_dict(data: dict[str, Any]) -> tuple[Optional[GameState], BattleState]:
+    """Accept either a serialized GameState or a bare BattleState."""
+    if "theaters" in data:
+        return None, battle_from_dict(data)
+    game = game_from_dict(data)
+    if game.current_battle is None:
+        raise ValueError("Game has no battle in progress")
+    return game, game.current_battle
+
+
+def _choice_to_dict(choice: Any) -> Optional[dict[str, Any]]:
+    if choice is None:
+        return None
+    if isinstance(choice, FlipChoice):
+        return {"type": "flip", "card_id": choice.card_to_flip.card_id}
+    if isinstance(choice, ReinforceChoice):
+        return {"type": "reinforce", "theater_index": choice.target_theater_index}
+    if isinstance(choice, DisruptChoice):
+        return {
+            "type": "disrupt",
+            "opponent_card_id": choice.opponent_card_to_flip.card_id,
+            "own_card_id": choice.own_card_to_flip.card_id,
+        }
+    if isinstance(choice, TransportChoice):
+        return {
+            "type": "transport",
+            "card_id": choice.card_to_move.card_id,
+            "theater_index": choice.destination_theater_index,
+        }
+    if isinstance(choice, RedeployChoice):
+        card = choice.card_to_return
+        return {"type": "redeploy", "card_id": None if card is None else card.card_id}
+    raise TypeError(f"Unknown ability choice {choice!r}")
+
+
+def move_to_dict(move: Move) -> dict[str, Any]:
+    if move.is_ability_choice:
+        return {
+            "code": move.code,
+            "action": "ABILITY_CHOICE",
+            "choice": _choice_to_dict(move.choice),
+        }
+    assert move.action is not None
+    return {
+        "code": move.code,
+        "action": move.action.name,
+        "card_id": move.card_id,
+        "theater_index": move.theater_index,
+    }
+
+
+def move_from_dict(battle_state: BattleState, data: dict[str, Any]) -> Move:
+    return decode_move(battle_state, data["code"])
@@ -0,0 +1,342 @@
+"""Local move-suggestion service speaking line-delimited JSON over TCP.
+
+Each request is one JSON object per line:
+
+    {"id": 7, "state": {...}, "deadline_ms": 250}
+
+where `state` is a serialized GameState (with a battle in progress) or a
+bare BattleState (see als.serialization), and the optional `player_id`
+overrides the player to move. Each response is one line:
+
+    {"id": 7, "move": {...}, "action": "DEPLOY", "confidence": 0.8,
+     "value": 3.0, "depth": 9, "fallback": false, "elapsed_ms": 212.4}
+
+or `{"id": 7, "error": "..."}`. Responses on one connection may arrive out
+of order; match them by `id`.
+
+Searches run on a process pool. Concurrent requests for the same position
+share one search. Every request is answered by its deadline: a search that
+cannot finish in time is answered with a one-ply greedy move flagged
+`"fallback": true`. Searches carry an absolute deadline, so one that waited
+in the pool searches only for the time left, and one whose deadline passed
+while queued is skipped instead of searching for nobody. When more than
+`max_pending` searches are queued, requests that cannot join one of them
+are rejected immediately with an "overloaded" error. Greedy moves,
+parsing and cache access run on threads, off the event loop.
+
+With `--cache`, finished searches are stored in an als.analysis_cache
+database, and a position already searched for at least the request's
+budget is answered from it at once, flagged `"cached": true`.
+
+Run it with:
+
+    python -m als.service --port 8765 --workers 8 --cache analysis.sqlite
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Optional
+
+from als.alphabeta import AlphaBetaSearcher
+from als.analysis_cache import AnalysisCache
+from als.engine import legal_moves
+from als.evaluation import best_one_ply
+from als.serialization import move_to_dict, state_from_dict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEADLINE_MS = 1000
+# Time kept back from the deadline for writing the response.
+DEADLINE_MARGIN_S = 0.02
+# Share of the remaining budget given to the search itself; the rest covers
+# queueing in the pool and IPC, so results arrive before the waiter gives up.
+SEARCH_SHARE = 0.8
+# Time kept back for a search result to travel from its worker to the waiter.
+RETURN_MARGIN_S = 0.05
+# Search parameters that `search_position` results are cached under.
+SEARCH_PARAMS = "alphabeta"
+
+
+class DeadlineExpired(Exception):
+    """A queued search's deadline passed before a worker picked it up."""
+
+
+def _confidence(complete: bool, stable_iterations: int, depth: int) -> float:
+    """1.0 for a solved position, else the share of iterations agreeing on the move."""
+    if complete:
+        return 1.0
+    if depth == 0:
+        return 0.0
+    return stable_iterations / depth
+
+
+def search_position(
+    state: dict[str, Any], player_id: Optional[int], time_limit: float
+) -> dict[str, Any]:
+    """Worker entry point: search a serialized position and describe the best move."""
+    _, battle = state_from_dict(state)
+    result = AlphaBetaSearcher().search(battle, time_limit=time_limit, player_id=player_id)
+    if result.best_move is None:
+        raise ValueError("Battle is already over")
+    return {
+        "move": move_to_dict(result.best_move),
+        "action": move_to_dict(result.best_move)["action"],
+        "confidence": _confidence(result.complete, result.stable_iterations, result.depth),
+        "value": result.value,
+        "depth": result.depth,
+        "nodes": result.nodes,
+        "principal_variation": [move_to_dict(m) for m in result.principal_variation],
+    }
+
+
+def search_before(
+    state: dict[str, Any], player_id: Optional[int], time_limit: float, deadline: float
+) -> tuple[dict[str, Any], float]:
+    """Worker entry point: `search_position` ending by `deadline` (a time.time() value).
+
+    Returns the result and the seconds actually given to the search.
+    """
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise DeadlineExpired(f"deadline passed {-remaining:.3f}s before the search started")
+    time_limit = min(time_limit, remaining)
+    return search_position(state, player_id, time_limit), time_limit
+
+
+def greedy_move(state: dict[str, Any], player_id: Optional[int]) -> dict[str, Any]:
+    """One-ply fallback: the move with the best immediate evaluation."""
+    _, battle = state_from_dict(state)
+    best, best_value = best_one_ply(battle, legal_moves(battle), player_id)
+    if best is None:
+        raise ValueError("Battle is already over")
+    return {
+        "move": move_to_dict(best),
+        "action": move_to_dict(best)["action"],
+        "confidence": 0.0,
+        "value": best_value,
+        "depth": 1,
+    }
+
+
+class MoveService:
+    """Request handling shared by every connection."""
+
+    def __init__(
+        self, executor: Executor, max_pending: int = 256, cache: Optional[AnalysisCache] = None
+    ) -> None:
+        self.executor = executor
+        self.max_pending = max_pending
+        self.cache = cache
+        # SQLite connections are not shared between threads, so every cache
+        # call goes through this one thread.
+        self._cache_thread = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="als-cache")
+            if cache is not None
+            else None
+        )
+        # Search key -> in-flight search shared by identical requests.
+        self._in_flight: dict[str, asyncio.Future[tuple[dict[str, Any], float]]] = {}
+
+    def close(self) -> None:
+        """Wait for queued cache writes; the cache itself is closed by its owner."""
+        thread, self._cache_thread = self._cache_thread, None
+        if thread is not None:
+            thread.shutdown(wait=True)
+
+    @staticmethod
+    def _key(state: dict[str, Any], player_id: Optional[int]) -> str:
+        canonical = json.dumps([state, player_id], sort_keys=True, separators=(",", ":"))
+        return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+    def _search(
+        self,
+        key: str,
+        state: dict[str, Any],
+        player_id: Optional[int],
+        time_limit: float,
+        deadline: float,
+        cache_key: Optional[tuple[int, str]] = None,
+    ) -> asyncio.Future[tuple[dict[str, Any], float]]:
+        loop = asyncio.get_running_loop()
+        future = asyncio.ensure_future(
+            loop.run_in_executor(
+                self.executor, search_before, state, player_id, time_limit, deadline
+            )
+        )
+        self._in_flight[key] = future
+        future.add_done_callback(lambda f: self._finished(key, cache_key, f))
+        return future
+
+    def _finished(
+        self,
+        key: str,
+        cache_key: Optional[tuple[int, str]],
+        search: asyncio.Future[tuple[dict[str, Any], float]],
+    ) -> None:
+        self._in_flight.pop(key, None)
+        # Retrieve the exception even when every waiter has given up.
+        if search.cancelled() or search.exception() is not None:
+            return
+        if self._cache_thread is not None and cache_key is not None:
+            result, searched = search.result()
+            self._cache_thread.submit(self._store, cache_key, searched, result)
+
+    def _store(self, cache_key: tuple[int, str], time_limit: float, result: dict[str, Any]) -> None:
+        """Cache thread: record a finished search and commit it at once.
+
+        Left in the cache's batch, results would stay invisible to other
+        processes and be lost if the service is killed.
+        """
+        assert self.cache is not None
+        try:
+            self.cache.put_key(cache_key, time_limit, result)
+            self.cache.flush()
+        except Exception:
+            logger.exception("Could not store a search result in the cache")
+
+    def _lookup(
+        self, state: dict[str, Any], player_id: Optional[int], time_limit: float
+    ) -> tuple[tuple[int, str], Optional[dict[str, Any]]]:
+        """Cache thread: (cache key, cached result or None) for a request."""
+        assert self.cache is not None
+        _, battle = state_from_dict(state)
+        cache_key = self.cache.key(battle, player_id, SEARCH_PARAMS)
+        return cache_key, self.cache.get_key(cache_key, time_limit)
+
+    async def _greedy(self, state: dict[str, Any], player_id: Optional[int]) -> dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(None, greedy_move, state, player_id)
+        response["fallback"] = True
+        return response
+
+    async def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        started = time.monotonic()
+        request_id = request.get("id")
+        try:
+            state = request["state"]
+            player_id = request.get("player_id")
+            deadline_ms = request.get("deadline_ms", DEFAULT_DEADLINE_MS)
+        except (KeyError, TypeError):
+            return {"id": request_id, "error": "request needs a 'state' object"}
+        budget = deadline_ms / 1000.0 - DEADLINE_MARGIN_S
+        search_time = max(budget * SEARCH_SHARE, 0.0)
+        # A search that starts late gets the time left before its waiter gives up.
+        search_deadline = time.time() + budget - RETURN_MARGIN_S
+        loop = asyncio.get_running_loop()
+
+        response: dict[str, Any]
+        try:
+            cache_key, cached = None, None
+            if self._cache_thread is not None:
+                cache_key, cached = await loop.run_in_executor(
+                    self._cache_thread, self._lookup, state, player_id, search_time
+                )
+            if cached is not None:
+                response = cached
+                response["fallback"] = False
+                response["cached"] = True
+            elif budget <= 0:
+                response = await self._greedy(state, player_id)
+            else:
+                key = self._key(state, player_id)
+                search = self._in_flight.get(key)
+                if search is None:
+                    if len(self._in_flight) >= self.max_pending:
+                        return {"id": request_id, "error": "overloaded"}
+                    search = self._search(
+                        key, state, player_id, search_time, search_deadline, cache_key
+                    )
+                try:
+                    # Shield: a timed-out waiter must not cancel a shared search.
+                    result, _ = await asyncio.wait_for(asyncio.shield(search), budget)
+                    response = dict(result)
+                    response["fallback"] = False
+                except (asyncio.TimeoutError, DeadlineExpired):
+                    response = await self._greedy(state, player_id)
+        except (KeyError, ValueError, TypeError) as exc:
+            return {"id": request_id, "error": f"invalid state: {exc}"}
+        except Exception:
+            logger.exception("Search failed for request %r", request_id)
+            return {"id": request_id, "error": "internal error"}
+
+        response["id"] = request_id
+        response["elapsed_ms"] = round((time.monotonic() - started) * 1000.0, 1)
+        return response
+
+    async def serve_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        lock = asyncio.Lock()
+        tasks: set[asyncio.Task[None]] = set()
+
+        async def answer(line: bytes) -> None:
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+            except ValueError as exc:
+                response: dict[str, Any] = {"id": None, "error": f"bad request: {exc}"}
+            else:
+                response = await self.handle(request)
+            async with lock:
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    task = asyncio.create_task(answer(line))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            writer.close()
+
+
+async def serve(
+    host: str, port: int, workers: int, max_pending: int, cache_path: Optional[str] = None
+) -> None:
+    cache = AnalysisCache(cache_path) if cache_path else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            service = MoveService(executor, max_pending, cache)
+            try:
+                server = await asyncio.start_server(
+                    service.serve_connection, host, port, limit=1 << 20
+                )
+                logger.info("Serving on %s:%d with %d workers", host, port, workers)
+                async with server:
+                    await server.serve_forever()
+            finally:
+                service.close()
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Air, Land, and Sea move-suggestion service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--max-pending", type=int, default=256)
+    parser.add_argument("--cache", default=None, help="SQLite analysis cache to share")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.max_pending, args.cache))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
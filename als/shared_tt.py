@@ -0,0 +1,222 @@
+"""Fixed-size transposition table in shared memory, for parallel search.
+
+Several processes searching the same decision can share what they learn
+through a `SharedTranspositionTable`. The table lives in one
+`multiprocessing.shared_memory` block that every worker maps, and is
+probed and updated by 64-bit position hash (see als.hashing).
+
+Entries are three 64-bit words: the value (a double), a packed word with
+visits, depth, bound type and best move code, and a check word holding
+key ^ value ^ packed. There are no locks. Two processes writing the same
+slot at once can leave a torn entry, which fails the check and reads as
+a miss (lockless hashing, as in parallel chess engines). Slots are grouped
+in buckets of four; a store replaces the entry for the same key, else an
+empty slot, else the shallowest (then least visited) entry of the bucket.
+
+    table = SharedTranspositionTable.create(1 << 20)
+    ...  # pass `table` to workers; it pickles by name and re-attaches
+    table.close()
+    table.unlink()  # once, by the creating process
+"""
+
+from __future__ import annotations
+
+import struct
+from multiprocessing import shared_memory
+from typing import NamedTuple, Optional
+
+_WORDS = 3  # check, value, packed
+_BUCKET = 4
+_MASK64 = (1 << 64) - 1
+_DOUBLE = struct.Struct("<d")
+_BITS = struct.Struct("<Q")
+
+# Packed word: move (15) | has move (1) | bound (2) | depth (14) | visits (32).
+_MOVE_BITS = 15
+_DEPTH_SHIFT = 18
+MAX_DEPTH = (1 << 14) - 1
+MAX_VISITS = (1 << 32) - 1
+
+
+class TTEntry(NamedTuple):
+    value: float
+    visits: int
+    depth: int
+    bound: int
+    best_move: Optional[int]  # move code
+
+
+def _pack(visits: int, depth: int, bound: int, best_move: Optional[int]) -> int:
+    move = 0 if best_move is None else (1 << _MOVE_BITS) | best_move
+    return (
+        (min(visits, MAX_VISITS) << 32)
+        | (min(depth, MAX_DEPTH) << _DEPTH_SHIFT)
+        | ((bound & 3) << 16)
+        | move
+    )
+
+
+def _unpack(value_bits: int, packed: int) -> TTEntry:
+    has_move = packed >> _MOVE_BITS & 1
+    return TTEntry(
+        _DOUBLE.unpack(_BITS.pack(value_bits))[0],
+        packed >> 32,
+        packed >> _DEPTH_SHIFT & MAX_DEPTH,
+        packed >> 16 & 3,
+        packed & ((1 << _MOVE_BITS) - 1) if has_move else None,
+    )
+
+
+def _double_bits(value: float) -> int:
+    return _BITS.unpack(_DOUBLE.pack(value))[0]
+
+
+class SharedTranspositionTable:
+    """Lock-free position-hash table shared between processes."""
+
+    def __init__(self, memory: shared_memory.SharedMemory, owner: bool) -> None:
+        buf = memory.buf
+        assert buf is not None
+        # The slot count is stored in front of the entries.
+        (self.slots,) = _BITS.unpack(bytes(buf[:8]))
+        self.owner = owner
+        self._memory = memory
+        self._buckets = self.slots // _BUCKET
+        self._words = buf[8:8 + self.slots * _WORDS * 8].cast("Q")
+
+    @classmethod
+    def create(cls, slots: int = 1 << 20, name: Optional[str] = None) -> SharedTranspositionTable:
+        """A new, empty table of `slots` entries (rounded up to a multiple of 4)."""
+        slots = max(_BUCKET, -(-slots // _BUCKET) * _BUCKET)
+        memory = shared_memory.SharedMemory(name=name, create=True, size=8 + slots * _WORDS * 8)
+        buf = memory.buf
+        assert buf is not None
+        buf[:8] = _BITS.pack(slots)
+        return cls(memory, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> SharedTranspositionTable:
+        """Map an existing table created by another process."""
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._memory.name
+
+    def __reduce__(self) -> tuple:
+        return (SharedTranspositionTable.attach, (self.name,))
+
+    def close(self) -> None:
+        """Unmap the table in this process."""
+        self._words.release()
+        self._memory.close()
+
+    def unlink(self) -> None:
+        """Free the shared memory; call once, after every process has closed it."""
+        self._memory.unlink()
+
+    def __enter__(self) -> SharedTranspositionTable:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+        if self.owner:
+            self.unlink()
+
+    # --- Entries ---
+
+    def _base(self, key: int) -> int:
+        return (key % self._buckets) * _BUCKET * _WORDS
+
+    def probe(self, key: int) -> Optional[TTEntry]:
+        """The entry stored for `key`, or None."""
+        key &= _MASK64
+        words = self._words
+        base = self._base(key)
+        for i in range(base, base + _BUCKET * _WORDS, _WORDS):
+            check, value_bits, packed = words[i], words[i + 1], words[i + 2]
+            if check ^ value_bits ^ packed == key and (value_bits or packed):
+                return _unpack(value_bits, packed)
+        return None
+
+    def store(
+        self,
+        key: int,
+        value: float,
+        depth: int,
+        bound: int = 0,
+        best_move: Optional[int] = None,
+        visits: int = 0,
+    ) -> None:
+        """Write an entry for `key`, replacing the weakest slot of its bucket."""
+        key &= _MASK64
+        words = self._words
+        base = self._base(key)
+        target = base
+        weakest: Optional[tuple[int, int]] = None
+        for i in range(base, base + _BUCKET * _WORDS, _WORDS):
+            check, value_bits, packed = words[i], words[i + 1], words[i + 2]
+            if check ^ value_bits ^ packed == key or not (value_bits or packed):
+                target = i
+                break
+            strength = (packed >> _DEPTH_SHIFT & MAX_DEPTH, packed >> 32)
+            if weakest is None or strength < weakest:
+                target, weakest = i, strength
+        value_bits = _double_bits(value)
+        packed = _pack(visits, depth, bound, best_move)
+        words[target + 1] = value_bits
+        words[target + 2] = packed
+        words[target] = key ^ value_bits ^ packed
+
+    def clear(self) -> None:
+        """Empty every slot (not safe while other processes are writing)."""
+        buf = self._memory.buf
+        assert buf is not None
+        buf[8:8 + self.slots * _WORDS * 8] = bytes(self.slots * _WORDS * 8)
+
+    def occupancy(self, sample: int = 4096) -> float:
+        """Share of slots in use, estimated from the first `sample` slots."""
+        words = self._words
+        n = min(sample, self.slots)
+        used = sum(1 for i in range(0, n * _WORDS, _WORDS) if words[i + 1] or words[i + 2])
+        return used / n
+
+
+class SharedTTView:
+    """A searcher's view of a shared table, used in place of its dict.
+
+    Supports the `get`, `__getitem__`, `__setitem__` and `clear` calls the
+    alpha-beta searcher makes on (depth, value, bound, best move) tuples.
+    Keys are salted with the searching player, since stored values are from
+    that player's point of view; `clear` therefore leaves the shared
+    entries alone. Depths of `solved_depth` or more are stored as MAX_DEPTH.
+    """
+
+    def __init__(self, table: SharedTranspositionTable, solved_depth: int) -> None:
+        self.table = table
+        self.solved_depth = solved_depth
+        self.player_id = 0
+
+    def _key(self, key: int) -> int:
+        return key ^ (0x9E3779B97F4A7C15 * (self.player_id + 1))
+
+    def get(self, key: int) -> Optional[tuple[int, float, int, Optional[int]]]:
+        entry = self.table.probe(self._key(key))
+        if entry is None:
+            return None
+        depth = self.solved_depth if entry.depth == MAX_DEPTH else entry.depth
+        return (depth, entry.value, entry.bound, entry.best_move)
+
+    def __getitem__(self, key: int) -> tuple[int, float, int, Optional[int]]:
+        entry = self.get(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry
+
+    def __setitem__(self, key: int, entry: tuple[int, float, int, Optional[int]]) -> None:
+        depth, value, bound, best_move = entry
+        depth = MAX_DEPTH if depth >= self.solved_depth else min(depth, MAX_DEPTH - 1)
+        self.table.store(self._key(key), value, depth, bound, best_move)
+
+    def clear(self) -> None:
+        pass
@@ -1,10 +1,131 @@
-"""Effective strength calculator with ongoing modifier application."""
+"""Effective strength calculator with ongoing modifier application.
+
+A player's strength in a theater depends only on their stack there (each
+card's printed strength, orientation and whether it is Cover Fire), on
+whether they have an active Escalation anywhere, and on active Supports in
+adjacent theaters. The stack part is computed from a compact signature and
+memoized in an LRU cache, since the same stacks recur constantly across
+sibling search nodes and rollouts.
+"""
 
 from __future__ import annotations
 
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable, Iterable, TypeVar
+
 from als.abilities_impl import CoverFireAbility, EscalationAbility, SupportAbility
+from als.card_definition import CardDefinition
+from als.enums import CardOrientation
 from als.game_state import BattleState
-from als.theater import Theater
+from als.theater import PlayerTheaterStack, Theater
+
+DEFAULT_CACHE_SIZE = 65536
+SUPPORT_BONUS = 3
+
+# However a caller identifies theaters: positions, indexes, ...
+T = TypeVar("T")
+
+
+def card_code(definition: CardDefinition, faceup: bool) -> int:
+    """One card of a stack signature: strength << 2 | faceup << 1 | cover_fire."""
+    return (
+        (definition.printed_strength << 2)
+        | (2 if faceup else 0)
+        | (1 if isinstance(definition.ability, CoverFireAbility) else 0)
+    )
+
+
+def stack_signature(stack: PlayerTheaterStack) -> tuple[int, ...]:
+    """Encode a stack bottom-to-top as `card_code` ints."""
+    return tuple(
+        card_code(card.definition, card.orientation == CardOrientation.FACEUP)
+        for card in stack.cards
+    )
+
+
+def stack_strength(signature: tuple[int, ...], escalation: bool) -> int:
+    """Strength of a stack signature before Support bonuses.
+
+    - Cover Fire: cards covered by an active Cover Fire card have strength 4
+    - Escalation: the owning player's facedown cards have strength 4
+    """
+    covered_below = 0
+    for i, code in enumerate(signature):
+        if code & 3 == 3:  # faceup Cover Fire
+            covered_below = i
+    total = 0
+    for i, code in enumerate(signature):
+        if i < covered_below:
+            total += 4
+        elif code & 2:
+            total += code >> 2
+        else:
+            total += 4 if escalation else 2
+    return total
+
+
+_cached_stack_strength: Callable[[tuple[int, ...], bool], int] = lru_cache(
+    maxsize=DEFAULT_CACHE_SIZE
+)(stack_strength)
+
+
+@dataclass(frozen=True)
+class StrengthCacheInfo:
+    hits: int
+    misses: int
+    maxsize: int | None
+    currsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def cached_stack_strength(signature: tuple[int, ...], escalation: bool) -> int:
+    """`stack_strength` through the module's LRU cache."""
+    return _cached_stack_strength(signature, escalation)
+
+
+def configure_strength_cache(maxsize: int | None = DEFAULT_CACHE_SIZE) -> None:
+    """Replace the cache with an empty one holding up to `maxsize` stacks.
+
+    None means unbounded; 0 disables caching.
+    """
+    global _cached_stack_strength
+    _cached_stack_strength = lru_cache(maxsize=maxsize)(stack_strength)
+
+
+def strength_cache_info() -> StrengthCacheInfo:
+    info = _cached_stack_strength.cache_info()  # type: ignore[attr-defined]
+    return StrengthCacheInfo(info.hits, info.misses, info.maxsize, info.currsize)
+
+
+def clear_strength_cache() -> None:
+    _cached_stack_strength.cache_clear()  # type: ignore[attr-defined]
+
+
+def ongoing_modifiers(faceup_cards: Iterable[tuple[T, CardDefinition]]) -> tuple[bool, list[T]]:
+    """(Escalation active, theaters holding a Support) for one player.
+
+    `faceup_cards` yields (theater, definition) for each of the player's
+    faceup cards on the battlefield.
+    """
+    escalation = False
+    supports: list[T] = []
+    for theater, definition in faceup_cards:
+        ability = definition.ability
+        if isinstance(ability, EscalationAbility):
+            escalation = True
+        elif isinstance(ability, SupportAbility):
+            supports.append(theater)
+    return escalation, supports
+
+
+def support_bonus(supports: Iterable[T], is_adjacent: Callable[[T], bool]) -> int:
+    """Support: +3 in each theater adjacent to one of the player's Supports."""
+    return SUPPORT_BONUS * sum(1 for theater in supports if is_adjacent(theater))
 
 
 def calculate_theater_strength(
@@ -21,46 +142,16 @@ def calculate_theater_strength(
     if stack.is_empty:
         return 0
 
-    # Build per-card strength overrides
-    card_strengths: dict[int, int] = {}  # card id() -> strength
-
-    # Start with base effective strength for each card
-    for card in stack.cards:
-        card_strengths[id(card)] = card.effective_strength
-
-    # Apply Cover Fire: cards covered by an active Cover Fire have strength 4
-    active_ongoing = battle_state.get_active_ongoing_abilities()
-    for ability_card, ability_owner in active_ongoing:
-        ability = ability_card.definition.ability
-        if isinstance(ability, CoverFireAbility) and ability_owner == player_id:
-            # Find the stack this Cover Fire card is in
-            if ability_card.theater_position == theater.position:
-                covered = stack.cards_covered_by(ability_card)
-                for c in covered:
-                    card_strengths[id(c)] = 4
-
-    # Apply Escalation: owning player's facedown cards have strength 4
-    for ability_card, ability_owner in active_ongoing:
-        ability = ability_card.definition.ability
-        if isinstance(ability, EscalationAbility) and ability_owner == player_id:
-            for card in stack.cards:
-                if card.is_facedown:
-                    card_strengths[id(card)] = 4
-
-    total = sum(card_strengths.values())
-
-    # Apply Support: +3 from adjacent theaters
-    for ability_card, ability_owner in active_ongoing:
-        ability = ability_card.definition.ability
-        if isinstance(ability, SupportAbility) and ability_owner == player_id:
-            if (
-                ability_card.theater_position is not None
-                and ability_card.theater_position != theater.position
-                and ability_card.theater_position.is_adjacent_to(theater.position)
-            ):
-                total += 3
-
-    return total
+    # Only the player's own faceup Escalation and Support cards matter here.
+    escalation, supports = ongoing_modifiers(
+        (other.position, card.definition)
+        for other in battle_state.theaters
+        if player_id in other.stacks
+        for card in other.stacks[player_id].cards
+        if card.orientation == CardOrientation.FACEUP
+    )
+    bonus = support_bonus(supports, theater.position.is_adjacent_to) if supports else 0
+    return _cached_stack_strength(stack_signature(stack), escalation) + bonus
 
 
 def calculate_all_strengths(
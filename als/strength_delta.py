@@ -0,0 +1,234 @@
+"""What-if theater strengths for candidate moves, without applying them.
+
+Ordering moves or running a one-ply policy by forking, applying each
+candidate and calling `calculate_all_strengths` is expensive. A
+`StrengthProjector` reads the board once into stacks of card ids. For each
+candidate it then rebuilds only the stacks the candidate touches and
+recomputes the affected players' strengths with `strength_calculator`'s
+own stack rules (Cover Fire, Escalation), modifier helpers
+(`ongoing_modifiers`, `support_bonus`) and stack cache. The BattleState is
+never modified.
+
+A candidate is a sequence of `Change`s (deploy, improvise, flip, move or
+return to hand); `changes_for_move` translates engine moves:
+
+    projector = StrengthProjector(battle)
+    for move, delta in zip(moves, projector.project_moves(moves)):
+        if delta is not None and delta.changed_control:
+            ...
+
+Only strengths are projected. Instant abilities a play would trigger, and
+cards that Containment or Blockade would destroy on play, are not.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from als import strength_calculator
+from als.abilities_impl import (
+    DisruptChoice,
+    FlipChoice,
+    RedeployChoice,
+    ReinforceChoice,
+    TransportChoice,
+)
+from als.card_registry import CARD_DEFINITIONS
+from als.engine import Move
+from als.enums import CardOrientation, TurnAction
+from als.game_state import BattleState
+from als.scoring import first_player_controls, first_player_id
+from als.strength_calculator import (
+    cached_stack_strength,
+    card_code,
+    ongoing_modifiers,
+    support_bonus,
+)
+
+DEPLOY = "deploy"
+IMPROVISE = "improvise"
+FLIP = "flip"
+MOVE = "move"
+RETURN = "return"
+
+# Facedown `card_code` per card_id; faceup cards add 2.
+_CODES = tuple(card_code(d, faceup=False) for d in CARD_DEFINITIONS)
+
+
+@dataclass(frozen=True)
+class Change:
+    """One edit to the battlefield."""
+
+    kind: str  # DEPLOY, IMPROVISE, FLIP, MOVE or RETURN
+    card_id: int
+    theater_index: Optional[int] = None  # destination of DEPLOY, IMPROVISE and MOVE
+    player_id: Optional[int] = None  # who plays a DEPLOY/IMPROVISE; default the active player
+
+
+@dataclass(frozen=True)
+class StrengthDelta:
+    strengths: dict[int, dict[int, int]]  # afterwards, as calculate_all_strengths
+    deltas: dict[int, dict[int, int]]  # change per theater and player
+    controllers: dict[int, int]  # controlling player per theater afterwards
+    changed_control: tuple[int, ...]  # theater indexes whose controller changes
+
+    def controlled(self, player_id: int) -> int:
+        """Number of theaters player_id would control afterwards."""
+        return sum(1 for pid in self.controllers.values() if pid == player_id)
+
+
+def changes_for_move(move: Move) -> Optional[tuple[Change, ...]]:
+    """The battlefield changes `move` makes, or None if they cannot be projected.
+
+    Withdrawing and Reinforce plays (whose card is an unknown draw) return
+    None, as do ability choices other than flips, Transport and Redeploy.
+    Declining an ability changes nothing.
+    """
+    if not move.is_ability_choice:
+        if move.action == TurnAction.WITHDRAW:
+            return None
+        assert move.card_id is not None
+        kind = DEPLOY if move.action == TurnAction.DEPLOY else IMPROVISE
+        return (Change(kind, move.card_id, move.theater_index),)
+    choice = move.choice
+    if choice is None:
+        return ()
+    if isinstance(choice, FlipChoice):
+        return (Change(FLIP, choice.card_to_flip.card_id),)
+    if isinstance(choice, DisruptChoice):
+        return tuple(
+            Change(FLIP, card.card_id)
+            for card in (choice.opponent_card_to_flip, choice.own_card_to_flip)
+            if card is not None
+        )
+    if isinstance(choice, TransportChoice):
+        return (Change(MOVE, choice.card_to_move.card_id, choice.destination_theater_index),)
+    if isinstance(choice, RedeployChoice):
+        if choice.card_to_return is None:
+            return ()
+        return (Change(RETURN, choice.card_to_return.card_id),)
+    if isinstance(choice, ReinforceChoice) and choice.target_theater_index is None:
+        return ()
+    return None
+
+
+class StrengthProjector:
+    """Theater strengths of one BattleState after hypothetical changes."""
+
+    def __init__(self, battle_state: BattleState) -> None:
+        bs = battle_state
+        self.first_player = first_player_id(bs)
+        self.second_player = next(pid for pid in bs.players if pid != self.first_player)
+        self.active_player = bs.active_player_id
+        self._indexes = tuple(sorted(t.position.index for t in bs.theaters))
+        positions = {t.position.index: t.position for t in bs.theaters}
+        self._adjacent = {
+            i: frozenset(j for j in self._indexes if positions[j].is_adjacent_to(positions[i]))
+            for i in self._indexes
+        }
+        # (theater index, player id) -> card ids bottom to top.
+        self._stacks: dict[tuple[int, int], tuple[int, ...]] = {}
+        self._where: dict[int, tuple[int, int]] = {}  # card id -> stack key
+        self._faceup: set[int] = set()
+        for theater in bs.theaters:
+            for pid in bs.players:
+                key = (theater.position.index, pid)
+                stack = theater.stacks.get(pid)
+                cards = stack.cards if stack is not None else []
+                self._stacks[key] = tuple(c.card_id for c in cards)
+                for card in cards:
+                    self._where[card.card_id] = key
+                    if card.orientation == CardOrientation.FACEUP:
+                        self._faceup.add(card.card_id)
+        self.strengths = strength_calculator.calculate_all_strengths(bs)
+        self.controllers = {i: self._controller(s) for i, s in self.strengths.items()}
+
+    def _controller(self, by_player: dict[int, int]) -> int:
+        first, second = self.first_player, self.second_player
+        return first if first_player_controls(by_player[first], by_player[second]) else second
+
+    def _player_strengths(
+        self, stacks: dict[tuple[int, int], tuple[int, ...]], faceup: set[int], player_id: int
+    ) -> dict[int, int]:
+        rows = [stacks.get((i, player_id), self._stacks[(i, player_id)]) for i in self._indexes]
+        escalation, supports = ongoing_modifiers(
+            (i, CARD_DEFINITIONS[card_id])
+            for i, cards in zip(self._indexes, rows)
+            for card_id in cards
+            if card_id in faceup
+        )
+        result = {}
+        for i, cards in zip(self._indexes, rows):
+            if not cards:
+                result[i] = 0
+                continue
+            signature = tuple(_CODES[c] | (2 if c in faceup else 0) for c in cards)
+            bonus = support_bonus(supports, self._adjacent[i].__contains__) if supports else 0
+            result[i] = cached_stack_strength(signature, escalation) + bonus
+        return result
+
+    def project(self, changes: Sequence[Change]) -> StrengthDelta:
+        """Strengths after applying `changes` in order (the state is unchanged)."""
+        # Changed stacks and card locations only; the rest is read from self.
+        stacks: dict[tuple[int, int], tuple[int, ...]] = {}
+        where: dict[int, Optional[tuple[int, int]]] = {}
+        faceup = self._faceup
+        touched: set[int] = set()
+        for change in changes:
+            card_id = change.card_id
+            if change.kind in (DEPLOY, IMPROVISE):
+                if change.theater_index is None:
+                    raise ValueError(f"{change.kind} needs a theater_index")
+                pid = self.active_player if change.player_id is None else change.player_id
+                dest = (change.theater_index, pid)
+                stacks[dest] = stacks.get(dest, self._stacks[dest]) + (card_id,)
+                where[card_id] = dest
+                if (card_id in faceup) != (change.kind == DEPLOY):
+                    faceup = faceup ^ {card_id}
+                touched.add(pid)
+                continue
+            key = where[card_id] if card_id in where else self._where.get(card_id)
+            if key is None:
+                raise ValueError(f"Card {card_id} is not on the battlefield")
+            touched.add(key[1])
+            if change.kind == FLIP:
+                faceup = faceup ^ {card_id}
+            elif change.kind in (MOVE, RETURN):
+                stacks[key] = tuple(c for c in stacks.get(key, self._stacks[key]) if c != card_id)
+                where[card_id] = None
+                if change.kind == MOVE:
+                    if change.theater_index is None:
+                        raise ValueError("move needs a theater_index")
+                    dest = (change.theater_index, key[1])
+                    stacks[dest] = stacks.get(dest, self._stacks[dest]) + (card_id,)
+                    where[card_id] = dest
+                elif card_id in faceup:
+                    faceup = faceup - {card_id}
+            else:
+                raise ValueError(f"Unknown change kind {change.kind!r}")
+
+        strengths = self.strengths
+        if touched:
+            strengths = {i: dict(by_player) for i, by_player in strengths.items()}
+            for pid in touched:
+                for i, value in self._player_strengths(stacks, faceup, pid).items():
+                    strengths[i][pid] = value
+        deltas = {
+            i: {pid: value - self.strengths[i][pid] for pid, value in by_player.items()}
+            for i, by_player in strengths.items()
+        }
+        controllers = {i: self._controller(s) for i, s in strengths.items()}
+        changed = tuple(i for i in self._indexes if controllers[i] != self.controllers[i])
+        return StrengthDelta(strengths, deltas, controllers, changed)
+
+    def project_all(self, candidates: Sequence[Sequence[Change]]) -> list[StrengthDelta]:
+        return [self.project(changes) for changes in candidates]
+
+    def project_moves(self, moves: Sequence[Move]) -> list[Optional[StrengthDelta]]:
+        """A StrengthDelta per move, or None where `changes_for_move` gives none."""
+        result: list[Optional[StrengthDelta]] = []
+        for move in moves:
+            changes = changes_for_move(move)
+            result.append(None if changes is None else self.project(changes))
+        return result
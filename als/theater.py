@@ -19,6 +19,14 @@ class PlayerTheaterStack:
 
     def __init__(self) -> None:
         self._cards: list[CardInstance] = []
+        self._cow_owner: Optional[object] = None
+
+    def _clone(self, owner: object) -> PlayerTheaterStack:
+        """Copy of the card list (cards themselves are shared), claimed by `owner`."""
+        clone = PlayerTheaterStack.__new__(PlayerTheaterStack)
+        clone._cards = list(self._cards)
+        clone._cow_owner = owner
+        return clone
 
     @property
     def cards(self) -> list[CardInstance]:
@@ -70,6 +78,16 @@ class Theater:
         self.theater_type = theater_type
         self.position = position
         self.stacks: dict[int, PlayerTheaterStack] = {}
+        self._cow_owner: Optional[object] = None
+
+    def _clone(self, owner: object) -> Theater:
+        """Copy of the stack mapping (stacks themselves are shared), claimed by `owner`."""
+        clone = Theater.__new__(Theater)
+        clone.theater_type = self.theater_type
+        clone.position = self.position
+        clone.stacks = dict(self.stacks)
+        clone._cow_owner = owner
+        return clone
 
     def get_stack(self, player_id: int) -> PlayerTheaterStack:
         if player_id not in self.stacks:
@@ -0,0 +1 @@
+"""Performance benchmarks for the Air, Land, and Sea rule engine."""
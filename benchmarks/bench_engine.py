@@ -0,0 +1,204 @@
+"""Benchmarks for the core rule engine.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_engine                  # run and compare to baseline
+    python -m benchmarks.bench_engine --save-baseline  # record a new baseline
+    python -m benchmarks.bench_engine -k strengths     # only matching benchmarks
+
+Each benchmark runs one operation over a fixed, seeded pool of positions
+from `benchmarks.states` and reports operations per second plus the peak
+bytes allocated by a single operation (measured with tracemalloc in a
+separate pass so tracing does not distort the timings). The exit status is
+1 when any benchmark is slower than the baseline by more than --tolerance.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Callable
+
+from als.abilities import AbilityContext
+from als.deployment_validator import (
+    can_deploy_faceup,
+    post_play_blockade_check,
+    post_play_containment_check,
+)
+from als.enums import AbilityTiming
+from als.game_state import BattleState
+from als.strength_calculator import calculate_all_strengths
+from benchmarks.states import SCENARIOS, generate
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+POSITIONS_PER_SCENARIO = 50
+
+
+@dataclass
+class Benchmark:
+    name: str
+    # Builds the list of zero-argument operations to time, one per call site.
+    prepare: Callable[[BattleState], list[Callable[[], object]]]
+
+
+def _strengths(bs: BattleState) -> list[Callable[[], object]]:
+    return [lambda: calculate_all_strengths(bs)]
+
+
+def _ongoing(bs: BattleState) -> list[Callable[[], object]]:
+    return [bs.get_active_ongoing_abilities]
+
+
+def _can_deploy(bs: BattleState) -> list[Callable[[], object]]:
+    player_id = bs.active_player_id
+    return [
+        partial(can_deploy_faceup, bs, card, theater, player_id)
+        for card in bs.players[player_id].hand
+        for theater in bs.theaters
+    ]
+
+
+def _post_play(bs: BattleState) -> list[Callable[[], object]]:
+    ops: list[Callable[[], object]] = []
+    for theater in bs.theaters:
+        for player_id, stack in theater.stacks.items():
+            card = stack.uncovered_card
+            if card is None:
+                continue
+            before = theater.total_card_count() - 1
+            ops.append(partial(post_play_containment_check, bs, card, player_id))
+            ops.append(partial(post_play_blockade_check, bs, card, theater, before))
+    return ops
+
+
+def _get_choices(bs: BattleState) -> list[Callable[[], object]]:
+    ops: list[Callable[[], object]] = []
+    for theater in bs.theaters:
+        for player_id, stack in theater.stacks.items():
+            for card in stack.cards:
+                ability = card.definition.ability
+                if ability is None or ability.timing != AbilityTiming.INSTANT:
+                    continue
+                ctx = AbilityContext(bs, card, player_id, 1 - player_id)
+                ops.append(partial(ability.get_choices, ctx))
+    return ops
+
+
+BENCHMARKS = [
+    Benchmark("calculate_all_strengths", _strengths),
+    Benchmark("get_active_ongoing_abilities", _ongoing),
+    Benchmark("can_deploy_faceup", _can_deploy),
+    Benchmark("post_play_checks", _post_play),
+    Benchmark("ability_get_choices", _get_choices),
+]
+
+
+def _time_ops(ops: list[Callable[[], object]], min_time: float) -> float:
+    """Return operations per second, repeating the pool for at least min_time."""
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_time:
+        for op in ops:
+            op()
+        calls += len(ops)
+        elapsed = time.perf_counter() - start
+    return calls / elapsed
+
+
+def _peak_alloc(ops: list[Callable[[], object]]) -> float:
+    """Return the mean peak bytes allocated while running a single operation."""
+    tracemalloc.start()
+    try:
+        total = 0
+        for op in ops:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            op()
+            total += tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+    return total / len(ops)
+
+
+def run(selected: list[Benchmark], seed: int, min_time: float) -> dict[str, dict[str, float]]:
+    positions = {
+        scenario: generate(scenario, POSITIONS_PER_SCENARIO, seed) for scenario in SCENARIOS
+    }
+    results: dict[str, dict[str, float]] = {}
+    for bench in selected:
+        for scenario, states in positions.items():
+            ops = [op for bs in states for op in bench.prepare(bs)]
+            if not ops:
+                continue
+            results[f"{bench.name}[{scenario}]"] = {
+                "ops_per_sec": _time_ops(ops, min_time),
+                "peak_bytes_per_op": _peak_alloc(ops),
+            }
+    return results
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float,
+) -> list[str]:
+    """Print a report and return the names of benchmarks that regressed."""
+    regressions: list[str] = []
+    print(f"{'benchmark':<46} {'ops/sec':>12} {'baseline':>12} {'change':>8} {'peak B/op':>10}")
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base is None:
+            change = ""
+            base_ops = ""
+        else:
+            ratio = r["ops_per_sec"] / base["ops_per_sec"] - 1.0
+            change = f"{ratio:+.1%}"
+            base_ops = f"{base['ops_per_sec']:,.0f}"
+            if ratio < -tolerance:
+                regressions.append(name)
+                change += " !"
+        print(
+            f"{name:<46} {r['ops_per_sec']:>12,.0f} {base_ops:>12} {change:>8} "
+            f"{r['peak_bytes_per_op']:>10,.0f}"
+        )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="pattern", default="", help="substring filter on names")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per benchmark")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    selected = [b for b in BENCHMARKS if args.pattern in b.name]
+    results = run(selected, args.seed, args.min_time)
+
+    if args.save_baseline:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        compare(results, {}, args.tolerance)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+"""Throughput benchmarks for the rollout policies in als.rollouts.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_rollouts                  # run and compare to baseline
+    python -m benchmarks.bench_rollouts --save-baseline  # record a new baseline
+    python -m benchmarks.bench_rollouts -k softmax       # only matching policies
+
+Each operation plays one seeded playout with a policy from a position of
+`benchmarks.states` to the end of the battle, so ops/sec is playouts per
+second. Results share the baseline file and report format of
+`benchmarks.bench_engine`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Callable
+
+from als.engine import apply_move, is_terminal
+from als.game_state import BattleState
+from als.rollouts import ROLLOUTS, RolloutPolicy
+from benchmarks.bench_engine import BASELINE_PATH, Benchmark, compare, run
+
+# Guards against ability loops (as in als.arena).
+MAX_DECISIONS = 1000
+
+
+def playout(battle_state: BattleState, policy: RolloutPolicy, rng: random.Random) -> int:
+    """Play a fork of battle_state to the end; returns the number of decisions."""
+    state = battle_state.fork()
+    decisions = 0
+    while not is_terminal(state) and decisions < MAX_DECISIONS:
+        apply_move(state, policy(state, rng))
+        decisions += 1
+    return decisions
+
+
+def _playouts(policy: RolloutPolicy) -> Callable[[BattleState], list[Callable[[], object]]]:
+    def prepare(bs: BattleState) -> list[Callable[[], object]]:
+        rng = random.Random(0)
+        return [lambda: playout(bs, policy, rng)]
+
+    return prepare
+
+
+BENCHMARKS = [Benchmark(f"rollout_{name}", _playouts(make())) for name, make in ROLLOUTS.items()]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", dest="pattern", default="", help="substring filter on names")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per benchmark")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    selected = [b for b in BENCHMARKS if args.pattern in b.name]
+    results = run(selected, args.seed, args.min_time)
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    if args.save_baseline:
+        baseline.update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        compare(results, {}, args.tolerance)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
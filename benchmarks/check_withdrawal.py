@@ -0,0 +1,70 @@
+"""Regression check: a search agent must not withdraw on its first turn.
+
+Run from the repository root:
+
+    python -m benchmarks.check_withdrawal
+    python -m benchmarks.check_withdrawal --agent "mcts:time=0.1,seed=0" --battles 20
+
+Plays seeded battles of the agent against a random opponent, alternating
+the agent between 1st and 2nd player. Against a random opponent, giving
+up on the first turn is never right; a leaf evaluation that makes every
+unfinished position look worse than withdrawing shows up here at once.
+Exits with status 1 if the agent withdrew on its first turn in any battle.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+
+from als.agents import make_agent
+from als.arena import MAX_DECISIONS_PER_BATTLE, PLAYER_IDS, battle_deal
+from als.engine import apply_move, current_player, is_terminal, start_battle
+from als.enums import TurnAction
+from als.game_state import GameState
+
+
+def first_turn_withdrawal(agent_spec: str, seed: int) -> bool:
+    """Play one battle; True if the agent's first turn action was to withdraw.
+
+    The agent is the 1st player in even seeds and the 2nd in odd ones.
+    """
+    seat = PLAYER_IDS[seed % 2]
+    game = GameState(PLAYER_IDS, first_player_id=PLAYER_IDS[0])
+    battle = start_battle(game, battle_deal(seed, 0))
+    agents = {
+        seat: make_agent(agent_spec),
+        PLAYER_IDS[1 - seed % 2]: make_agent(f"random:seed={seed}"),
+    }
+    for _ in range(MAX_DECISIONS_PER_BATTLE):
+        if is_terminal(battle):
+            break
+        player_id = current_player(battle)
+        move = agents[player_id].select_move(battle)
+        if player_id == seat and not move.is_ability_choice:
+            return move.action == TurnAction.WITHDRAW
+        apply_move(battle, move)
+    return False
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agent", default="alphabeta:time=0.1", help="agent spec to check")
+    parser.add_argument("--battles", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    failures = [
+        seed
+        for seed in range(args.seed, args.seed + args.battles)
+        if first_turn_withdrawal(args.agent, seed)
+    ]
+    print(f"{args.agent}: withdrew on its first turn in {len(failures)}/{args.battles} battles")
+    if failures:
+        print(f"Seeds: {', '.join(map(str, failures))}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""Seeded generators of random-but-legal BattleState positions.
+
+Positions are produced by dealing a shuffled deck and playing random turns:
+faceup plays only go where `can_deploy_faceup` allows, facedown plays go
+anywhere, the Containment/Blockade post-play checks are applied, and instant
+abilities of faceup plays are resolved with a random valid choice. The same
+seed always yields the same positions.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Callable, Optional
+
+from als.abilities import AbilityContext
+from als.card_instance import CardInstance
+from als.card_registry import CARD_DEFINITIONS
+from als.deployment_validator import (
+    can_deploy_faceup,
+    post_play_blockade_check,
+    post_play_containment_check,
+)
+from als.enums import AbilityTiming, CardOrientation, PlayerPosition, TheaterType
+from als.game_state import BattleState, Deck, PlayerState
+from als.theater import Theater
+from als.types import TheaterPosition
+
+PLAYER_IDS = (0, 1)
+
+
+def deal_battle(rng: random.Random) -> BattleState:
+    """Deal a fresh battle with a random theater order; player 0 is 1st player."""
+    order = [TheaterType.AIR, TheaterType.LAND, TheaterType.SEA]
+    rng.shuffle(order)
+    theaters = [Theater(t, TheaterPosition(i)) for i, t in enumerate(order)]
+    cards = [CardInstance(d) for d in CARD_DEFINITIONS]
+    rng.shuffle(cards)
+    players = {
+        0: PlayerState(0, PlayerPosition.FIRST),
+        1: PlayerState(1, PlayerPosition.SECOND),
+    }
+    for card in cards[:6]:
+        players[0].add_to_hand(card)
+    for card in cards[6:12]:
+        players[1].add_to_hand(card)
+    return BattleState(theaters, players, Deck(cards[12:]), active_player_id=0)
+
+
+def _play_random_turn(
+    bs: BattleState,
+    rng: random.Random,
+    faceup_bias: float,
+    prefer_ongoing: bool,
+    theater_weights: Optional[list[float]],
+) -> None:
+    player_id = bs.active_player_id
+    opponent_id = 1 - player_id
+    hand = bs.players[player_id].hand
+    if prefer_ongoing:
+        ongoing = [
+            c for c in hand if c.definition.ability_timing == AbilityTiming.ONGOING
+        ]
+        card = rng.choice(ongoing or hand)
+    else:
+        card = rng.choice(hand)
+
+    faceup_targets = [t for t in bs.theaters if can_deploy_faceup(bs, card, t, player_id)]
+    if faceup_targets and rng.random() < faceup_bias:
+        orientation = CardOrientation.FACEUP
+        theater = rng.choice(faceup_targets)
+    else:
+        orientation = CardOrientation.FACEDOWN
+        theater = rng.choices(bs.theaters, weights=theater_weights)[0]
+
+    cards_before = theater.total_card_count()
+    bs.remove_card_from_hand(card, player_id)
+    bs.play_card_to_theater(card, player_id, theater, orientation)
+    bs.set_player_flag(player_id, "air_drop_active", False)
+    if post_play_containment_check(bs, card, player_id) or post_play_blockade_check(
+        bs, card, theater, cards_before
+    ):
+        bs.destroy_card(card)
+    elif orientation == CardOrientation.FACEUP:
+        ability = card.definition.ability
+        if ability is not None and ability.timing == AbilityTiming.INSTANT:
+            ctx = AbilityContext(bs, card, player_id, opponent_id)
+            if ability.is_possible(ctx):
+                choices = ability.get_choices(ctx)
+                if choices:
+                    ability.execute(ctx, rng.choice(choices))
+
+    bs.turn_number += 1
+    if bs.extra_turns:
+        bs.active_player_id = bs.extra_turns.pop(0)
+    elif bs.players[opponent_id].hand:
+        bs.active_player_id = opponent_id
+
+
+def random_battle_state(
+    seed: int,
+    cards_to_play: int,
+    faceup_bias: float = 0.6,
+    prefer_ongoing: bool = False,
+    theater_weights: Optional[list[float]] = None,
+) -> BattleState:
+    """Deal a battle and play up to `cards_to_play` random turns into it."""
+    rng = random.Random(seed)
+    bs = deal_battle(rng)
+    for _ in range(cards_to_play):
+        if not bs.players[bs.active_player_id].hand:
+            break
+        _play_random_turn(bs, rng, faceup_bias, prefer_ongoing, theater_weights)
+    return bs
+
+
+def crowded_board(seed: int) -> BattleState:
+    """Most cards played, concentrated into one or two theaters."""
+    rng = random.Random(seed)
+    weights = [rng.choice((1.0, 6.0)) for _ in range(3)]
+    return random_battle_state(seed, 10, faceup_bias=0.4, theater_weights=weights)
+
+
+def many_ongoing(seed: int) -> BattleState:
+    """Mid-battle board with as many ongoing abilities faceup as possible."""
+    return random_battle_state(seed, 8, faceup_bias=0.95, prefer_ongoing=True)
+
+
+def late_battle(seed: int) -> BattleState:
+    """One or two cards left in hand between the two players."""
+    return random_battle_state(seed, 10 + seed % 2)
+
+
+SCENARIOS: dict[str, Callable[[int], BattleState]] = {
+    "crowded": crowded_board,
+    "many_ongoing": many_ongoing,
+    "late_battle": late_battle,
+}
+
+
+def generate(scenario: str, count: int, seed: int = 0) -> list[BattleState]:
+    """Return `count` positions of a scenario, reproducible from `seed`."""
+    make = SCENARIOS[scenario]
+    return [make(seed * 100_003 + i) for i in range(count)]